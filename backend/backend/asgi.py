@@ -13,4 +13,23 @@ from django.core.asgi import get_asgi_application
 
 os.environ.setdefault("DJANGO_SETTINGS_MODULE", "backend.settings")
 
-application = get_asgi_application()
+# Initialize Django before importing code that touches the models
+django_asgi_app = get_asgi_application()
+
+from channels.routing import ProtocolTypeRouter, URLRouter  # noqa: E402
+from channels.security.websocket import OriginValidator  # noqa: E402
+from django.conf import settings  # noqa: E402
+
+from backend.ws_auth import JWTAuthMiddleware  # noqa: E402
+from tickets.routing import websocket_urlpatterns  # noqa: E402
+
+application = ProtocolTypeRouter(
+    {
+        "http": django_asgi_app,
+        # Dashboards are served by the frontend, same origins as CORS
+        "websocket": OriginValidator(
+            JWTAuthMiddleware(URLRouter(websocket_urlpatterns)),
+            settings.CORS_ALLOWED_ORIGINS,
+        ),
+    }
+)
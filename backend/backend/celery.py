@@ -2,7 +2,6 @@ from __future__ import absolute_import, unicode_literals
 
 import logging
 import os
-import subprocess
 
 from celery import Celery, shared_task
 
@@ -30,5 +29,23 @@ def debug_task(self):
 
 @shared_task
 def check_pending_payments_task():
-    logger.info("Running check_pending_payments management command")
-    subprocess.run(["python", "manage.py", "check_pending_payments"], check=False)
+    from tasks.check_payments import reconcile_pending_payments
+
+    logger.info("Reconciling pending Asaas payments")
+    return reconcile_pending_payments()
+
+
+@shared_task
+def expire_reservations_task():
+    from tasks.expire_reservations import expire_stale_reservations
+
+    logger.info("Releasing seats held by stale unpaid orders")
+    return expire_stale_reservations()
+
+
+@shared_task
+def resume_import_jobs_task():
+    from tasks.import_job_task import resume_stale_import_jobs
+
+    logger.info("Resuming stale import jobs")
+    return resume_stale_import_jobs()
@@ -0,0 +1,53 @@
+from rest_framework.pagination import CursorPagination, PageNumberPagination
+
+
+class CursorOrPageNumberPagination(CursorPagination):
+    """
+    Keyset (cursor) pagination by default: no COUNT(*) and no OFFSET, so deep
+    pages cost the same as the first one. The ordering must end on a unique
+    column and should match a composite index of the list.
+
+    Requests with ?page= keep the previous page-number behaviour (with the
+    total count) for existing clients, using the same ordering.
+    """
+
+    ordering = ("-created_at", "-id")
+    page_size_query_param = "page_size"
+    max_page_size = 100
+    page_number_query_param = "page"
+
+    def paginate_queryset(self, queryset, request, view=None):
+        self.page_number_paginator = None
+        if self.page_number_query_param in request.query_params:
+            self.page_number_paginator = PageNumberPagination()
+            self.page_number_paginator.page_size = self.page_size
+            self.page_number_paginator.page_size_query_param = (
+                self.page_size_query_param
+            )
+            self.page_number_paginator.max_page_size = self.max_page_size
+            ordering = self.get_ordering(request, queryset, view)
+            return self.page_number_paginator.paginate_queryset(
+                queryset.order_by(*ordering), request, view
+            )
+
+        return super().paginate_queryset(queryset, request, view)
+
+    def get_paginated_response(self, data):
+        if self.page_number_paginator is not None:
+            return self.page_number_paginator.get_paginated_response(data)
+        return super().get_paginated_response(data)
+
+    def get_next_link(self):
+        if self.page_number_paginator is not None:
+            return self.page_number_paginator.get_next_link()
+        return super().get_next_link()
+
+    def get_previous_link(self):
+        if self.page_number_paginator is not None:
+            return self.page_number_paginator.get_previous_link()
+        return super().get_previous_link()
+
+
+class EventPagination(CursorOrPageNumberPagination):
+    # Upcoming events first, matches the (is_active, date, id) index
+    ordering = ("date", "id")
@@ -19,6 +19,7 @@ from pathlib import Path
 # 3rd party apps
 import socket
 from celery.schedules import crontab
+from django.core.exceptions import ImproperlyConfigured
 from dj_database_url import parse
 from dotenv import load_dotenv
 
@@ -29,6 +30,10 @@ BASE_DIR = Path(__file__).resolve().parent.parent
 
 SECRET_KEY = getenv("SECRET_KEY", "dev-secret")
 
+# Base64 Ed25519 private key (32 bytes) signing ticket QR codes.
+# Derived from SECRET_KEY when unset.
+QR_SIGNING_KEY = getenv("QR_SIGNING_KEY", "")
+
 DEBUG = getenv("DEBUG")
 
 ALLOWED_HOSTS = getenv('ALLOWED_HOSTS', '').split(',')
@@ -59,6 +64,7 @@ INSTALLED_APPS = [
     "django.contrib.messages",
     "django.contrib.staticfiles",
     # third-party apps
+    "channels",
     "rest_framework",
     "corsheaders",
     "rest_framework_simplejwt",
@@ -93,7 +99,7 @@ REST_FRAMEWORK = {
     "DEFAULT_PERMISSION_CLASSES": [
         "rest_framework.permissions.IsAuthenticatedOrReadOnly",
     ],
-    "DEFAULT_PAGINATION_CLASS": "rest_framework.pagination.PageNumberPagination",
+    "DEFAULT_PAGINATION_CLASS": "backend.pagination.CursorOrPageNumberPagination",
     "PAGE_SIZE": 15,
 }
 
@@ -124,8 +130,31 @@ CELERY_BEAT_SCHEDULE = {
         "task": "backend.celery.check_pending_payments_task",
         "schedule": crontab(minute="*/30"),
     },
+    "expire-reservations-every-15min": {
+        "task": "backend.celery.expire_reservations_task",
+        "schedule": crontab(minute="*/15"),
+    },
+    "resume-import-jobs-every-5min": {
+        "task": "backend.celery.resume_import_jobs_task",
+        "schedule": crontab(minute="*/5"),
+    },
 }
 
+# Channels (WebSockets)
+ASGI_APPLICATION = "backend.asgi.application"
+# Redis fans the events out across Daphne processes, e.g. redis://redis:6379/1
+# Without it the in-memory layer only reaches clients of the same process
+CHANNEL_REDIS_URL = getenv("CHANNEL_REDIS_URL", "")
+if CHANNEL_REDIS_URL:
+    CHANNEL_LAYERS = {
+        "default": {
+            "BACKEND": "channels_redis.core.RedisChannelLayer",
+            "CONFIG": {"hosts": [CHANNEL_REDIS_URL]},
+        }
+    }
+else:
+    CHANNEL_LAYERS = {"default": {"BACKEND": "channels.layers.InMemoryChannelLayer"}}
+
 ROOT_URLCONF = "backend.urls"
 
 TEMPLATES = [
@@ -162,6 +191,26 @@ DATABASES = {
 #         }
 #     }
 
+# Cache, Redis (e.g. redis://redis:6379/2). Email verification codes live in
+# it, so every process serving the API must share it: the in-process
+# "locmem://" cache is only for DEBUG and the test suite
+CACHE_URL = getenv("CACHE_URL", "locmem://" if DEBUG else "")
+if not CACHE_URL:
+    raise ImproperlyConfigured(
+        "CACHE_URL is required when DEBUG is off, e.g. redis://redis:6379/2"
+    )
+if CACHE_URL == "locmem://":
+    CACHES = {
+        "default": {"BACKEND": "django.core.cache.backends.locmem.LocMemCache"}
+    }
+else:
+    CACHES = {
+        "default": {
+            "BACKEND": "django.core.cache.backends.redis.RedisCache",
+            "LOCATION": CACHE_URL,
+        }
+    }
+
 
 # Password validation
 # https://docs.djangoproject.com/en/5.2/ref/settings/#auth-password-validators
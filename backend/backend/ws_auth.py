@@ -0,0 +1,30 @@
+from urllib.parse import parse_qs
+
+from channels.db import database_sync_to_async
+from channels.middleware import BaseMiddleware
+from django.contrib.auth import get_user_model
+from django.contrib.auth.models import AnonymousUser
+from rest_framework_simplejwt.exceptions import TokenError
+from rest_framework_simplejwt.tokens import AccessToken
+
+
+@database_sync_to_async
+def get_user_for_token(raw_token):
+    try:
+        user_id = AccessToken(raw_token)["user_id"]
+        return get_user_model().objects.get(pk=user_id, is_active=True)
+    except (TokenError, KeyError, get_user_model().DoesNotExist):
+        return AnonymousUser()
+
+
+class JWTAuthMiddleware(BaseMiddleware):
+    """
+    Authenticates WebSocket connections with the same access tokens as the API.
+    Browsers cannot set headers on WebSockets, so the token comes in ?token=.
+    """
+
+    async def __call__(self, scope, receive, send):
+        query = parse_qs(scope.get("query_string", b"").decode())
+        token = query.get("token", [None])[0]
+        scope["user"] = await get_user_for_token(token) if token else AnonymousUser()
+        return await super().__call__(scope, receive, send)
@@ -0,0 +1,87 @@
+import json
+import logging
+import time
+from hashlib import sha256
+from os import getenv
+
+from django.core.cache import cache
+from django.utils.http import http_date, parse_http_date_safe
+from dotenv import load_dotenv
+from rest_framework import status
+from rest_framework.renderers import JSONRenderer
+from rest_framework.response import Response
+
+load_dotenv()
+
+logger = logging.getLogger(__name__)
+
+# Seconds a rendered catalog response stays cached (invalidation is explicit)
+EVENT_CACHE_TTL = int(getenv("EVENT_CACHE_TTL", "3600"))
+
+CATALOG_VERSION_KEY = "events:catalog:version"
+
+
+def catalog_version() -> int:
+    """
+    Current catalog version, the time (ns) of the last change to any event.
+    Every cached response is keyed by it, so bumping it invalidates them all.
+    """
+    version = cache.get(CATALOG_VERSION_KEY)
+    if version is None:
+        cache.add(CATALOG_VERSION_KEY, time.time_ns(), timeout=None)
+        version = cache.get(CATALOG_VERSION_KEY)
+    return version
+
+
+def bump_catalog_version():
+    """Invalidate every cached catalog response."""
+    try:
+        cache.set(CATALOG_VERSION_KEY, time.time_ns(), timeout=None)
+    except Exception as e:
+        logger.error(f"Could not invalidate the event catalog cache: {e}")
+
+
+class CachedCatalogMixin:
+    """
+    Serves GET responses from the cache and answers conditional requests.
+
+    The rendered payload is cached per catalog version and full path, with
+    an ETag (hash of the payload) and a Last-Modified (time of the version).
+    Only 200 responses are cached.
+    """
+
+    def get(self, request, *args, **kwargs):
+        version = catalog_version()
+        key = f"events:catalog:{version}:{request.get_full_path()}"
+
+        entry = cache.get(key)
+        if entry is None:
+            response = super().get(request, *args, **kwargs)
+            if response.status_code != status.HTTP_200_OK:
+                return response
+
+            payload = JSONRenderer().render(response.data)
+            entry = {
+                "data": json.loads(payload),
+                "etag": f'"{sha256(payload).hexdigest()[:32]}"',
+                "last_modified": version // 1_000_000_000,
+            }
+            cache.set(key, entry, EVENT_CACHE_TTL)
+
+        headers = {
+            "ETag": entry["etag"],
+            "Last-Modified": http_date(entry["last_modified"]),
+            "Cache-Control": "public, no-cache",
+        }
+        if self._not_modified(request, entry):
+            return Response(status=status.HTTP_304_NOT_MODIFIED, headers=headers)
+        return Response(entry["data"], headers=headers)
+
+    @staticmethod
+    def _not_modified(request, entry) -> bool:
+        if_none_match = request.headers.get("If-None-Match")
+        if if_none_match:
+            return entry["etag"] in if_none_match or if_none_match.strip() == "*"
+
+        since = parse_http_date_safe(request.headers.get("If-Modified-Since", ""))
+        return since is not None and entry["last_modified"] <= since
@@ -0,0 +1,46 @@
+import logging
+
+from django.db.models import F, Q
+from django.db.models.functions import Greatest
+
+from .models import Event
+
+logger = logging.getLogger(__name__)
+
+
+def reserve_seats(event_id, quantity: int) -> bool:
+    """
+    Atomically hold `quantity` seats of an event.
+
+    A single conditional UPDATE increments the reserved counter only while it
+    stays within max_attendees, so the check is O(1) and concurrent buyers can
+    never oversell: the row lock is held for the statement only, and the
+    second writer re-evaluates the condition against the committed value.
+    Events without max_attendees are unlimited.
+
+    Returns: True if the seats were reserved, False if the event is full.
+    """
+    if quantity <= 0:
+        return False
+
+    updated = (
+        Event.objects.filter(id=event_id)
+        .filter(
+            Q(max_attendees__isnull=True)
+            | Q(reserved_seats__lte=F("max_attendees") - quantity)
+        )
+        .update(reserved_seats=F("reserved_seats") + quantity)
+    )
+    return updated == 1
+
+
+def release_seats(event_id, quantity: int):
+    """
+    Give `quantity` reserved seats of an event back (cancelled or expired order).
+    """
+    if quantity <= 0:
+        return
+
+    Event.objects.filter(id=event_id).update(
+        reserved_seats=Greatest(F("reserved_seats") - quantity, 0)
+    )
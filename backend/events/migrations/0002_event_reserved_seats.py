@@ -0,0 +1,35 @@
+from django.db import migrations, models
+from django.db.models import Count, OuterRef, Subquery
+from django.db.models.functions import Coalesce
+
+
+def backfill_reserved_seats(apps, schema_editor):
+    Event = apps.get_model("events", "Event")
+    Ticket = apps.get_model("tickets", "Ticket")
+
+    held = (
+        Ticket.objects.filter(event=OuterRef("pk"))
+        .exclude(order__status="cancelled")
+        .values("event")
+        .annotate(total=Count("id"))
+        .values("total")
+    )
+    Event.objects.update(reserved_seats=Coalesce(Subquery(held), 0))
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("events", "0001_initial"),
+        ("orders", "0001_initial"),
+        ("tickets", "0001_initial"),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name="event",
+            name="reserved_seats",
+            field=models.IntegerField(default=0),
+        ),
+        migrations.RunPython(backfill_reserved_seats, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,19 @@
+# Generated by Django 5.2.8 on 2026-10-16 23:54
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("events", "0002_event_reserved_seats"),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name="event",
+            index=models.Index(
+                fields=["is_active", "date", "id"], name="events_active_date_idx"
+            ),
+        ),
+    ]
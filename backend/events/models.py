@@ -19,12 +19,22 @@ class Event(models.Model):
     image_url = models.CharField(max_length=500, blank=True)
     max_attendees = models.IntegerField(null=True, blank=True)
     current_attendees = models.IntegerField(default=0)
+    """
+    Seats held by pending and paid orders, maintained by events.inventory.
+    """
+    reserved_seats = models.IntegerField(default=0)
     is_active = models.BooleanField(default=True)
     created_at = models.DateTimeField(auto_now_add=True)
     updated_at = models.DateTimeField(auto_now=True)
 
     class Meta:
         db_table = "events"
+        indexes = [
+            # Active catalog, keyset paginated
+            models.Index(
+                fields=["is_active", "date", "id"], name="events_active_date_idx"
+            ),
+        ]
 
     def __str__(self):
         return self.title
@@ -10,5 +10,5 @@ class EventSerializer(serializers.ModelSerializer):
 
     class Meta:
         model = Event
-        fields = "__all__"
+        exclude = ["reserved_seats"]
         read_only_fields = ["created_by"]
@@ -0,0 +1,13 @@
+from django.db import transaction
+from django.db.models.signals import post_delete, post_save
+from django.dispatch import receiver
+
+from .cache import bump_catalog_version
+from .models import Event
+
+
+@receiver(post_save, sender=Event)
+@receiver(post_delete, sender=Event)
+def invalidate_event_catalog(sender, **kwargs):
+    # After commit, so a concurrent request cannot re-cache the old rows
+    transaction.on_commit(bump_catalog_version)
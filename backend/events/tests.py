@@ -12,6 +12,14 @@ def api_client():
     return APIClient()
 
 
+@pytest.fixture(autouse=True)
+def clear_cache():
+    """Catalog responses are cached, start every test from a cold cache"""
+    from django.core.cache import cache
+
+    cache.clear()
+
+
 @pytest.fixture
 def active_event(db):
     """An active event to appear in the list."""
@@ -114,3 +122,125 @@ class TestEventDetailView:
 
         assert response.status_code == status.HTTP_500_INTERNAL_SERVER_ERROR
         assert "Erro interno do servidor" in str(response.data)
+
+
+@pytest.mark.django_db
+class TestInventory:
+    """Seats are reserved with a single conditional update"""
+
+    def test_reserve_until_full(self, active_event):
+        from events.inventory import reserve_seats
+
+        active_event.max_attendees = 3
+        active_event.save()
+
+        assert reserve_seats(active_event.id, 2) is True
+        assert reserve_seats(active_event.id, 2) is False
+        assert reserve_seats(active_event.id, 1) is True
+        assert reserve_seats(active_event.id, 1) is False
+
+        active_event.refresh_from_db()
+        assert active_event.reserved_seats == 3
+
+    def test_unlimited_event(self, active_event):
+        from events.inventory import reserve_seats
+
+        assert reserve_seats(active_event.id, 500) is True
+        active_event.refresh_from_db()
+        assert active_event.reserved_seats == 500
+
+    def test_release_never_goes_negative(self, active_event):
+        from events.inventory import release_seats, reserve_seats
+
+        reserve_seats(active_event.id, 1)
+        release_seats(active_event.id, 5)
+
+        active_event.refresh_from_db()
+        assert active_event.reserved_seats == 0
+
+    def test_reserved_seats_not_exposed(self, api_client, active_event):
+        url = reverse("event-detail", args=[active_event.id])
+        response = api_client.get(url)
+        assert "reserved_seats" not in response.data
+
+
+@pytest.mark.django_db
+class TestCatalogCache:
+    """Catalog responses are cached, invalidated on change and revalidated"""
+
+    def test_list_is_served_from_cache(
+        self, api_client, active_event, django_assert_num_queries
+    ):
+        url = reverse("event-list")
+        first = api_client.get(url)
+
+        with django_assert_num_queries(0):
+            second = api_client.get(url)
+
+        assert second.status_code == status.HTTP_200_OK
+        assert second.data == first.data
+        assert second["ETag"] == first["ETag"]
+
+    def test_conditional_get_returns_304(self, api_client, active_event):
+        url = reverse("event-detail", kwargs={"pk": active_event.id})
+        response = api_client.get(url)
+
+        etag = api_client.get(url, HTTP_IF_NONE_MATCH=response["ETag"])
+        assert etag.status_code == status.HTTP_304_NOT_MODIFIED
+
+        since = api_client.get(
+            url, HTTP_IF_MODIFIED_SINCE=response["Last-Modified"]
+        )
+        assert since.status_code == status.HTTP_304_NOT_MODIFIED
+
+    def test_save_invalidates(
+        self, api_client, active_event, django_capture_on_commit_callbacks
+    ):
+        url = reverse("event-detail", kwargs={"pk": active_event.id})
+        etag = api_client.get(url)["ETag"]
+
+        with django_capture_on_commit_callbacks(execute=True):
+            active_event.title = "Renamed Festival"
+            active_event.save()
+
+        response = api_client.get(url, HTTP_IF_NONE_MATCH=etag)
+        assert response.status_code == status.HTTP_200_OK
+        assert response.data["title"] == "Renamed Festival"
+
+    def test_attendee_count_update_invalidates(
+        self, api_client, active_event, django_capture_on_commit_callbacks
+    ):
+        from unittest.mock import patch
+        from uuid import uuid4
+
+        from helper_functions import fulfill_order
+        from orders.models import Order
+        from tickets.models import Ticket
+        from users.models import User
+
+        user = User.objects.create_user(
+            email="buyer@example.com",
+            password="BuyerPass123!",
+            cpf="123.456.789-09",
+            birth_date="1990-01-01",
+        )
+        order = Order.objects.create(
+            id=str(uuid4()), user=user, amount=100, payment_method="pix"
+        )
+        Ticket.objects.create(
+            name="Buyer",
+            cpf="123.456.789-09",
+            order=order,
+            event=active_event,
+            type_of_ticket="first batch",
+            qr_code_data=f"QR-{uuid4()}",
+        )
+
+        url = reverse("event-detail", kwargs={"pk": active_event.id})
+        assert api_client.get(url).data["current_attendees"] == 0
+
+        with patch("tasks.fulfillment_task.start_order_fulfillment"):
+            with django_capture_on_commit_callbacks(execute=True):
+                fulfill_order(order)
+
+        assert api_client.get(url).data["current_attendees"] == 1
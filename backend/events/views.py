@@ -5,19 +5,23 @@ from rest_framework.generics import ListAPIView, RetrieveAPIView
 from rest_framework.permissions import AllowAny
 from rest_framework.response import Response
 
+from backend.pagination import EventPagination
+
+from .cache import CachedCatalogMixin
 from .models import Event
 from .serializers import EventSerializer
 
 logger = logging.getLogger(__name__)
 
 
-class EventListView(ListAPIView):
+class EventListView(CachedCatalogMixin, ListAPIView):
     queryset = Event.objects.filter(is_active=True).order_by("date", "id")
     serializer_class = EventSerializer
     permission_classes = [AllowAny]
+    pagination_class = EventPagination
 
 
-class EventDetailView(RetrieveAPIView):
+class EventDetailView(CachedCatalogMixin, RetrieveAPIView):
     queryset = Event.objects.filter(is_active=True).order_by("-date", "-id")
     serializer_class = EventSerializer
     permission_classes = [AllowAny]
@@ -2,8 +2,13 @@ from random import randint
 from datetime import datetime, timedelta
 from jwt import ExpiredSignatureError, InvalidTokenError, encode, decode
 from django.conf import settings
+import re
 import string
 import random
+import base64
+import hashlib
+from functools import lru_cache
+from uuid import UUID
 
 import logging
 
@@ -15,12 +20,6 @@ def generate_verification_code():
     """
     return str(randint(100000, 999999))
 
-def get_code_expiration():
-    """
-    Get the expiration time for the verification code.
-    """
-    return datetime.now() + timedelta(minutes=15)
-
 def generate_reset_token(email: str) -> str:
     """
     Generate a JWT token for password reset that expires in 15 minutes.
@@ -51,9 +50,19 @@ def generate_courtesy_code():
     random_part = ''.join(random.choices(string.ascii_uppercase + string.digits, k=8))
     return f"CDPI{random_part}"
 
+def normalize_cpf(value) -> str:
+    """Digits-only CPF, the key every CPF lookup and uniqueness check uses."""
+    return re.sub(r"\D", "", value or "")
+
+def format_cpf(value) -> str:
+    """CPF in the 000.000.000-00 display format."""
+    digits = normalize_cpf(value)
+    return f"{digits[:3]}.{digits[3:6]}.{digits[6:9]}-{digits[9:]}"
+
 def detect_delimiter(file_obj):
     """Detect the most likely delimiter in the CSV."""
-    sample = file_obj.read(1024).decode("utf-8").split("\n")[0]
+    # A multi-byte character may be cut at the end of the sample
+    sample = file_obj.read(1024).decode("utf-8", errors="ignore").split("\n")[0]
     comma_count = sample.count(",")
     semicolon_count = sample.count(";")
     tab_count = sample.count("\t")
@@ -67,91 +76,232 @@ def detect_delimiter(file_obj):
 
 def fulfill_order(order):
     """
-    Process order fulfillment after payment confirmation.
-    Generates QR codes and sends ticket emails.
+    Mark an order as paid after payment confirmation and schedule its fulfillment.
+    QR codes and ticket emails are handled by the Celery pipeline once the paid
+    status is committed, so the caller returns right away.
+    Only pending orders are fulfilled: a cancelled order gave its seats and
+    tickets back, a late payment for it is logged to be refunded instead.
+
+    Returns: True if the order transitioned to paid, False otherwise.
     """
-    from tasks.email_tasks import send_ticket_email
+    from django.db import transaction
+    from django.db.models import Count, F
+    from django.utils import timezone
+
+    from events.cache import bump_catalog_version
+    from events.models import Event
+    from orders.models import Order
+    from tasks.fulfillment_task import start_order_fulfillment
     from tickets.models import Ticket
-    from tickets.models import CourtesyAttendee
 
     try:
-        # Get all tickets for this order
-        tickets = Ticket.objects.filter(order=order).select_related('event', 'courtesy_link_id')
-
-        if not tickets.exists():
-            logger.warning(f"No tickets found for order {order.id}")
-            return
-
-        # Track events to update attendee counts (handle multiple events)
-        events_to_update = {}
-        failed_qr_count = 0
-
-        # Update order status
-        order.status = "paid"
-        order.save(update_fields=["status"])
-
-        # Generate QR codes for all tickets and send them via email
-        for ticket in tickets:
-            qr_url = process_ticket_qr(ticket)
-            if not qr_url:
-                logger.error(f"Failed to process QR for ticket {ticket.id}")
-                failed_qr_count += 1
-
-            # Track event for attendee count update
-            event = ticket.event
-            if event and hasattr(event, "current_attendees"):
-                if event.id not in events_to_update:
-                    events_to_update[event.id] = event
-
-            if ticket.type_of_ticket == "courtesy":
-                attendee = CourtesyAttendee.objects.get(courtesy_link_id=ticket.courtesy_link_id)
-                email = attendee.email
-            else:
-                email = order.user.email
-
-            send_ticket_email.delay(email, str(order.id))
-
-        # Update attendee counts for all events
-        for event in events_to_update.values():
-            event.current_attendees = (event.current_attendees or 0) + order.quantity
-            event.save(update_fields=["current_attendees"])
-
-        if failed_qr_count > 0:
-            logger.warning(f"⚠️ Order {order.id} fulfilled with {failed_qr_count} QR code failures")
-        else:
-            logger.info(f"✅ Order {order.id} fulfilled successfully")
+        with transaction.atomic():
+            # Conditional update so concurrent webhooks/polls fulfill only once
+            updated = Order.objects.filter(id=order.id, status="pending").update(
+                status="paid"
+            )
+
+            if not updated:
+                current = Order.objects.values_list("status", flat=True).get(
+                    id=order.id
+                )
+                if current == "cancelled":
+                    logger.error(
+                        f"🚨 Payment confirmed for cancelled order {order.id}, it must be refunded"
+                    )
+                else:
+                    logger.info(f"Order {order.id} is {current}, skipping fulfillment")
+                order.status = current
+                return False
+
+            order.status = "paid"
+            # The tickets now admit their holders, gate manifest deltas pick
+            # them up by updated_at
+            Ticket.objects.filter(order=order).update(updated_at=timezone.now())
+
+            # Update attendee counts for all events of the order
+            tickets_per_event = (
+                Ticket.objects.filter(order=order)
+                .values("event_id")
+                .annotate(total=Count("id"))
+            )
+            if not tickets_per_event:
+                logger.warning(f"No tickets found for order {order.id}")
+
+            for row in tickets_per_event:
+                Event.objects.filter(id=row["event_id"]).update(
+                    current_attendees=F("current_attendees") + row["total"]
+                )
+            # update() skips the Event signals, refresh the catalog ourselves
+            transaction.on_commit(bump_catalog_version)
+
+            order_id = str(order.id)
+            transaction.on_commit(lambda: start_order_fulfillment(order_id))
+
+        logger.info(f"✅ Order {order.id} marked as paid, fulfillment scheduled")
+        return True
 
     except Exception as e:
         logger.error(f"Error fulfilling order {order.id}: {e}", exc_info=True)
         raise
 
-def process_ticket_qr(ticket):
+def cancel_order(order, pending_only=False):
     """
-    Generate QR code and upload to S3 for a ticket.
-    Updates ticket.qr_code_s3_url.
+    Cancel an order and give everything it was holding back:
+    the reserved seats, its tickets, the courtesy link uses and, for paid
+    orders, the attendee counts.
+    With pending_only, orders that were paid in the meantime are left untouched.
 
-    Returns: S3 URL or None
+    Returns: True if the order transitioned to cancelled, False otherwise.
     """
-    from tasks.qr_code_task import generate_ticket_qr_code
-    from tasks.s3_task import upload_qr_to_s3
+    from django.db import transaction
+    from django.db.models import Count, F
+    from django.db.models.functions import Greatest
 
-    try:
-        # 1. Generate QR code
-        qr_bytes = generate_ticket_qr_code(ticket)
+    from events.cache import bump_catalog_version
+    from events.inventory import release_seats
+    from events.models import Event
+    from orders.courtesy import release_courtesy_uses
+    from orders.models import Order
+    from tickets.models import Ticket
+
+    with transaction.atomic():
+        # Lock the order so a concurrent payment confirmation waits for us
+        locked = (
+            Order.objects.select_for_update()
+            .only("status", "quantity", "courtesy_link_id")
+            .get(id=order.id)
+        )
+        if locked.status == "cancelled" or (
+            pending_only and locked.status != "pending"
+        ):
+            logger.info(f"Order {order.id} is {locked.status}, not cancelling")
+            return False
+
+        Order.objects.filter(id=order.id).update(status="cancelled")
+        order.status = "cancelled"
+
+        tickets_per_event = (
+            Ticket.objects.filter(order_id=order.id)
+            .values("event_id")
+            .annotate(total=Count("id"))
+        )
+        for row in tickets_per_event:
+            release_seats(row["event_id"], row["total"])
+            if locked.status == "paid":
+                Event.objects.filter(id=row["event_id"]).update(
+                    current_attendees=Greatest(
+                        F("current_attendees") - row["total"], 0
+                    )
+                )
+        if locked.status == "paid":
+            transaction.on_commit(bump_catalog_version)
+
+        Ticket.objects.filter(order_id=order.id).delete()
+
+        if locked.courtesy_link_id_id:
+            release_courtesy_uses(locked.courtesy_link_id_id, locked.quantity)
+
+    logger.info(f"🚫 Order {order.id} cancelled, reservation released")
+    return True
+
+def process_tickets_qr(tickets):
+    """
+    Generate the QR codes of the tickets: rendered, uploaded concurrently to
+    S3 and every URL saved with a single bulk_update.
+
+    Returns: list of ticket ids that failed
+    """
+    from tasks.qr_code_task import generate_ticket_qr_codes
+    from tasks.s3_task import upload_qr_codes_to_s3
+    from tickets.models import Ticket
 
-        # 2. Upload to S3
-        filename = f"{ticket.id}-{ticket.event.id}"
-        s3_url = upload_qr_to_s3(qr_bytes, filename)
+    tickets = list(tickets)
+    if not tickets:
+        return []
 
-        # 3. Update ticket
+    # 1. Generate QR codes
+    rendered = generate_ticket_qr_codes(tickets)
+
+    # 2. Upload to S3
+    filenames = {ticket.id: f"{ticket.id}-{ticket.event_id}" for ticket in tickets}
+    urls = upload_qr_codes_to_s3(
+        {filenames[ticket_id]: png for ticket_id, png in rendered.items()}
+    )
+
+    # 3. Update tickets
+    uploaded, failed = [], []
+    for ticket in tickets:
+        s3_url = urls.get(filenames[ticket.id])
         if s3_url:
             ticket.qr_code_s3_url = s3_url
-            ticket.save(update_fields=["qr_code_s3_url"])
-            return s3_url
+            uploaded.append(ticket)
+        else:
+            failed.append(ticket.id)
 
-        logger.warning(f"Failed to upload QR code for ticket {ticket.id}")
-        return None
+    Ticket.objects.bulk_update(uploaded, ["qr_code_s3_url"])
 
-    except Exception as e:
-        logger.error(f"Error processing QR for ticket {ticket.id}: {e}")
+    if failed:
+        logger.warning(f"Failed to process QR codes for tickets {failed}")
+
+    return failed
+
+QR_PAYLOAD_PREFIX = "CDPI1"
+
+def _b64url_encode(data: bytes) -> str:
+    return base64.urlsafe_b64encode(data).rstrip(b"=").decode()
+
+def _b64url_decode(data: str) -> bytes:
+    return base64.urlsafe_b64decode(data + "=" * (-len(data) % 4))
+
+@lru_cache(maxsize=1)
+def get_qr_signing_key():
+    """
+    Ed25519 key signing ticket QR codes.
+    Uses QR_SIGNING_KEY when set, otherwise a seed derived from SECRET_KEY.
+    """
+    from cryptography.hazmat.primitives.asymmetric.ed25519 import Ed25519PrivateKey
+
+    if settings.QR_SIGNING_KEY:
+        seed = base64.b64decode(settings.QR_SIGNING_KEY)
+    else:
+        seed = hashlib.sha256(f"qr-signing:{settings.SECRET_KEY}".encode()).digest()
+    return Ed25519PrivateKey.from_private_bytes(seed)
+
+def get_qr_public_key() -> str:
+    """Raw Ed25519 public key, base64url encoded, for scanners to verify offline."""
+    from cryptography.hazmat.primitives.serialization import Encoding, PublicFormat
+
+    raw = get_qr_signing_key().public_key().public_bytes(Encoding.Raw, PublicFormat.Raw)
+    return _b64url_encode(raw)
+
+def sign_ticket_qr(ticket_id, event_id) -> str:
+    """
+    Build the signed QR payload of a ticket:
+    CDPI1.<base64url(16-byte ticket uuid + 4-byte event id)>.<base64url(signature)>
+    Scanners holding the public key can validate it without a network call.
+    """
+    body = UUID(str(ticket_id)).bytes + int(event_id).to_bytes(4, "big")
+    signature = get_qr_signing_key().sign(body)
+    return f"{QR_PAYLOAD_PREFIX}.{_b64url_encode(body)}.{_b64url_encode(signature)}"
+
+def verify_ticket_qr(payload: str):
+    """
+    Check the signature of a QR payload.
+
+    Returns: (ticket_id, event_id), or None if the payload is not a valid signed QR.
+    """
+    from cryptography.exceptions import InvalidSignature
+
+    try:
+        prefix, body, signature = payload.split(".")
+        if prefix != QR_PAYLOAD_PREFIX:
+            return None
+        body = _b64url_decode(body)
+        if len(body) != 20:
+            return None
+        get_qr_signing_key().public_key().verify(_b64url_decode(signature), body)
+    except (ValueError, InvalidSignature):
         return None
+
+    return UUID(bytes=body[:16]), int.from_bytes(body[16:], "big")
@@ -0,0 +1,51 @@
+import base64
+from functools import lru_cache
+from hashlib import sha256
+
+from .models import ContentBlob
+
+
+def store_attachment(uploaded_file) -> dict:
+    """
+    Store an uploaded file as a content-addressed blob, once per distinct
+    content, and return the reference the email tasks carry:
+    {"blob": sha256, "filename", "type"}.
+    """
+    digest = sha256()
+    for chunk in uploaded_file.chunks():
+        digest.update(chunk)
+    key = digest.hexdigest()
+
+    if not ContentBlob.objects.filter(sha256=key).exists():
+        uploaded_file.seek(0)
+        data = uploaded_file.read()
+        ContentBlob.objects.get_or_create(
+            sha256=key, defaults={"data": data, "size": len(data)}
+        )
+
+    return {
+        "blob": key,
+        "filename": uploaded_file.name,
+        "type": uploaded_file.content_type or "application/octet-stream",
+    }
+
+
+@lru_cache(maxsize=8)
+def load_attachment_content(blob_key: str) -> str:
+    """
+    Base64 content of a blob, as SendGrid expects it.
+    Loaded and encoded once per worker process, blobs never change.
+    """
+    data = ContentBlob.objects.values_list("data", flat=True).get(sha256=blob_key)
+    return base64.b64encode(bytes(data)).decode()
+
+
+@lru_cache(maxsize=2)
+def load_blob_data(blob_key: str) -> bytes:
+    """
+    Raw bytes of a blob, e.g. an uploaded CSV read again by every import chunk.
+    Loaded once per worker process, blobs never change.
+    """
+    return bytes(
+        ContentBlob.objects.values_list("data", flat=True).get(sha256=blob_key)
+    )
@@ -0,0 +1,50 @@
+from django.db.models import Case, F, Value, When
+from django.db.models.functions import Greatest
+
+from .models import CourtesyLink
+
+
+def consume_courtesy_uses(link_id, quantity: int) -> bool:
+    """
+    Atomically redeem `quantity` uses of a courtesy link.
+
+    A single conditional UPDATE checks the link is active and that
+    used_count + quantity <= ticket_count, increments the counter and
+    deactivates the link when it runs out, all against the current row value.
+    Concurrent redemptions of the same code never lose updates or over-redeem,
+    and no lock is held beyond the statement.
+
+    Returns: True if the uses were consumed, False if the link is exhausted.
+    """
+    if quantity <= 0:
+        return False
+
+    updated = CourtesyLink.objects.filter(
+        pk=link_id,
+        is_active=True,
+        used_count__lte=F("ticket_count") - quantity,
+    ).update(
+        used_count=F("used_count") + quantity,
+        is_active=Case(
+            When(used_count__gte=F("ticket_count") - quantity, then=Value(False)),
+            default=Value(True),
+        ),
+    )
+    return updated == 1
+
+
+def release_courtesy_uses(link_id, quantity: int):
+    """
+    Give `quantity` uses of a courtesy link back (cancelled order).
+    A link that was deactivated because it ran out becomes active again.
+    """
+    if quantity <= 0:
+        return
+
+    CourtesyLink.objects.filter(pk=link_id).update(
+        is_active=Case(
+            When(used_count__gte=F("ticket_count"), then=Value(True)),
+            default=F("is_active"),
+        ),
+        used_count=Greatest(F("used_count") - quantity, 0),
+    )
@@ -0,0 +1,29 @@
+# Generated by Django 5.2.8 on 2026-10-16 23:54
+
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("events", "0003_event_events_active_date_idx"),
+        ("orders", "0001_initial"),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name="courtesylink",
+            index=models.Index(
+                fields=["created_by", "-created_at", "-id"],
+                name="courtesy_created_by_idx",
+            ),
+        ),
+        migrations.AddIndex(
+            model_name="order",
+            index=models.Index(
+                fields=["user", "-created_at", "-id"], name="orders_user_created_idx"
+            ),
+        ),
+    ]
@@ -0,0 +1,161 @@
+# Generated by Django 5.2.8 on 2026-10-17 00:16
+
+import django.db.models.deletion
+import uuid
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("events", "0003_event_events_active_date_idx"),
+        ("orders", "0004_contentblob"),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name="courtesylink",
+            name="import_row",
+            field=models.PositiveIntegerField(blank=True, null=True),
+        ),
+        migrations.CreateModel(
+            name="ImportJob",
+            fields=[
+                (
+                    "id",
+                    models.UUIDField(
+                        default=uuid.uuid4,
+                        editable=False,
+                        primary_key=True,
+                        serialize=False,
+                    ),
+                ),
+                (
+                    "kind",
+                    models.CharField(
+                        choices=[("courtesy_links", "Courtesy links")], max_length=50
+                    ),
+                ),
+                (
+                    "status",
+                    models.CharField(
+                        choices=[
+                            ("queued", "Queued"),
+                            ("running", "Running"),
+                            ("finished", "Finished"),
+                            ("failed", "Failed"),
+                        ],
+                        default="queued",
+                        max_length=20,
+                    ),
+                ),
+                ("options", models.JSONField(blank=True, default=dict)),
+                ("chunk_size", models.PositiveIntegerField()),
+                ("total_rows", models.PositiveIntegerField(blank=True, null=True)),
+                ("error", models.TextField(blank=True)),
+                ("created_at", models.DateTimeField(auto_now_add=True)),
+                ("updated_at", models.DateTimeField(auto_now=True)),
+                ("finished_at", models.DateTimeField(blank=True, null=True)),
+                (
+                    "created_by",
+                    models.ForeignKey(
+                        db_column="created_by",
+                        on_delete=django.db.models.deletion.CASCADE,
+                        to=settings.AUTH_USER_MODEL,
+                    ),
+                ),
+                (
+                    "source",
+                    models.ForeignKey(
+                        db_column="source_sha256",
+                        on_delete=django.db.models.deletion.PROTECT,
+                        to="orders.contentblob",
+                    ),
+                ),
+            ],
+            options={
+                "db_table": "import_jobs",
+            },
+        ),
+        migrations.CreateModel(
+            name="ImportChunk",
+            fields=[
+                (
+                    "id",
+                    models.BigAutoField(
+                        auto_created=True,
+                        primary_key=True,
+                        serialize=False,
+                        verbose_name="ID",
+                    ),
+                ),
+                ("index", models.PositiveIntegerField()),
+                ("start_row", models.PositiveIntegerField()),
+                ("start_offset", models.PositiveBigIntegerField()),
+                ("row_count", models.PositiveIntegerField()),
+                (
+                    "status",
+                    models.CharField(
+                        choices=[
+                            ("pending", "Pending"),
+                            ("imported", "Imported"),
+                            ("done", "Done"),
+                            ("failed", "Failed"),
+                        ],
+                        default="pending",
+                        max_length=20,
+                    ),
+                ),
+                ("attempts", models.PositiveIntegerField(default=0)),
+                ("succeeded", models.PositiveIntegerField(default=0)),
+                ("failed", models.PositiveIntegerField(default=0)),
+                ("errors", models.JSONField(blank=True, default=list)),
+                ("error", models.TextField(blank=True)),
+                ("processed_at", models.DateTimeField(blank=True, null=True)),
+                (
+                    "job",
+                    models.ForeignKey(
+                        on_delete=django.db.models.deletion.CASCADE,
+                        related_name="chunks",
+                        to="orders.importjob",
+                    ),
+                ),
+            ],
+            options={
+                "db_table": "import_chunks",
+                "ordering": ["job", "index"],
+            },
+        ),
+        migrations.AddField(
+            model_name="courtesylink",
+            name="import_job",
+            field=models.ForeignKey(
+                blank=True,
+                db_column="import_job_id",
+                null=True,
+                on_delete=django.db.models.deletion.SET_NULL,
+                related_name="courtesy_links",
+                to="orders.importjob",
+            ),
+        ),
+        migrations.AddConstraint(
+            model_name="courtesylink",
+            constraint=models.UniqueConstraint(
+                fields=("import_job", "import_row"), name="courtesy_import_row_uniq"
+            ),
+        ),
+        migrations.AddIndex(
+            model_name="importjob",
+            index=models.Index(
+                fields=["status", "updated_at"], name="import_status_updated_idx"
+            ),
+        ),
+        migrations.AddConstraint(
+            model_name="importchunk",
+            constraint=models.UniqueConstraint(
+                fields=("job", "index"), name="import_chunk_index_uniq"
+            ),
+        ),
+    ]
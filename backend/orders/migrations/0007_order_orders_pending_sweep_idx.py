@@ -0,0 +1,30 @@
+# Generated by Django 5.2.8 on 2026-10-17 00:52
+
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("orders", "0006_importchunk_claimed_at"),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.RemoveIndex(
+            model_name="order",
+            name="orders_status_payment_idx",
+        ),
+        migrations.AddIndex(
+            model_name="order",
+            index=models.Index(
+                condition=models.Q(
+                    ("status", "pending"),
+                    models.Q(("asaas_payment_id", ""), _negated=True),
+                ),
+                fields=["id"],
+                name="orders_pending_sweep_idx",
+            ),
+        ),
+    ]
@@ -0,0 +1,18 @@
+# Generated by Django 5.2.8 on 2026-10-17 00:54
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("orders", "0007_order_orders_pending_sweep_idx"),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name="importjob",
+            name="resumes",
+            field=models.PositiveIntegerField(default=0),
+        ),
+    ]
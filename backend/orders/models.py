@@ -26,9 +26,31 @@ class CourtesyLink(models.Model):
     recipient_name = models.CharField(
         max_length=255, blank=True, null=True
     )  # Overriden when sending mass emails
+    # CSV row the link was imported from, a resumed import never creates it twice
+    import_job = models.ForeignKey(
+        "ImportJob",
+        on_delete=models.SET_NULL,
+        null=True,
+        blank=True,
+        related_name="courtesy_links",
+        db_column="import_job_id",
+    )
+    import_row = models.PositiveIntegerField(null=True, blank=True)
 
     class Meta:
         db_table = "courtesy_links"
+        indexes = [
+            # Admin link list, keyset paginated
+            models.Index(
+                fields=["created_by", "-created_at", "-id"],
+                name="courtesy_created_by_idx",
+            ),
+        ]
+        constraints = [
+            models.UniqueConstraint(
+                fields=["import_job", "import_row"], name="courtesy_import_row_uniq"
+            ),
+        ]
 
 
 class Order(models.Model):
@@ -69,3 +91,131 @@ class Order(models.Model):
 
     class Meta:
         db_table = "orders"
+        indexes = [
+            # User order history, keyset paginated
+            models.Index(
+                fields=["user", "-created_at", "-id"], name="orders_user_created_idx"
+            ),
+            # Pending payments sweep, keyset paginated by id over the pending
+            # orders that have an Asaas payment
+            models.Index(
+                fields=["id"],
+                condition=models.Q(status="pending") & ~models.Q(asaas_payment_id=""),
+                name="orders_pending_sweep_idx",
+            ),
+            # Reservation expiry, only the (few) pending orders are indexed
+            models.Index(
+                fields=["created_at"],
+                condition=models.Q(status="pending"),
+                name="orders_pending_created_idx",
+            ),
+        ]
+
+
+class ContentBlob(models.Model):
+    """
+    Attachment bytes stored once, addressed by their SHA-256.
+    Tasks carry the hash instead of the content.
+    """
+
+    sha256 = models.CharField(max_length=64, primary_key=True)
+    data = models.BinaryField()
+    size = models.PositiveIntegerField()
+    created_at = models.DateTimeField(auto_now_add=True)
+
+    class Meta:
+        db_table = "content_blobs"
+
+    def __str__(self):
+        return f"{self.sha256} ({self.size} bytes)"
+
+
+class ImportJob(models.Model):
+    """
+    Admin bulk operation running in the background over an uploaded file.
+    The file is split in chunks of rows, see ImportChunk, so a job survives
+    worker restarts and its chunks run in parallel across workers.
+    """
+
+    KIND_CHOICES = [
+        ("courtesy_links", "Courtesy links"),
+    ]
+    STATUS_CHOICES = [
+        ("queued", "Queued"),
+        ("running", "Running"),
+        ("finished", "Finished"),
+        ("failed", "Failed"),
+    ]
+
+    id = models.UUIDField(primary_key=True, default=uuid4, editable=False)
+    kind = models.CharField(max_length=50, choices=KIND_CHOICES)
+    status = models.CharField(max_length=20, choices=STATUS_CHOICES, default="queued")
+    source = models.ForeignKey(
+        ContentBlob, on_delete=models.PROTECT, db_column="source_sha256"
+    )
+    options = models.JSONField(default=dict, blank=True)
+    created_by = models.ForeignKey(
+        User, on_delete=models.CASCADE, db_column="created_by"
+    )
+    chunk_size = models.PositiveIntegerField()
+    total_rows = models.PositiveIntegerField(null=True, blank=True)  # Set once planned
+    resumes = models.PositiveIntegerField(default=0)  # Since the last progress
+    error = models.TextField(blank=True)
+    created_at = models.DateTimeField(auto_now_add=True)
+    updated_at = models.DateTimeField(auto_now=True)
+    finished_at = models.DateTimeField(null=True, blank=True)
+
+    class Meta:
+        db_table = "import_jobs"
+        indexes = [
+            # Stale job sweep
+            models.Index(
+                fields=["status", "updated_at"], name="import_status_updated_idx"
+            ),
+        ]
+
+    def __str__(self):
+        return f"{self.kind} {self.id} ({self.status})"
+
+
+class ImportChunk(models.Model):
+    """
+    Checkpoint of an ImportJob: a range of rows, with the byte offset it starts
+    at, processed in a single transaction.
+    pending -> imported (rows committed) -> claimed (follow-up, e.g. emails,
+    running) -> done
+    """
+
+    STATUS_CHOICES = [
+        ("pending", "Pending"),
+        ("imported", "Imported"),
+        ("claimed", "Claimed"),
+        ("done", "Done"),
+        ("failed", "Failed"),
+    ]
+
+    job = models.ForeignKey(ImportJob, on_delete=models.CASCADE, related_name="chunks")
+    index = models.PositiveIntegerField()
+    start_row = models.PositiveIntegerField()
+    start_offset = models.PositiveBigIntegerField()
+    row_count = models.PositiveIntegerField()
+    status = models.CharField(max_length=20, choices=STATUS_CHOICES, default="pending")
+    attempts = models.PositiveIntegerField(default=0)
+    succeeded = models.PositiveIntegerField(default=0)
+    failed = models.PositiveIntegerField(default=0)
+    errors = models.JSONField(default=list, blank=True)  # [{"row", "error"}]
+    error = models.TextField(blank=True)  # Chunk or follow-up given up
+    processed_at = models.DateTimeField(null=True, blank=True)
+    claimed_at = models.DateTimeField(null=True, blank=True)
+
+    class Meta:
+        db_table = "import_chunks"
+        ordering = ["job", "index"]
+        constraints = [
+            models.UniqueConstraint(
+                fields=["job", "index"], name="import_chunk_index_uniq"
+            ),
+        ]
+
+    def __str__(self):
+        return f"{self.job_id} #{self.index} ({self.status})"
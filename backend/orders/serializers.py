@@ -18,6 +18,29 @@ class OrderSerializer(serializers.ModelSerializer):
         read_only_fields = ["user", "amount", "status"]
 
 
+class OrderCreateSerializer(serializers.Serializer):
+    """Checkout request body, validated before any seat is reserved."""
+
+    eventId = serializers.IntegerField(
+        error_messages={"required": "eventId and paymentMethod are required"}
+    )
+    paymentMethod = serializers.CharField(
+        error_messages={
+            "required": "eventId and paymentMethod are required",
+            "blank": "eventId and paymentMethod are required",
+        }
+    )
+    code = serializers.CharField(required=False, allow_blank=True, allow_null=True)
+    quantity = serializers.IntegerField(
+        default=1,
+        min_value=1,
+        error_messages={
+            "invalid": "Quantidade inválida",
+            "min_value": "A quantidade deve ser pelo menos 1",
+        },
+    )
+
+
 class CourtesyLinkSerializer(serializers.ModelSerializer):
     eventId = serializers.PrimaryKeyRelatedField(
         queryset=Event.objects.all(), source="event", write_only=True
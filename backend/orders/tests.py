@@ -84,9 +84,21 @@ class TestOrderView:
         assert response.status_code == status.HTTP_404_NOT_FOUND
         assert response.data["error"] == "Evento não encontrado"
 
+    @pytest.mark.parametrize("quantity", [0, -1])
+    def test_non_positive_quantity(self, api_client, staff_user, test_event, quantity):
+        api_client.force_authenticate(user=staff_user)
+        url = reverse("order-list")
+        data = {"eventId": test_event.id, "paymentMethod": "pix", "quantity": quantity}
+
+        response = api_client.post(url, data, format="json")
+        assert response.status_code == status.HTTP_400_BAD_REQUEST
+        assert response.data["error"] == "A quantidade deve ser pelo menos 1"
+        assert not Order.objects.exists()
+
     def test_event_capacity_full(self, api_client, staff_user, test_event):
         """Fails when current tickets exceed event max"""
         test_event.max_attendees = 1
+        test_event.reserved_seats = 1
         test_event.save()
         # Create one ticket to fill capacity
         Order.objects.create(
@@ -142,7 +154,7 @@ class TestOrderView:
         assert response.status_code == status.HTTP_400_BAD_REQUEST
         assert "esgotado" in response.data["error"]
 
-    @patch('tasks.asaas_payment_task.AsaasPaymentTask.create_payment')
+    @patch('tasks.asaas_payment_task.AsaasPaymentTask.acreate_payment')
     def test_order_with_valid_promo_code(self, mock_create_payment, api_client, staff_user, courtesy_link):
         # Mock the payment response
         mock_create_payment.return_value = {
@@ -178,4 +190,1395 @@ class TestOrderView:
         assert "order" in response.data
         created_order = Order.objects.get(id=response.data["order"]["id"])
         assert created_order.amount > 0
-        assert Ticket.objects.filter(order=created_order).count() == 1
\ No newline at end of file
+        assert Ticket.objects.filter(order=created_order).count() == 1
+
+@pytest.fixture
+def pending_order(db, staff_user, test_event):
+    """Pending order with two tickets awaiting payment confirmation"""
+    order = Order.objects.create(
+        id=str(uuid4()),
+        user=staff_user,
+        amount=Decimal("205.00"),
+        quantity=2,
+        payment_method="pix",
+        asaas_payment_id="pay_456",
+    )
+    for i in range(2):
+        Ticket.objects.create(
+            name=f"Ticket {i}",
+            cpf=staff_user.cpf,
+            order=order,
+            event=test_event,
+            type_of_ticket="first batch",
+            qr_code_data=f"QR-{uuid4()}",
+        )
+    return order
+
+
+@pytest.mark.django_db
+class TestWebHookView:
+    """Tests for POST /api/webhooks/asaas/ (WebHookView)"""
+
+    def _post(self, api_client, order, payment_status="CONFIRMED"):
+        url = reverse("order-asaas-webhook")
+        payload = {
+            "payment": {"externalReference": order.id, "status": payment_status}
+        }
+        return api_client.post(
+            url, payload, format="json", HTTP_ACCESS_TOKEN="token"
+        )
+
+    @patch("tasks.fulfillment_task.start_order_fulfillment")
+    def test_confirmed_payment_schedules_fulfillment(
+        self,
+        mock_start,
+        api_client,
+        pending_order,
+        test_event,
+        django_capture_on_commit_callbacks,
+    ):
+        with django_capture_on_commit_callbacks(execute=True):
+            response = self._post(api_client, pending_order)
+
+        assert response.status_code == status.HTTP_200_OK
+        pending_order.refresh_from_db()
+        test_event.refresh_from_db()
+        assert pending_order.status == "paid"
+        assert test_event.current_attendees == 2
+        mock_start.assert_called_once_with(pending_order.id)
+
+    @patch("tasks.fulfillment_task.start_order_fulfillment")
+    def test_fulfillment_is_idempotent(
+        self,
+        mock_start,
+        pending_order,
+        test_event,
+        django_capture_on_commit_callbacks,
+    ):
+        from helper_functions import fulfill_order
+
+        with django_capture_on_commit_callbacks(execute=True):
+            assert fulfill_order(pending_order) is True
+            assert fulfill_order(Order.objects.get(id=pending_order.id)) is False
+
+        test_event.refresh_from_db()
+        assert test_event.current_attendees == 2
+        mock_start.assert_called_once()
+
+    def test_overdue_payment_keeps_the_order(self, api_client, pending_order):
+        response = self._post(api_client, pending_order, "OVERDUE")
+
+        assert response.status_code == status.HTTP_200_OK
+        pending_order.refresh_from_db()
+        assert pending_order.status == "pending"
+
+    def test_deleted_payment_cancels_the_order(self, api_client, pending_order):
+        url = reverse("order-asaas-webhook")
+        payload = {
+            "event": "PAYMENT_DELETED",
+            "payment": {
+                "externalReference": pending_order.id,
+                "status": "OVERDUE",
+                "deleted": True,
+            },
+        }
+
+        response = api_client.post(
+            url, payload, format="json", HTTP_ACCESS_TOKEN="token"
+        )
+
+        assert response.status_code == status.HTTP_200_OK
+        pending_order.refresh_from_db()
+        assert pending_order.status == "cancelled"
+
+    @patch("tasks.fulfillment_task.start_order_fulfillment")
+    def test_late_payment_does_not_revive_cancelled_order(
+        self, mock_start, api_client, pending_order, test_event
+    ):
+        from helper_functions import cancel_order
+
+        cancel_order(pending_order)
+        response = self._post(api_client, pending_order)
+
+        assert response.status_code == status.HTTP_200_OK
+        pending_order.refresh_from_db()
+        test_event.refresh_from_db()
+        assert pending_order.status == "cancelled"
+        assert test_event.current_attendees == 0
+        mock_start.assert_not_called()
+
+
+class TestAsaasHttpClient:
+    """The Asaas client reuses one pooled connection per process"""
+
+    def test_sync_client_is_shared(self):
+        from tasks.asaas_payment_task import get_http_client
+
+        assert get_http_client() is get_http_client()
+
+    def test_clients_are_closed_on_exit(self):
+        import asyncio
+
+        from tasks.asaas_payment_task import (
+            close_http_clients,
+            get_async_http_client,
+            get_http_client,
+        )
+
+        async def open_async_client():
+            return get_async_http_client()
+
+        loop = asyncio.new_event_loop()
+        try:
+            sync_client = get_http_client()
+            async_client = loop.run_until_complete(open_async_client())
+
+            close_http_clients()
+
+            assert sync_client.is_closed and async_client.is_closed
+            assert get_http_client() is not sync_client
+        finally:
+            loop.close()
+
+    def test_requests_go_through_shared_client(self):
+        from tasks.asaas_payment_task import AsaasPaymentTask
+
+        response = MagicMock()
+        response.json.return_value = {"id": "pay_1", "status": "PENDING"}
+        client = MagicMock()
+        client.request.return_value = response
+
+        with patch("tasks.asaas_payment_task.get_http_client", return_value=client):
+            service = AsaasPaymentTask()
+            service.get_payment("pay_1")
+            service.get_payment("pay_1")
+
+        assert client.request.call_count == 2
+
+
+@pytest.mark.django_db
+class TestAsaasCustomerCache:
+    """The Asaas customer id is looked up remotely only once per user"""
+
+    def test_customer_lookup_runs_only_on_cache_miss(self, staff_user):
+        from tasks.asaas_payment_task import AsaasPaymentTask
+
+        service = AsaasPaymentTask()
+        with patch.object(
+            service, "create_or_get_customer", return_value={"id": "cus_123"}
+        ) as mock_lookup:
+            assert service.get_customer_id(staff_user) == "cus_123"
+            staff_user.refresh_from_db()
+            assert service.get_customer_id(staff_user) == "cus_123"
+
+        mock_lookup.assert_called_once()
+        assert staff_user.asaas_customer_id == "cus_123"
+
+
+@pytest.mark.django_db
+class TestAsaasCreatePayment:
+    """create_payment and acreate_payment share everything but the HTTP calls"""
+
+    responses = {
+        "/payments": {"id": "pay_1", "status": "PENDING"},
+        "/payments/pay_1/pixQrCode": {
+            "encodedImage": "img",
+            "payload": "pix",
+            "expirationDate": "2025-01-01",
+        },
+    }
+
+    def test_sync_and_async_payments_match(self, pending_order, staff_user):
+        from asgiref.sync import async_to_sync
+
+        from tasks.asaas_payment_task import AsaasPaymentTask
+
+        staff_user.asaas_customer_id = "cus_123"
+        service = AsaasPaymentTask()
+
+        async def fake_amake_request(endpoint, method="GET", data=None):
+            return dict(self.responses[endpoint])
+
+        with patch.object(
+            service,
+            "_make_request",
+            side_effect=lambda endpoint, *args: dict(self.responses[endpoint]),
+        ) as mock_request, patch.object(
+            service, "_amake_request", side_effect=fake_amake_request
+        ):
+            payment = service.create_payment(pending_order, staff_user)
+            apayment = async_to_sync(service.acreate_payment)(
+                pending_order, staff_user
+            )
+
+        assert payment == apayment
+        assert payment["pixTransaction"]["qrCode"]["payload"] == "pix"
+        payload = mock_request.call_args_list[0].args[2]
+        assert payload["customer"] == "cus_123"
+        assert payload["billingType"] == "PIX"
+
+
+@pytest.mark.django_db
+class TestReconcilePendingPayments:
+    """Tests for the pending payments reconciliation sweep"""
+
+    def _order(self, user, payment_id):
+        return Order.objects.create(
+            id=str(uuid4()),
+            user=user,
+            amount=Decimal("105.00"),
+            payment_method="pix",
+            asaas_payment_id=payment_id,
+        )
+
+    @patch("tasks.fulfillment_task.start_order_fulfillment")
+    def test_list_endpoint_transitions_orders(self, mock_start, staff_user):
+        from tasks.check_payments import reconcile_pending_payments
+
+        paid = self._order(staff_user, "pay_paid")
+        refunded = self._order(staff_user, "pay_refunded")
+        overdue = self._order(staff_user, "pay_overdue")
+        deleted = self._order(staff_user, "pay_deleted")
+
+        listed = {
+            "RECEIVED": [{"id": "pay_paid", "status": "RECEIVED"}],
+            "REFUNDED": [{"id": "pay_refunded", "status": "REFUNDED"}],
+            # Never queried, overdue payments may still be paid
+            "OVERDUE": [{"id": "pay_overdue", "status": "OVERDUE"}],
+        }
+        # Orders the listed statuses do not settle are looked up one by one
+        unlisted = {
+            "pay_overdue": {"status": "OVERDUE"},
+            "pay_deleted": {"status": "PENDING", "deleted": True},
+        }
+
+        def fake_list(self, status=None, **filters):
+            return iter(listed.get(status, []))
+
+        with patch(
+            "tasks.asaas_payment_task.AsaasPaymentTask.list_payments", fake_list
+        ), patch(
+            "tasks.asaas_payment_task.AsaasPaymentTask.get_payment",
+            side_effect=unlisted.__getitem__,
+        ) as mock_get:
+            metrics = reconcile_pending_payments(page_size=2)
+
+        assert sorted(call.args[0] for call in mock_get.call_args_list) == [
+            "pay_deleted",
+            "pay_overdue",
+        ]
+        assert metrics["scanned"] == 4
+        assert metrics["paid"] == 1
+        assert metrics["cancelled"] == 2
+        assert Order.objects.get(id=paid.id).status == "paid"
+        assert Order.objects.get(id=refunded.id).status == "cancelled"
+        assert Order.objects.get(id=overdue.id).status == "pending"
+        assert Order.objects.get(id=deleted.id).status == "cancelled"
+
+    @patch("tasks.fulfillment_task.start_order_fulfillment")
+    def test_failing_order_does_not_roll_back_the_page(self, mock_start, staff_user):
+        from helper_functions import fulfill_order
+        from tasks.check_payments import reconcile_pending_payments
+
+        broken = self._order(staff_user, "pay_broken")
+        paid = self._order(staff_user, "pay_paid")
+
+        def flaky_fulfill(order):
+            if order.id == broken.id:
+                raise RuntimeError("boom")
+            return fulfill_order(order)
+
+        with patch(
+            "tasks.asaas_payment_task.AsaasPaymentTask.get_payment",
+            return_value={"status": "RECEIVED"},
+        ), patch("tasks.check_payments.fulfill_order", side_effect=flaky_fulfill):
+            metrics = reconcile_pending_payments(use_list_endpoint=False)
+
+        assert (metrics["paid"], metrics["errors"]) == (1, 1)
+        assert Order.objects.get(id=paid.id).status == "paid"
+        assert Order.objects.get(id=broken.id).status == "pending"
+
+    def test_falls_back_to_concurrent_lookups(self, staff_user):
+        from tasks.check_payments import reconcile_pending_payments
+
+        order = self._order(staff_user, "pay_deleted")
+
+        with patch(
+            "tasks.asaas_payment_task.AsaasPaymentTask.get_payment",
+            return_value={"status": "OVERDUE", "deleted": True},
+        ):
+            metrics = reconcile_pending_payments(use_list_endpoint=False)
+
+        assert metrics["cancelled"] == 1
+        assert Order.objects.get(id=order.id).status == "cancelled"
+
+
+@pytest.mark.django_db
+class TestOrderTwoPhaseCreation:
+    """The Asaas call runs outside the order-creation transaction"""
+
+    def test_payment_created_outside_transaction(
+        self, api_client, staff_user, test_event
+    ):
+        from asgiref.sync import sync_to_async
+        from django.db import connection
+
+        baseline = len(connection.atomic_blocks)
+        depth = {}
+
+        async def fake_create_payment(order, user):
+            # The request's connection lives on the thread running the sync ORM calls
+            depth["during_call"] = await sync_to_async(
+                lambda: len(connection.atomic_blocks)
+            )()
+            return {"id": "pay_789", "status": "PENDING"}
+
+        api_client.force_authenticate(user=staff_user)
+        with patch(
+            "tasks.asaas_payment_task.AsaasPaymentTask.acreate_payment",
+            side_effect=fake_create_payment,
+        ):
+            response = api_client.post(
+                reverse("order-list"),
+                {"eventId": test_event.id, "paymentMethod": "pix", "quantity": 1},
+                format="json",
+            )
+
+        assert response.status_code == status.HTTP_201_CREATED
+        assert depth["during_call"] == baseline
+        order = Order.objects.get(id=response.data["order"]["id"])
+        assert order.asaas_payment_id == "pay_789"
+
+    @patch("tasks.asaas_payment_task.AsaasPaymentTask.acreate_payment")
+    def test_payment_failure_releases_reservation(
+        self, mock_create_payment, api_client, staff_user, courtesy_link
+    ):
+        mock_create_payment.side_effect = Exception("Asaas unavailable")
+
+        api_client.force_authenticate(user=staff_user)
+        response = api_client.post(
+            reverse("order-list"),
+            {
+                "eventId": courtesy_link.event.id,
+                "paymentMethod": "pix",
+                "code": courtesy_link.code,
+                "quantity": 1,
+            },
+            format="json",
+        )
+
+        assert response.status_code == status.HTTP_500_INTERNAL_SERVER_ERROR
+        order = Order.objects.get(user=staff_user)
+        assert order.status == "cancelled"
+        assert not Ticket.objects.filter(order=order).exists()
+        courtesy_link.refresh_from_db()
+        assert courtesy_link.used_count == 0
+
+
+@pytest.mark.django_db
+class TestOrderQueryCount:
+    """Order creation cost does not grow with the number of tickets"""
+
+    def _queries_for(self, api_client, event, quantity, code=None):
+        from django.db import connection
+        from django.test.utils import CaptureQueriesContext
+
+        data = {"eventId": event.id, "paymentMethod": "pix", "quantity": quantity}
+        if code:
+            data["code"] = code
+
+        with patch(
+            "tasks.asaas_payment_task.AsaasPaymentTask.acreate_payment",
+            return_value={"id": "pay_1", "status": "PENDING"},
+        ), CaptureQueriesContext(connection) as ctx:
+            response = api_client.post(reverse("order-list"), data, format="json")
+
+        assert response.status_code == status.HTTP_201_CREATED
+        assert (
+            Ticket.objects.filter(order_id=response.data["order"]["id"]).count()
+            == quantity
+        )
+        return len(ctx.captured_queries)
+
+    def test_query_count_is_constant(self, api_client, staff_user, test_event):
+        test_event.max_attendees = None
+        test_event.save()
+        api_client.force_authenticate(user=staff_user)
+
+        assert self._queries_for(api_client, test_event, 1) == self._queries_for(
+            api_client, test_event, 10
+        )
+
+    def test_query_count_is_constant_with_promo_code(
+        self, api_client, staff_user, test_event, courtesy_link
+    ):
+        test_event.max_attendees = None
+        test_event.save()
+        courtesy_link.ticket_count = 20
+        courtesy_link.save()
+        api_client.force_authenticate(user=staff_user)
+
+        single = self._queries_for(api_client, test_event, 1, courtesy_link.code)
+        many = self._queries_for(api_client, test_event, 10, courtesy_link.code)
+        assert single == many
+
+
+@pytest.mark.django_db
+class TestSeatReservation:
+    """Orders hold seats on the event until they are paid or released"""
+
+    @patch("tasks.asaas_payment_task.AsaasPaymentTask.acreate_payment")
+    def test_order_reserves_seats(
+        self, mock_create_payment, api_client, staff_user, test_event
+    ):
+        mock_create_payment.return_value = {"id": "pay_1", "status": "PENDING"}
+        api_client.force_authenticate(user=staff_user)
+        url = reverse("order-list")
+
+        data = {"eventId": test_event.id, "paymentMethod": "pix", "quantity": 2}
+        assert api_client.post(url, data, format="json").status_code == 201
+
+        # Only one of the three seats is left
+        response = api_client.post(url, data, format="json")
+        assert response.status_code == status.HTTP_400_BAD_REQUEST
+        assert response.data["error"] == "Evento lotado"
+
+        test_event.refresh_from_db()
+        assert test_event.reserved_seats == 2
+
+    @patch("tasks.asaas_payment_task.AsaasPaymentTask.cancel_payment")
+    def test_stale_orders_are_expired(self, mock_cancel, staff_user, test_event):
+        from events.inventory import reserve_seats
+        from tasks.expire_reservations import expire_stale_reservations
+
+        def make_order(payment_id, age):
+            order = Order.objects.create(
+                id=str(uuid4()),
+                user=staff_user,
+                amount=Decimal("105.00"),
+                payment_method="pix",
+                asaas_payment_id=payment_id,
+            )
+            Order.objects.filter(id=order.id).update(created_at=timezone.now() - age)
+            Ticket.objects.create(
+                name="Ticket",
+                cpf=staff_user.cpf,
+                order=order,
+                event=test_event,
+                type_of_ticket="first batch",
+                qr_code_data=f"QR-{uuid4()}",
+            )
+            reserve_seats(test_event.id, 1)
+            return order
+
+        stale = make_order("pay_stale", timezone.timedelta(days=3))
+        fresh = make_order("pay_fresh", timezone.timedelta(minutes=5))
+
+        metrics = expire_stale_reservations(ttl_minutes=60)
+
+        assert metrics == {"expired": 1, "skipped": 0}
+        mock_cancel.assert_called_once_with("pay_stale")
+        assert Order.objects.get(id=stale.id).status == "cancelled"
+        assert not Ticket.objects.filter(order=stale).exists()
+        assert Order.objects.get(id=fresh.id).status == "pending"
+        test_event.refresh_from_db()
+        assert test_event.reserved_seats == 1
+
+    @patch("tasks.asaas_payment_task.AsaasPaymentTask.cancel_payment")
+    def test_expiry_skips_orders_asaas_refuses_to_cancel(
+        self, mock_cancel, pending_order
+    ):
+        from tasks.expire_reservations import expire_stale_reservations
+
+        mock_cancel.side_effect = Exception("Payment already received")
+        Order.objects.filter(id=pending_order.id).update(
+            created_at=timezone.now() - timezone.timedelta(days=3)
+        )
+
+        metrics = expire_stale_reservations(ttl_minutes=60)
+
+        assert metrics == {"expired": 0, "skipped": 1}
+        assert Order.objects.get(id=pending_order.id).status == "pending"
+
+    def test_cancel_paid_order_releases_attendees(
+        self, pending_order, test_event, django_capture_on_commit_callbacks
+    ):
+        from helper_functions import cancel_order, fulfill_order
+
+        Event.objects.filter(id=test_event.id).update(reserved_seats=2)
+        with patch("tasks.fulfillment_task.start_order_fulfillment"):
+            with django_capture_on_commit_callbacks(execute=True):
+                fulfill_order(pending_order)
+
+        assert cancel_order(pending_order, pending_only=True) is False
+        assert cancel_order(pending_order) is True
+        assert cancel_order(pending_order) is False
+
+        test_event.refresh_from_db()
+        assert test_event.current_attendees == 0
+        assert test_event.reserved_seats == 0
+
+
+@pytest.mark.django_db
+class TestCourtesyConsumption:
+    """Courtesy uses are consumed with a single conditional update"""
+
+    def test_consume_until_exhausted(self, courtesy_link):
+        from orders.courtesy import consume_courtesy_uses
+
+        assert consume_courtesy_uses(courtesy_link.pk, 3) is False
+        assert consume_courtesy_uses(courtesy_link.pk, 1) is True
+        courtesy_link.refresh_from_db()
+        assert courtesy_link.is_active is True
+
+        assert consume_courtesy_uses(courtesy_link.pk, 1) is True
+        assert consume_courtesy_uses(courtesy_link.pk, 1) is False
+
+        courtesy_link.refresh_from_db()
+        assert courtesy_link.used_count == 2
+        assert courtesy_link.is_active is False
+
+    def test_release_reactivates_exhausted_link(self, courtesy_link):
+        from orders.courtesy import consume_courtesy_uses, release_courtesy_uses
+
+        consume_courtesy_uses(courtesy_link.pk, 2)
+        release_courtesy_uses(courtesy_link.pk, 1)
+
+        courtesy_link.refresh_from_db()
+        assert courtesy_link.used_count == 1
+        assert courtesy_link.is_active is True
+
+    def test_release_keeps_manually_disabled_link(self, courtesy_link):
+        from orders.courtesy import consume_courtesy_uses, release_courtesy_uses
+
+        consume_courtesy_uses(courtesy_link.pk, 1)
+        CourtesyLink.objects.filter(pk=courtesy_link.pk).update(is_active=False)
+        release_courtesy_uses(courtesy_link.pk, 1)
+
+        courtesy_link.refresh_from_db()
+        assert courtesy_link.used_count == 0
+        assert courtesy_link.is_active is False
+
+    def test_order_over_remaining_uses_is_rejected(
+        self, api_client, staff_user, test_event, courtesy_link
+    ):
+        api_client.force_authenticate(user=staff_user)
+        response = api_client.post(
+            reverse("order-list"),
+            {
+                "eventId": test_event.id,
+                "paymentMethod": "pix",
+                "code": courtesy_link.code,
+                "quantity": 3,
+            },
+            format="json",
+        )
+
+        assert response.status_code == status.HTTP_400_BAD_REQUEST
+        assert "esgotado" in response.data["error"]
+        courtesy_link.refresh_from_db()
+        test_event.refresh_from_db()
+        assert courtesy_link.used_count == 0
+        assert test_event.reserved_seats == 0
+
+    @patch("tasks.fulfillment_task.start_order_fulfillment")
+    def test_redeem_full_event_keeps_courtesy_use(
+        self, mock_start, api_client, staff_user, test_event
+    ):
+        link = CourtesyLink.objects.create(
+            code="FREE123", event=test_event, ticket_count=1, created_by=staff_user
+        )
+        Event.objects.filter(id=test_event.id).update(reserved_seats=3)
+
+        api_client.force_authenticate(user=staff_user)
+        response = api_client.post(
+            reverse("order-courtesy-redeem"),
+            {
+                "code": link.code,
+                "name": "Guest",
+                "email": "guest@example.com",
+                "cpf": "123.456.789-09",
+                "phone": "11999999999",
+                "birthDate": "1990-01-01",
+            },
+            format="json",
+        )
+
+        assert response.status_code == status.HTTP_400_BAD_REQUEST
+        assert response.data["message"] == "Evento lotado"
+        link.refresh_from_db()
+        assert link.used_count == 0
+        assert link.is_active is True
+
+    @patch("tasks.fulfillment_task.start_order_fulfillment")
+    def test_redeem_same_cpf_in_other_format_is_rejected(
+        self, mock_start, api_client, staff_user, test_event
+    ):
+        link = CourtesyLink.objects.create(
+            code="FREE123", event=test_event, ticket_count=2, created_by=staff_user
+        )
+        api_client.force_authenticate(user=staff_user)
+        payload = {
+            "code": link.code,
+            "name": "Guest",
+            "email": "guest@example.com",
+            "cpf": "123.456.789-09",
+            "phone": "11999999999",
+            "birthDate": "1990-01-01",
+            "address": "Rua Teste 123, São Paulo",
+        }
+
+        response = api_client.post(
+            reverse("order-courtesy-redeem"), payload, format="json"
+        )
+        assert response.status_code == status.HTTP_201_CREATED
+        assert Ticket.objects.get(event=test_event).cpf == "123.456.789-09"
+
+        payload["cpf"] = "12345678909"
+        response = api_client.post(
+            reverse("order-courtesy-redeem"), payload, format="json"
+        )
+        assert response.status_code == status.HTTP_400_BAD_REQUEST
+        assert response.data["message"] == "CPF já cadastrado para este evento"
+        link.refresh_from_db()
+        assert link.used_count == 1
+
+
+@pytest.mark.django_db
+class TestTicketWalletView:
+    """Slim, cursor paginated ticket wallet"""
+
+    @pytest.fixture
+    def many_tickets(self, staff_user, test_event):
+        other_event = Event.objects.create(
+            id=11,
+            title="Jazz Night",
+            description="A very long description " * 50,
+            date=timezone.now() + timezone.timedelta(days=9),
+            location="Rio de Janeiro",
+            batch="first batch",
+            price=Decimal("80.00"),
+        )
+        order = Order.objects.create(
+            id=str(uuid4()),
+            user=staff_user,
+            amount=Decimal("905.00"),
+            quantity=9,
+            payment_method="pix",
+            status="paid",
+        )
+        return [
+            Ticket.objects.create(
+                name=f"Ticket {i}",
+                cpf=staff_user.cpf,
+                order=order,
+                event=test_event if i % 2 else other_event,
+                type_of_ticket="first batch",
+                qr_code_data=f"QR-{uuid4()}",
+            )
+            for i in range(9)
+        ]
+
+    def test_pages_through_every_ticket_once(
+        self, api_client, staff_user, many_tickets, django_assert_max_num_queries
+    ):
+        api_client.force_authenticate(user=staff_user)
+        url = reverse("ticket-wallet") + "?page_size=4"
+
+        seen = []
+        while url:
+            with django_assert_max_num_queries(3):
+                response = api_client.get(url)
+            assert response.status_code == status.HTTP_200_OK
+            assert "count" not in response.data
+            seen += [ticket["id"] for ticket in response.data["results"]]
+            url = response.data["next"]
+
+        assert sorted(seen) == sorted(str(t.id) for t in many_tickets)
+
+    def test_events_are_sent_once(self, api_client, staff_user, many_tickets):
+        api_client.force_authenticate(user=staff_user)
+        response = api_client.get(reverse("ticket-wallet"))
+
+        assert sorted(response.data["events"]) == [10, 11]
+        assert "description" not in response.data["events"][11]
+        ticket = response.data["results"][0]
+        assert ticket["event"] in response.data["events"]
+        assert set(ticket["order"]) == {"id", "status", "asaas_payment_id"}
+
+
+@pytest.mark.django_db
+class TestListPagination:
+    """Lists are cursor paginated, ?page= keeps the page-number format"""
+
+    @pytest.fixture
+    def orders(self, staff_user):
+        return [
+            Order.objects.create(
+                id=str(uuid4()),
+                user=staff_user,
+                amount=Decimal("105.00"),
+                payment_method="pix",
+            )
+            for _ in range(5)
+        ]
+
+    def test_cursor_by_default(
+        self, api_client, staff_user, orders, django_assert_num_queries
+    ):
+        api_client.force_authenticate(user=staff_user)
+        url = reverse("order-list") + "?page_size=2"
+
+        seen = []
+        while url:
+            # No COUNT(*), one query per page
+            with django_assert_num_queries(1):
+                response = api_client.get(url)
+            assert "count" not in response.data
+            seen += [order["id"] for order in response.data["results"]]
+            url = response.data["next"]
+
+        assert sorted(seen) == sorted(order.id for order in orders)
+
+    def test_page_number_fallback(self, api_client, staff_user, orders):
+        api_client.force_authenticate(user=staff_user)
+        response = api_client.get(reverse("order-list"), {"page": 2, "page_size": 2})
+
+        assert response.status_code == status.HTTP_200_OK
+        assert response.data["count"] == 5
+        assert len(response.data["results"]) == 2
+        assert "page=3" in response.data["next"]
+
+
+def _courtesy_attendees_of_order():
+    from tickets.models import CourtesyAttendee
+
+    return CourtesyAttendee.objects.filter(order_id="order")[:1]
+
+
+# name -> (queryset, pattern of the index it must use)
+HOT_QUERYSETS = {
+    "pending_sweep": (
+        lambda: Order.objects.filter(status="pending")
+        .exclude(asaas_payment_id="")
+        .order_by("id"),
+        "orders_pending_sweep_idx",
+    ),
+    "reservation_expiry": (
+        lambda: Order.objects.filter(status="pending", created_at__lt=timezone.now()),
+        "orders_pending_created_idx",
+    ),
+    "courtesy_cpf_check": (
+        lambda: Ticket.objects.filter(event_id=1, cpf="12345678909"),
+        "tickets_event_cpf_idx",
+    ),
+    "check_in_token": (
+        lambda: Ticket.objects.filter(qr_token="0" * 64),
+        # The varchar_pattern_ops twin of the unique index
+        r"tickets_qr_token_\w+_like",
+    ),
+    "check_in_count": (
+        lambda: Ticket.objects.filter(event_id=1, is_used=True),
+        "tickets_event_used_idx",
+    ),
+    "manifest_delta": (
+        lambda: Ticket.objects.filter(event_id=1, updated_at__gte=timezone.now()),
+        "tickets_event_updated_idx",
+    ),
+    "catalog": (
+        lambda: Event.objects.filter(is_active=True).order_by("date", "id"),
+        "events_active_date_idx",
+    ),
+    "fulfillment_attendee": (
+        _courtesy_attendees_of_order,
+        "attendees_order_created_idx",
+    ),
+    "order_history": (
+        lambda: Order.objects.filter(user_id=1).order_by("-created_at", "-id")[:15],
+        "orders_user_created_idx",
+    ),
+}
+
+
+@pytest.mark.django_db
+class TestHotQueryPlans:
+    """Every hot query path is served by its index (PostgreSQL only)"""
+
+    @pytest.fixture(autouse=True)
+    def no_seqscan(self, staff_user):
+        from django.db import connection
+
+        if connection.vendor != "postgresql":
+            pytest.skip("Query plans are checked on PostgreSQL")
+
+        # Tables are tiny in tests, make the planner pick an index if one applies
+        with connection.cursor() as cursor:
+            cursor.execute("SET LOCAL enable_seqscan = off")
+
+        # With empty tables every ticket index on event_id costs the same, give
+        # the planner the statistics of an event with many tickets
+        event = Event.objects.create(
+            id=1,
+            title="Big event",
+            description="",
+            date=timezone.now(),
+            location="São Paulo",
+            price=Decimal("100.00"),
+        )
+        order = Order.objects.create(
+            id="order", user=staff_user, amount=Decimal("100.00"), status="paid"
+        )
+        Ticket.objects.bulk_create(
+            Ticket(
+                name="Guest",
+                cpf=f"{i:011d}",
+                order=order,
+                event=event,
+                type_of_ticket="first batch",
+                qr_code_data=f"QR-{i}",
+                qr_token=Ticket.token_for(f"QR-{i}"),
+            )
+            for i in range(500)
+        )
+        with connection.cursor() as cursor:
+            cursor.execute("ANALYZE tickets")
+
+    @pytest.mark.parametrize("name", sorted(HOT_QUERYSETS))
+    def test_uses_its_index(self, name):
+        import re
+
+        queryset, index = HOT_QUERYSETS[name]
+        plan = queryset().explain()
+        assert re.search(rf"\b{index}\b", plan), f"{name} does not use {index}:\n{plan}"
+
+
+@pytest.mark.django_db
+class TestAsyncPaymentViews:
+    """Order views waiting on Asaas await the async client"""
+
+    @patch("tasks.fulfillment_task.start_order_fulfillment")
+    @patch("tasks.asaas_payment_task.AsaasPaymentTask.aget_payment")
+    def test_check_status_fulfills_paid_order(
+        self, mock_get_payment, mock_start, api_client, staff_user, pending_order
+    ):
+        mock_get_payment.return_value = {"id": "pay_456", "status": "RECEIVED"}
+        api_client.force_authenticate(user=staff_user)
+
+        response = api_client.post(
+            reverse("order-check-status", args=[pending_order.id])
+        )
+
+        assert response.status_code == status.HTTP_200_OK
+        assert response.data["internal_status"] == "paid"
+        mock_get_payment.assert_awaited_once_with("pay_456")
+        assert Order.objects.get(id=pending_order.id).status == "paid"
+
+    @patch("tasks.asaas_payment_task.AsaasPaymentTask.acancel_payment")
+    def test_cancel_order(self, mock_cancel, api_client, staff_user, pending_order):
+        api_client.force_authenticate(user=staff_user)
+        url = reverse("order-cancel", args=[pending_order.id])
+
+        response = api_client.delete(url)
+
+        assert response.status_code == status.HTTP_200_OK
+        mock_cancel.assert_awaited_once_with("pay_456")
+        assert Order.objects.get(id=pending_order.id).status == "cancelled"
+        assert not Ticket.objects.filter(order=pending_order).exists()
+
+        response = api_client.delete(url)
+        assert response.status_code == status.HTTP_400_BAD_REQUEST
+
+
+@pytest.mark.django_db
+class TestTicketEmails:
+    """One email per recipient, every ticket is sent only once"""
+
+    @patch("tasks.email_tasks.send_ticket_email.delay")
+    def test_one_email_per_recipient(self, mock_delay, pending_order):
+        from tasks.fulfillment_task import send_order_ticket_emails
+
+        Order.objects.filter(id=pending_order.id).update(status="paid")
+
+        result = send_order_ticket_emails(pending_order.id)
+
+        assert result["emails"] == 1
+        email, order_id, ticket_ids = mock_delay.call_args.args
+        assert email == pending_order.user.email
+        assert order_id == pending_order.id
+        assert sorted(ticket_ids) == sorted(
+            str(ticket_id)
+            for ticket_id in pending_order.tickets.values_list("id", flat=True)
+        )
+
+    def test_tickets_are_sent_once(self, pending_order):
+        from tasks.email_tasks import send_ticket_email
+
+        client = MagicMock()
+        with patch("tasks.email_tasks.get_sendgrid_client", return_value=client):
+            first = send_ticket_email("user1@example.com", pending_order.id)
+            second = send_ticket_email("user1@example.com", pending_order.id)
+
+        assert first == {"status": "success", "sent_count": 2}
+        assert second["sent_count"] == 0
+        client.send.assert_called_once()
+        message = client.send.call_args.args[0].get()
+        assert "Seus 2 ingressos" in message["subject"]
+        assert not pending_order.tickets.filter(email_sent_at__isnull=True).exists()
+
+    def test_failed_send_leaves_tickets_unsent(self, pending_order):
+        from tasks.email_tasks import send_ticket_email
+
+        client = MagicMock()
+        client.send.side_effect = Exception("SendGrid unavailable")
+        with patch(
+            "tasks.email_tasks.get_sendgrid_client", return_value=client
+        ), patch.object(send_ticket_email, "retry", side_effect=Exception("retry")):
+            with pytest.raises(Exception, match="retry"):
+                send_ticket_email("user1@example.com", pending_order.id)
+
+        assert pending_order.tickets.filter(email_sent_at__isnull=True).count() == 2
+        assert not pending_order.tickets.filter(email_claimed_at__isnull=False).exists()
+
+    def test_claimed_tickets_are_skipped_until_stale(self, pending_order):
+        from datetime import timedelta
+
+        from django.utils import timezone
+
+        from tasks.email_tasks import TICKET_EMAIL_CLAIM_MINUTES, send_ticket_email
+
+        client = MagicMock()
+        claimed_at = timezone.now()
+        pending_order.tickets.update(email_claimed_at=claimed_at)
+        with patch("tasks.email_tasks.get_sendgrid_client", return_value=client):
+            # Another worker is sending them
+            assert send_ticket_email("user1@example.com", pending_order.id)[
+                "sent_count"
+            ] == 0
+            client.send.assert_not_called()
+
+            # That worker died
+            pending_order.tickets.update(
+                email_claimed_at=claimed_at
+                - timedelta(minutes=TICKET_EMAIL_CLAIM_MINUTES + 1)
+            )
+            assert send_ticket_email("user1@example.com", pending_order.id)[
+                "sent_count"
+            ] == 2
+
+        client.send.assert_called_once()
+        assert not pending_order.tickets.filter(email_sent_at__isnull=True).exists()
+
+
+@pytest.mark.django_db
+class TestCourtesyMassSend:
+    """Courtesy emails go out as batched SendGrid requests"""
+
+    def _recipients(self, count):
+        return [
+            {
+                "email": f"guest{i}@example.com",
+                "name": f"Guest {i}",
+                "code": f"CDPI{i:08d}",
+                "event_name": "Rock Festival 2025",
+                "event_date": "2025-12-20T20:00:00+00:00",
+            }
+            for i in range(count)
+        ]
+
+    def test_one_personalization_per_recipient(self):
+        from tasks.mass_email_task import build_courtesy_mail
+
+        mail = build_courtesy_mail(self._recipients(3)).get()
+
+        assert len(mail["personalizations"]) == 3
+        assert mail["personalizations"][1]["to"][0]["email"] == "guest1@example.com"
+        assert mail["personalizations"][1]["substitutions"]["-code-"] == "CDPI00000001"
+        assert "-code-" in mail["content"][-1]["value"]
+
+
+@pytest.fixture
+def inline_import_tasks():
+    """Run the import job tasks inline, with SendGrid mocked"""
+    from tasks.courtesy_import_task import send_courtesy_chunk_emails
+    from tasks.import_job_task import process_import_chunk, run_import_job
+
+    client = MagicMock()
+    with patch.object(
+        run_import_job, "delay", side_effect=run_import_job
+    ), patch.object(
+        process_import_chunk, "delay", side_effect=process_import_chunk
+    ), patch.object(
+        send_courtesy_chunk_emails, "delay", side_effect=send_courtesy_chunk_emails
+    ), patch("tasks.mass_email_task.get_sendgrid_client", return_value=client):
+        yield client
+
+
+@pytest.mark.django_db
+class TestCourtesyImport:
+    """Courtesy CSVs run as checkpointed import jobs"""
+
+    def _store(self, rows):
+        from django.core.files.uploadedfile import SimpleUploadedFile
+
+        from orders.attachments import store_attachment
+
+        data = ("name,email,amount_of_courtesies,event_id\n" + "".join(rows)).encode()
+        return store_attachment(
+            SimpleUploadedFile("guests.csv", data, content_type="text/csv")
+        )["blob"]
+
+    def _rows(self, event, count):
+        return [f"Guest {i},guest{i}@example.com,1,{event.id}\n" for i in range(count)]
+
+    def test_mass_send_view(
+        self,
+        inline_import_tasks,
+        django_capture_on_commit_callbacks,
+        api_client,
+        staff_user,
+        test_event,
+    ):
+        from django.core.files.uploadedfile import SimpleUploadedFile
+
+        staff_user.is_staff = True
+        staff_user.save()
+        api_client.force_authenticate(user=staff_user)
+        csv_file = SimpleUploadedFile(
+            "guests.csv",
+            (
+                "name,email,amount_of_courtesies,event_id\n"
+                f"Ana,ana@example.com,1,{test_event.id}\n"
+                f"Bruno,bruno@example.com,2,{test_event.id}\n"
+            ).encode(),
+            content_type="text/csv",
+        )
+
+        with django_capture_on_commit_callbacks(execute=True):
+            response = api_client.post(
+                reverse("courtesy-mass-send"), {"csvFile": csv_file}, format="multipart"
+            )
+
+        assert response.status_code == status.HTTP_202_ACCEPTED
+        links = CourtesyLink.objects.filter(event=test_event).order_by("import_row")
+        assert [(link.import_row, link.recipient_email) for link in links] == [
+            (1, "ana@example.com"),
+            (2, "bruno@example.com"),
+        ]
+        inline_import_tasks.send.assert_called_once()
+
+        response = api_client.get(
+            reverse("courtesy-mass-send-status", args=[response.data["jobId"]])
+        )
+        assert response.status_code == status.HTTP_200_OK
+        assert response.data["status"] == "finished"
+        assert response.data["succeeded"] == 2
+        assert response.data["emails"]["sent"] == 2
+
+    def test_unknown_job_status(self, api_client, staff_user):
+        staff_user.is_staff = True
+        staff_user.save()
+        api_client.force_authenticate(user=staff_user)
+
+        response = api_client.get(reverse("courtesy-mass-send-status", args=["nope"]))
+
+        assert response.status_code == status.HTTP_404_NOT_FOUND
+
+    @patch("tasks.courtesy_import_task.COURTESY_IMPORT_BATCH_SIZE", 2)
+    def test_rows_are_imported_in_chunks(
+        self,
+        inline_import_tasks,
+        django_capture_on_commit_callbacks,
+        staff_user,
+        test_event,
+    ):
+        from orders.models import ImportChunk
+        from tasks.courtesy_import_task import start_courtesy_import
+        from tasks.import_job_task import get_import_progress
+
+        rows = self._rows(test_event, 5) + [f"No email,,1,{test_event.id}\n"]
+        with django_capture_on_commit_callbacks(execute=True):
+            job_id = start_courtesy_import(self._store(rows), staff_user.id)
+
+        assert list(
+            ImportChunk.objects.filter(job_id=job_id).values_list(
+                "start_row", "row_count", "status"
+            )
+        ) == [(1, 2, "done"), (3, 2, "done"), (5, 2, "done")]
+        assert CourtesyLink.objects.filter(event=test_event).count() == 5
+        assert inline_import_tasks.send.call_count == 3
+
+        progress = get_import_progress(job_id)
+        assert progress["status"] == "finished"
+        assert (progress["rows"], progress["succeeded"], progress["failed"]) == (
+            6,
+            5,
+            1,
+        )
+        assert progress["errors"] == [{"row": 6, "error": "E-mail não informado."}]
+
+    def test_missing_event_fails_the_job(
+        self,
+        inline_import_tasks,
+        django_capture_on_commit_callbacks,
+        staff_user,
+        test_event,
+    ):
+        from tasks.courtesy_import_task import start_courtesy_import
+        from tasks.import_job_task import get_import_progress
+
+        rows = [
+            f"Ana,ana@example.com,1,{test_event.id}\n",
+            "Bruno,bruno@example.com,1,999999\n",
+        ]
+        with django_capture_on_commit_callbacks(execute=True):
+            job_id = start_courtesy_import(self._store(rows), staff_user.id)
+
+        progress = get_import_progress(job_id)
+        assert progress["status"] == "failed"
+        assert "999999" in progress["error"]
+        assert not CourtesyLink.objects.exists()
+        inline_import_tasks.send.assert_not_called()
+
+    def test_non_utf8_csv_fails_the_job(self, staff_user, test_event):
+        from django.core.files.uploadedfile import SimpleUploadedFile
+
+        from orders.attachments import store_attachment
+        from tasks.courtesy_import_task import start_courtesy_import
+        from tasks.import_job_task import get_import_progress, run_import_job
+
+        # Excel exports are often latin-1
+        data = (
+            "name,email,amount_of_courtesies,event_id\n"
+            f"João,joao@example.com,1,{test_event.id}\n"
+        ).encode("latin-1")
+        blob = store_attachment(
+            SimpleUploadedFile("guests.csv", data, content_type="text/csv")
+        )["blob"]
+        job_id = start_courtesy_import(blob, staff_user.id)
+        run_import_job(job_id)
+
+        progress = get_import_progress(job_id)
+        assert progress["status"] == "failed"
+        assert "UTF-8" in progress["error"]
+        assert not CourtesyLink.objects.exists()
+
+    @patch("tasks.courtesy_import_task.COURTESY_IMPORT_BATCH_SIZE", 2)
+    def test_resumed_job_does_not_duplicate(
+        self, django_capture_on_commit_callbacks, staff_user, test_event
+    ):
+        from orders.models import ImportChunk
+        from tasks.courtesy_import_task import (
+            send_courtesy_chunk_emails,
+            start_courtesy_import,
+        )
+        from tasks.import_job_task import process_import_chunk, run_import_job
+
+        client = MagicMock()
+        job_id = start_courtesy_import(
+            self._store(self._rows(test_event, 4)), staff_user.id
+        )
+
+        with patch("tasks.mass_email_task.get_sendgrid_client", return_value=client):
+            # The worker dies after importing the first chunk, before emailing it
+            with patch.object(process_import_chunk, "delay"):
+                run_import_job(job_id)
+                first = ImportChunk.objects.get(job_id=job_id, index=0)
+                process_import_chunk(first.id)
+
+            # Resumed, then the same tasks delivered again
+            with patch.object(
+                process_import_chunk, "delay", side_effect=process_import_chunk
+            ), patch.object(
+                send_courtesy_chunk_emails,
+                "delay",
+                side_effect=send_courtesy_chunk_emails,
+            ), django_capture_on_commit_callbacks(execute=True):
+                run_import_job(job_id)
+                process_import_chunk(first.id)
+                send_courtesy_chunk_emails(first.id)
+
+        assert CourtesyLink.objects.filter(import_job_id=job_id).count() == 4
+        assert client.send.call_count == 2
+        assert set(
+            ImportChunk.objects.filter(job_id=job_id).values_list("status", flat=True)
+        ) == {"done"}
+
+    def test_claimed_chunk_is_sent_once(self, staff_user, test_event):
+        from datetime import timedelta
+
+        from django.utils import timezone
+
+        from orders.models import ImportChunk, ImportJob
+        from tasks.courtesy_import_task import send_courtesy_chunk_emails
+
+        job = ImportJob.objects.create(
+            kind="courtesy_links",
+            source_id=self._store(self._rows(test_event, 1)),
+            created_by=staff_user,
+            chunk_size=10,
+            status="running",
+        )
+        chunk = ImportChunk.objects.create(
+            job=job,
+            index=0,
+            start_row=1,
+            start_offset=0,
+            row_count=1,
+            status="claimed",
+            claimed_at=timezone.now(),
+        )
+        CourtesyLink.objects.create(
+            event=test_event,
+            created_by=staff_user,
+            recipient_email="guest@example.com",
+            import_job=job,
+            import_row=1,
+        )
+
+        client = MagicMock()
+        with patch("tasks.mass_email_task.get_sendgrid_client", return_value=client):
+            # Another worker is sending it
+            assert send_courtesy_chunk_emails(chunk.id)["status"] == "skipped"
+
+            # That worker died, its claim went stale
+            ImportChunk.objects.filter(id=chunk.id).update(
+                claimed_at=timezone.now() - timedelta(hours=1)
+            )
+            assert send_courtesy_chunk_emails(chunk.id)["sent"] == 1
+
+        client.send.assert_called_once()
+        chunk.refresh_from_db()
+        job.refresh_from_db()
+        assert chunk.status == "done"
+        assert job.status == "finished"
+
+    def test_stale_jobs_are_resumed(self, staff_user, test_event):
+        from datetime import timedelta
+
+        from django.utils import timezone
+
+        from orders.models import ImportJob
+        from tasks.courtesy_import_task import start_courtesy_import
+        from tasks.import_job_task import resume_stale_import_jobs, run_import_job
+
+        job_id = start_courtesy_import(
+            self._store(self._rows(test_event, 1)), staff_user.id
+        )
+        ImportJob.objects.filter(id=job_id).update(
+            updated_at=timezone.now() - timedelta(hours=1)
+        )
+
+        with patch.object(run_import_job, "delay") as mock_delay:
+            assert resume_stale_import_jobs() == 1
+            assert resume_stale_import_jobs() == 0
+
+        mock_delay.assert_called_once_with(job_id)
+
+    def test_stuck_job_is_failed_after_max_resumes(self, staff_user, test_event):
+        from datetime import timedelta
+
+        from django.utils import timezone
+
+        from orders.models import ImportJob
+        from tasks.courtesy_import_task import start_courtesy_import
+        from tasks.import_job_task import (
+            IMPORT_JOB_MAX_RESUMES,
+            get_import_progress,
+            resume_stale_import_jobs,
+            run_import_job,
+        )
+
+        job_id = start_courtesy_import(
+            self._store(self._rows(test_event, 1)), staff_user.id
+        )
+
+        with patch.object(run_import_job, "delay") as mock_delay:
+            # The job never makes progress
+            for _ in range(IMPORT_JOB_MAX_RESUMES + 1):
+                ImportJob.objects.filter(id=job_id).update(
+                    updated_at=timezone.now() - timedelta(hours=1)
+                )
+                resume_stale_import_jobs()
+
+        assert mock_delay.call_count == IMPORT_JOB_MAX_RESUMES
+        progress = get_import_progress(job_id)
+        assert progress["status"] == "failed"
+        assert progress["error"]
+
+    def test_rows_are_read_from_their_offset(self):
+        from tasks.import_job_task import read_csv_rows
+
+        data = (
+            "﻿name;email\n"
+            'Ana;"ana@example.com"\n'
+            '"Bruno\nSilva";bruno@example.com\n'
+            "\n"
+            "Carla;carla@example.com\n"
+        ).encode()
+
+        rows = list(read_csv_rows(data))
+        assert [(number, row["name"]) for number, _, row in rows] == [
+            (1, "Ana"),
+            (2, "Bruno\nSilva"),
+            (3, "Carla"),
+        ]
+
+        _, offset, _ = rows[1]
+        assert [
+            (number, row["email"]) for number, _, row in read_csv_rows(data, offset, 2)
+        ] == [(2, "bruno@example.com"), (3, "carla@example.com")]
+
+
+@pytest.mark.django_db
+class TestCourtesyAttachments:
+    """Attachments are stored once and referenced by hash"""
+
+    def test_attachment_is_stored_once(self):
+        from django.core.files.uploadedfile import SimpleUploadedFile
+
+        from orders.attachments import store_attachment
+        from orders.models import ContentBlob
+
+        content = bytes(range(256)) * 10
+        first = store_attachment(
+            SimpleUploadedFile("a.pdf", content, content_type="application/pdf")
+        )
+        second = store_attachment(
+            SimpleUploadedFile("b.pdf", content, content_type="application/pdf")
+        )
+
+        assert first["blob"] == second["blob"]
+        assert second["filename"] == "b.pdf"
+        assert ContentBlob.objects.count() == 1
+
+    def test_mail_carries_the_exact_bytes(self):
+        import base64
+
+        from django.core.files.uploadedfile import SimpleUploadedFile
+
+        from orders.attachments import load_attachment_content, store_attachment
+        from tasks.mass_email_task import build_courtesy_mail
+
+        content = bytes(range(256))
+        reference = store_attachment(
+            SimpleUploadedFile("a.pdf", content, content_type="application/pdf")
+        )
+        load_attachment_content.cache_clear()
+
+        mail = build_courtesy_mail(
+            [
+                {
+                    "email": "guest@example.com",
+                    "name": "Guest",
+                    "code": "CDPI00000001",
+                    "event_name": "Rock Festival 2025",
+                    "event_date": "2025-12-20T20:00:00+00:00",
+                }
+            ],
+            [reference],
+        ).get()
+
+        attachment = mail["attachments"][0]
+        assert base64.b64decode(attachment["content"]) == content
+        assert attachment["filename"] == "a.pdf"
+        assert attachment["type"] == "application/pdf"
@@ -5,10 +5,12 @@ from .views import (
     CheckOrderStatusView,
     CourtesyLinksDetailView,
     CourtesyLinksView,
+    CourtesyMassSendStatusView,
     CourtesyMassSendView,
     CourtesyRedeemView,
     OrderView,
     TicketListView,
+    TicketWalletView,
 )
 
 urlpatterns = [
@@ -24,6 +26,8 @@ urlpatterns = [
     path("<str:pk>/cancel/", CancelOrderView.as_view(), name="order-cancel"),
     # Get a list of all tickets for a user using its orders
     path("tickets/", TicketListView.as_view(), name="ticket-list"),
+    # Slim, cursor paginated wallet of the user's tickets
+    path("tickets/wallet/", TicketWalletView.as_view(), name="ticket-wallet"),
     # Check Order Status <int:pk>/check-status/ GET (Check the status of an order)
     path(
         "<str:pk>/check-status/",
@@ -42,4 +46,10 @@ urlpatterns = [
     path(
         "courtesy/mass-send/", CourtesyMassSendView.as_view(), name="courtesy-mass-send"
     ),
+    # Courtesy Mass Send progress courtesy/mass-send/<job_id>/ GET (Admin Only)
+    path(
+        "courtesy/mass-send/<str:job_id>/",
+        CourtesyMassSendStatusView.as_view(),
+        name="courtesy-mass-send-status",
+    ),
 ]
@@ -1,63 +1,77 @@
-import csv
-import io
 import logging
 from datetime import datetime
 from decimal import Decimal
 from uuid import uuid4
 
+from adrf.views import APIView as AsyncAPIView
+from asgiref.sync import sync_to_async
 from django.db import transaction
 from rest_framework import parsers, permissions, status
-from rest_framework.pagination import PageNumberPagination
 from rest_framework.permissions import AllowAny, IsAuthenticated
 from rest_framework.response import Response
 from rest_framework.views import APIView
 
+from backend.pagination import CursorOrPageNumberPagination
+from events.inventory import reserve_seats
 from events.models import Event
-from helper_functions import detect_delimiter, fulfill_order, generate_courtesy_code
-from tasks.asaas_payment_task import AsaasPaymentTask
-from tasks.email_tasks import send_mass_email
+from helper_functions import (
+    cancel_order,
+    format_cpf,
+    fulfill_order,
+    normalize_cpf,
+    sign_ticket_qr,
+)
+from tasks.asaas_payment_task import ASAAS_STATUS_MAP, AsaasPaymentTask
+from tasks.courtesy_import_task import start_courtesy_import
+from tasks.import_job_task import get_import_progress
 from tickets.models import CourtesyAttendee, Ticket
-from tickets.serializers import TicketSerializer
-
+from tickets.serializers import (
+    TicketSerializer,
+    WalletEventSerializer,
+    WalletTicketSerializer,
+)
+
+from .attachments import store_attachment
+from .courtesy import consume_courtesy_uses
 from .models import CourtesyLink, Order
-from .serializers import CourtesyLinkSerializer, OrderSerializer
+from .serializers import (
+    CourtesyLinkSerializer,
+    OrderCreateSerializer,
+    OrderSerializer,
+)
 
 logger = logging.getLogger(__name__)
 
 
-class OrderView(APIView):
+class OrderView(AsyncAPIView):
+    """
+    Async view, the Asaas call is awaited so a checkout waiting on the payment
+    gateway does not hold a worker thread.
+    """
+
     permission_classes = [IsAuthenticated]
 
-    def post(self, request, format=None):
+    async def post(self, request, format=None):
         user = request.user
-        data = request.data
-        event_id = data.get("eventId")
-        payment_method = data.get("paymentMethod")
-        promo_code = data.get("code")
-        quantity = int(data.get("quantity", 1))
 
         # 🧩 Validate basic input
-        if not event_id or not payment_method:
-            return Response(
-                {"error": "eventId and paymentMethod are required"},
-                status=status.HTTP_400_BAD_REQUEST,
-            )
+        serializer = OrderCreateSerializer(data=request.data)
+        if not serializer.is_valid():
+            first_error = next(iter(serializer.errors.values()))[0]
+            return Response({"error": first_error}, status=status.HTTP_400_BAD_REQUEST)
+        data = serializer.validated_data
+        event_id = data["eventId"]
+        payment_method = data["paymentMethod"]
+        promo_code = data.get("code")
+        quantity = data["quantity"]
 
         try:
-            event = Event.objects.get(id=event_id)
+            event = await Event.objects.aget(id=event_id)
         except Event.DoesNotExist:
             return Response(
                 {"error": "Evento não encontrado"}, status=status.HTTP_404_NOT_FOUND
             )
 
-        # 🏷️ Check event capacity
-        if hasattr(event, "max_attendees") and event.max_attendees is not None:
-            current_tickets = Ticket.objects.filter(event=event).count()
-            if current_tickets + quantity > event.max_attendees:
-                return Response(
-                    {"error": "Evento lotado"}, status=status.HTTP_400_BAD_REQUEST
-                )
-
         # 💰 Base ticket price
         final_price = Decimal(event.price)
 
@@ -67,12 +81,13 @@ class OrderView(APIView):
         # 🎟️ Handle promoCode / Courtesy logic
         if promo_code:
             try:
-                courtesy_link = CourtesyLink.objects.get(
+                courtesy_link = await CourtesyLink.objects.aget(
                     code=promo_code, event=event, is_active=True
                 )
                 remaining_uses = courtesy_link.ticket_count - courtesy_link.used_count
 
-                if remaining_uses <= 0:
+                # Cheap early exit, the actual check happens on consumption
+                if remaining_uses < quantity:
                     return Response(
                         {"error": "Código promocional esgotado"},
                         status=status.HTTP_400_BAD_REQUEST,
@@ -80,10 +95,6 @@ class OrderView(APIView):
 
                 if courtesy_link.override_price:
                     final_price = courtesy_link.override_price
-
-                # increment used count
-                courtesy_link.used_count += quantity
-                courtesy_link.save(update_fields=["used_count"])
             except CourtesyLink.DoesNotExist:
                 return Response(
                     {"error": "Código promocional inválido"},
@@ -97,63 +108,42 @@ class OrderView(APIView):
         # FIX: This line was the bug. It has been removed.
         # courtesy_link = None
 
-        # 💾 Create order and tickets atomically
+        # 💾 Phase 1: reserve the order and tickets locally and commit
         try:
-            with transaction.atomic():
-                order_id = str(uuid4())
-                order = Order.objects.create(
-                    id=order_id,
-                    user=user,
-                    status="pending",
-                    quantity=quantity,
-                    payment_method=payment_method,
-                    amount=total_amount,
-                )
-
-                # 🎫 Create tickets
-                tickets = []
-                for i in range(quantity):
-                    ticket_name = (
-                        f"{user.get_full_name() or user.username} - Ticket {i+1}"
-                    )
-
-                    ticket = Ticket.objects.create(
-                        id=uuid4(),
-                        name=ticket_name,
-                        order=order,
-                        event=event,
-                        cpf=user.cpf,
-                        type_of_ticket=event.batch,
-                        qr_code_data=f"QR-{uuid4()}",
-                    )
-
-                    # Add courtesy link if applicable
-                    if courtesy_link:
-                        ticket.courtesy_link_id = courtesy_link
-                        ticket.type_of_ticket = "sale"
-                        ticket.save(
-                            update_fields=["courtesy_link_id", "type_of_ticket"]
-                        )
-
-                        order.courtesy_link_id = courtesy_link
-                        order.save(update_fields=["courtesy_link_id"])
-
-                    tickets.append(ticket)
-
-                # 💳 Create payment (Asaas)
-                payment_task = AsaasPaymentTask()
-                payment_data = payment_task.create_payment(order, user)
+            order, error = await sync_to_async(self._reserve_order)(
+                user, event, courtesy_link, quantity, payment_method, total_amount
+            )
+        except Exception as e:
+            logger.error(f"Error creating order: {e}", exc_info=True)
+            return Response(
+                {"error": "Erro interno ao criar pedido"},
+                status=status.HTTP_500_INTERNAL_SERVER_ERROR,
+            )
 
-                order.asaas_payment_id = payment_data.get("id", "")
-                order.save(update_fields=["asaas_payment_id"])
+        if error:
+            return Response({"error": error}, status=status.HTTP_400_BAD_REQUEST)
 
+        # 💳 Phase 2: create payment (Asaas) outside of any transaction,
+        # so no connection or row lock is held during the HTTP call
+        try:
+            payment_task = AsaasPaymentTask()
+            payment_data = await payment_task.acreate_payment(order, user)
         except Exception as e:
-            logger.error(f"Error creating order: {e}", exc_info=True)
+            logger.error(
+                f"Error creating payment for order {order.id}: {e}", exc_info=True
+            )
+            await sync_to_async(self._release_order)(order)
             return Response(
                 {"error": "Erro interno ao criar pedido"},
                 status=status.HTTP_500_INTERNAL_SERVER_ERROR,
             )
 
+        # 🔗 Phase 3: attach the payment id
+        order.asaas_payment_id = payment_data.get("id", "")
+        await Order.objects.filter(id=order.id).aupdate(
+            asaas_payment_id=order.asaas_payment_id
+        )
+
         # ✅ Success response
         return Response(
             {
@@ -164,12 +154,81 @@ class OrderView(APIView):
             status=status.HTTP_201_CREATED,
         )
 
-    def get(self, request, format=None):
+    @staticmethod
+    def _reserve_order(user, event, courtesy_link, quantity, payment_method, amount):
+        """
+        Phase 1 of the checkout, in a single transaction:
+        reserve the seats, consume the promo code uses and create the pending
+        order with its tickets.
+
+        Returns: (order, None), or (None, error message) when nothing was reserved.
+        """
+        with transaction.atomic():
+            # 🏷️ Reserve the seats, fails fast when the event is full
+            if not reserve_seats(event.id, quantity):
+                return None, "Evento lotado"
+
+            # 🎟️ Consume the promo code uses, enforced by the database
+            if courtesy_link and not consume_courtesy_uses(courtesy_link.pk, quantity):
+                # Give the seats back
+                transaction.set_rollback(True)
+                return None, "Código promocional esgotado"
+
+            order_id = str(uuid4())
+            order = Order.objects.create(
+                id=order_id,
+                user=user,
+                status="pending",
+                quantity=quantity,
+                payment_method=payment_method,
+                amount=amount,
+                courtesy_link_id=courtesy_link,
+            )
+
+            # 🎫 Create tickets in a single query
+            # Tickets bought with a promo code keep a link to it
+            buyer_name = user.get_full_name() or user.username
+            tickets = []
+            for i in range(quantity):
+                ticket_id = uuid4()
+                qr_code = sign_ticket_qr(ticket_id, event.id)
+                tickets.append(
+                    Ticket(
+                        id=ticket_id,
+                        name=f"{buyer_name} - Ticket {i+1}",
+                        order=order,
+                        event=event,
+                        cpf=user.cpf,
+                        type_of_ticket="sale" if courtesy_link else event.batch,
+                        qr_code_data=qr_code,
+                        qr_token=Ticket.token_for(qr_code),
+                        courtesy_link_id=courtesy_link,
+                    )
+                )
+            Ticket.objects.bulk_create(tickets)
+
+        return order, None
+
+    @staticmethod
+    def _release_order(order):
+        """
+        Compensate phase 1 when the payment could not be created:
+        cancel the order, drop its tickets and give the seats and courtesy uses back.
+        """
+        try:
+            cancel_order(order)
+        except Exception as e:
+            logger.error(f"Error releasing order {order.id}: {e}", exc_info=True)
+
+    async def get(self, request, format=None):
+        # Pagination and serialization are sync, run them off the event loop
+        return await sync_to_async(self._list_orders)(request)
+
+    def _list_orders(self, request):
         user = request.user
         orders = Order.objects.filter(user=user).order_by("-created_at")
 
-        paginator = PageNumberPagination()
-        paginator.page_size_query_param = "page_size"
+        paginator = CursorOrPageNumberPagination()
         paginated_orders = paginator.paginate_queryset(orders, request, view=self)
 
         serializer = OrderSerializer(paginated_orders, many=True)
@@ -178,7 +237,7 @@ class OrderView(APIView):
 
 class TicketListView(APIView):
     permission_classes = [IsAuthenticated]
-    pagination_class = PageNumberPagination
+    pagination_class = CursorOrPageNumberPagination
 
     def get(self, request, format=None):
         user = request.user
@@ -200,51 +259,98 @@ class TicketListView(APIView):
         return paginator.get_paginated_response(serializer.data)
 
 
-class CancelOrderView(APIView):
-    def delete(self, request, pk, format=None):
+class TicketWalletView(APIView):
+    """
+    Lightweight read model of the user's tickets.
+    Cursor paginated (no COUNT(*)), tickets carry only the fields the app
+    renders and each distinct event of the page is sent once in "events".
+    """
+
+    permission_classes = [IsAuthenticated]
+    pagination_class = CursorOrPageNumberPagination
+
+    def get(self, request, format=None):
+        tickets = (
+            Ticket.objects.filter(order__user=request.user)
+            .select_related("order")
+            .only(
+                "id",
+                "name",
+                "event_id",
+                "type_of_ticket",
+                "qr_code_data",
+                "qr_code_s3_url",
+                "is_used",
+                "used_at",
+                "created_at",
+                "order__id",
+                "order__status",
+                "order__asaas_payment_id",
+            )
+        )
+
+        paginator = self.pagination_class()
+        page = paginator.paginate_queryset(tickets, request, view=self)
+
+        events = Event.objects.filter(id__in={ticket.event_id for ticket in page}).only(
+            "id", "title", "date", "location", "price", "image_url"
+        )
+
+        return Response(
+            {
+                "next": paginator.get_next_link(),
+                "previous": paginator.get_previous_link(),
+                "results": WalletTicketSerializer(page, many=True).data,
+                "events": {
+                    event["id"]: event
+                    for event in WalletEventSerializer(events, many=True).data
+                },
+            }
+        )
+
+
+class CancelOrderView(AsyncAPIView):
+    async def delete(self, request, pk, format=None):
         """
         Cancel an order.
         """
         user = request.user
         try:
-            order = Order.objects.get(id=pk, user=user)
+            order = await Order.objects.aget(id=pk, user=user)
         except Order.DoesNotExist:
             return Response(
                 {"message": "Pedido não encontrado"}, status=status.HTTP_404_NOT_FOUND
             )
 
-        if order.status == "canceled":
+        if order.status == "cancelled":
             return Response(
                 {"message": "Pedido já foi cancelado"},
                 status=status.HTTP_400_BAD_REQUEST,
             )
 
         # --- Cancel payment (Asaas)
-        payment_task = AsaasPaymentTask()
-        payment_task.cancel_payment(order.asaas_payment_id)
-
-        # --- Update order status
-        order.status = "canceled"
-        order.save(update_fields=["status"])
+        if order.asaas_payment_id:
+            payment_task = AsaasPaymentTask()
+            await payment_task.acancel_payment(order.asaas_payment_id)
 
-        # --- Delete associated tickets
-        Ticket.objects.filter(order=order).delete()
+        # --- Cancel the order, delete its tickets and release the seats
+        await sync_to_async(cancel_order)(order)
 
         return Response(
             {"message": "Pedido cancelado com sucesso"}, status=status.HTTP_200_OK
         )
 
 
-class CheckOrderStatusView(APIView):
+class CheckOrderStatusView(AsyncAPIView):
     permission_classes = [IsAuthenticated]
 
-    def post(self, request, pk, format=None):
+    async def post(self, request, pk, format=None):
         """
         Check the status of an order.
         """
         user = request.user
         try:
-            order = Order.objects.get(id=pk, user=user)
+            order = await Order.objects.aget(id=pk, user=user)
         except Order.DoesNotExist:
             return Response(
                 {"message": "Pedido não encontrado"}, status=status.HTTP_404_NOT_FOUND
@@ -256,22 +362,7 @@ class CheckOrderStatusView(APIView):
             )
 
         payment_task = AsaasPaymentTask()
-        payment_status = payment_task.get_payment(order.asaas_payment_id)
-
-        # --- Map Asaas status to internal status
-        status_map = {
-            "PENDING": "pending",
-            "OVERDUE": "pending",
-            "RECEIVED": "paid",
-            "CONFIRMED": "paid",
-            "RECEIVED_IN_CASH": "paid",
-            "REFUNDED": "cancelled",
-            "REFUSED": "cancelled",
-            "CANCELLED": "cancelled",
-            "CHARGEBACK_REQUESTED": "cancelled",
-            "CHARGEBACK_DISPUTE": "cancelled",
-            "AWAITING_CHARGEBACK_REVERSAL": "cancelled",
-        }
+        payment_status = await payment_task.aget_payment(order.asaas_payment_id)
 
         # Extract status string, handling both dict and string cases
         status_value = (
@@ -284,10 +375,10 @@ class CheckOrderStatusView(APIView):
         status_value = str(status_value).upper() if status_value else ""
 
         # Map to internal status
-        internal_status = status_map.get(status_value, "pending")
+        internal_status = ASAAS_STATUS_MAP.get(status_value, "pending")
 
         if internal_status == "paid":
-            fulfill_order(order)
+            await sync_to_async(fulfill_order)(order)
 
         return Response(
             {
@@ -313,8 +404,7 @@ class CourtesyLinksView(APIView):
             )
 
         links_qs = CourtesyLink.objects.filter(created_by=user).order_by("-created_at")
-        paginator = PageNumberPagination()
-        paginator.page_size_query_param = "page_size"
+        paginator = CursorOrPageNumberPagination()
         paginated_links = paginator.paginate_queryset(links_qs, request, view=self)
 
         serializer = CourtesyLinkSerializer(paginated_links, many=True)
@@ -392,6 +482,14 @@ class CourtesyRedeemView(APIView):
                 status=status.HTTP_400_BAD_REQUEST,
             )
 
+        cpf_digits = normalize_cpf(str(data["cpf"]))
+        if len(cpf_digits) != 11:
+            return Response(
+                {"message": "CPF inválido"},
+                status=status.HTTP_400_BAD_REQUEST,
+            )
+        cpf = format_cpf(cpf_digits)
+
         try:
             with transaction.atomic():
                 # --- Get Courtesy Link
@@ -435,9 +533,10 @@ class CourtesyRedeemView(APIView):
                     )
 
                 # --- Check if CPF already used for same event
+                # Tickets store the formatted CPF, older rows may hold only digits
                 cpf_exists = Ticket.objects.filter(
                     event=event,
-                    cpf=data["cpf"],
+                    cpf__in=[cpf, cpf_digits],
                 ).exists()
                 if cpf_exists:
                     return Response(
@@ -445,14 +544,23 @@ class CourtesyRedeemView(APIView):
                         status=status.HTTP_400_BAD_REQUEST,
                     )
 
-                # --- Check event capacity
-                if hasattr(event, "max_attendees") and event.max_attendees is not None:
-                    current_tickets = Ticket.objects.filter(event=event).count()
-                    if current_tickets >= event.max_attendees:
-                        return Response(
-                            {"message": "Evento lotado"},
-                            status=status.HTTP_400_BAD_REQUEST,
-                        )
+                # --- Consume one use of the link, enforced by the database
+                if not consume_courtesy_uses(link.pk, 1):
+                    return Response(
+                        {
+                            "message": "Todos os ingressos deste link já foram resgatados"
+                        },
+                        status=status.HTTP_400_BAD_REQUEST,
+                    )
+
+                # --- Reserve the seat
+                if not reserve_seats(event.id, 1):
+                    # Give the courtesy use back
+                    transaction.set_rollback(True)
+                    return Response(
+                        {"message": "Evento lotado"},
+                        status=status.HTTP_400_BAD_REQUEST,
+                    )
 
                 # --- Create CourtesyAttendee record
                 birth_date = None
@@ -468,7 +576,7 @@ class CourtesyRedeemView(APIView):
                     order_id=order_id,
                     name=data["name"],
                     email=data["email"],
-                    cpf=data["cpf"],
+                    cpf=cpf,
                     phone=data.get("phone"),
                     birth_date=birth_date,
                     address=data.get("address"),
@@ -478,10 +586,11 @@ class CourtesyRedeemView(APIView):
                     courtesy_link_id=link,
                 )
 
+                # Created as pending, fulfill_order flips it to paid
                 order = Order.objects.create(
                     id=order_id,
                     user=user,
-                    status="paid",
+                    status="pending",
                     quantity=1,
                     payment_method="courtesy",
                     amount=Decimal("0.00"),
@@ -489,26 +598,20 @@ class CourtesyRedeemView(APIView):
                 )
 
                 # --- Create Courtesy Ticket
+                ticket_id = uuid4()
                 ticket = Ticket.objects.create(
-                    id=uuid4(),
+                    id=ticket_id,
                     name=data["name"],
+                    cpf=cpf,
                     order=order,
                     event=event,
                     type_of_ticket="courtesy",
-                    qr_code_data=f"QR-{uuid4()}",
+                    qr_code_data=sign_ticket_qr(ticket_id, event.id),
                     courtesy_link_id=link,
                 )
 
-                # --- Update Courtesy Link usage
-                link.used_count += 1
-                if link.used_count >= link.ticket_count:
-                    link.is_active = False
-                link.save(update_fields=["used_count", "is_active"])
-
-                if hasattr(event, "current_attendees"):
-                    event.current_attendees = (event.current_attendees or 0) + 1
-                    event.save(update_fields=["current_attendees"])
-
+                # Marks the order as paid, updates attendee counts and
+                # schedules QR/email delivery after commit
                 fulfill_order(order)
 
                 return Response(
@@ -532,6 +635,7 @@ class CourtesyMassSendView(APIView):
     """
     POST /api/courtesy/mass-send/
     Admin-only endpoint to process a CSV and send courtesy emails.
+    The CSV is imported in the background, the response carries the job id.
     """
 
     permission_classes = [permissions.IsAuthenticated]
@@ -555,76 +659,24 @@ class CourtesyMassSendView(APIView):
             )
 
         try:
-            delimiter = detect_delimiter(csv_file)
-            csv_file.seek(0)
-            decoded_file = io.TextIOWrapper(csv_file, encoding="utf-8")
-            reader = csv.DictReader(decoded_file, delimiter=delimiter)
-            rows = list(reader)
-
-            print(f"🧩 Detected delimiter: {repr(delimiter)} — {len(rows)} rows found")
-
-            # Prepare optional attachment
+            # The CSV and the optional attachment are stored once,
+            # the tasks only carry their hashes
+            csv_reference = store_attachment(csv_file)
             attachment_data = None
             if attachment_file:
-                attachment_data = [
-                    {
-                        "filename": attachment_file.name,
-                        "content": attachment_file.read().decode(
-                            "latin1"
-                        ),  # base64 handled in task if needed
-                        "type": attachment_file.content_type,
-                    }
-                ]
-
-            rows_processed = 0
-            with transaction.atomic():
-                for i, row in enumerate(rows, start=1):
-                    normalized = {k.strip(): (v or "").strip() for k, v in row.items()}
-                    name = normalized.get("name")
-                    email = normalized.get("email")
-                    amount = normalized.get("amount_of_courtesies", "1")
-                    event_id = normalized.get("event_id")
-
-                    if not event_id or not email:
-                        print(
-                            f"⚠️ Row {i} skipped (missing event_id or email): {normalized}"
-                        )
-                        continue
-
-                    try:
-                        event = Event.objects.get(id=event_id)
-                    except Event.DoesNotExist:
-                        print(f"❌ Event not found (row {i}, id={event_id})")
-                        # Stop everything if one event is wrong
-                        raise Exception(
-                            f"Evento com ID {event_id} na linha {i} não foi encontrado."
-                        )
-
-                    code = generate_courtesy_code()
-
-                    link = CourtesyLink.objects.create(
-                        code=code,
-                        event=event,
-                        ticket_count=int(amount),
-                        created_by=request.user,
-                        is_active=True,
-                    )
+                attachment_data = [store_attachment(attachment_file)]
 
-                    # Send to Celery
-                    send_mass_email.delay(
-                        email=email,
-                        name=name,
-                        event_name=event.title,
-                        courtesy_code=link.code,
-                        event_date=event.date.isoformat(),
-                        attachments=attachment_data,
-                    )
-                    rows_processed += 1
+            job_id = start_courtesy_import(
+                csv_reference["blob"], request.user.id, attachment_data
+            )
 
-            print(f"✅ Processed {rows_processed} rows.")
+            logger.info(f"🧩 Courtesy import {job_id} queued")
             return Response(
-                {"message": "E-mails de cortesia enfileirados para envio."},
-                status=status.HTTP_200_OK,
+                {
+                    "message": "E-mails de cortesia enfileirados para envio.",
+                    "jobId": job_id,
+                },
+                status=status.HTTP_202_ACCEPTED,
             )
 
         except Exception as e:
@@ -635,10 +687,33 @@ class CourtesyMassSendView(APIView):
             )
 
 
-class WebHookView(APIView):
+class CourtesyMassSendStatusView(APIView):
+    """
+    GET /api/orders/courtesy/mass-send/<job_id>/
+    Progress of a courtesy mass send: CSV import and emails.
+    """
+
+    permission_classes = [permissions.IsAuthenticated]
+
+    def get(self, request, job_id, format=None):
+        if not request.user.is_staff:
+            return Response(
+                {"message": "Acesso negado"}, status=status.HTTP_403_FORBIDDEN
+            )
+
+        progress = get_import_progress(job_id)
+        if progress is None:
+            return Response(
+                {"message": "Envio não encontrado"}, status=status.HTTP_404_NOT_FOUND
+            )
+
+        return Response({"jobId": job_id, **progress})
+
+
+class WebHookView(AsyncAPIView):
     permission_classes = [AllowAny]
 
-    def post(self, request, format=None):
+    async def post(self, request, format=None):
         payment_task = AsaasPaymentTask()
 
         try:
@@ -665,25 +740,33 @@ class WebHookView(APIView):
                 )
 
             try:
-                order = Order.objects.get(id=external_reference)
-                if order.status == "paid":
-                    return Response(
-                        {"message": "Order already paid"}, status=status.HTTP_200_OK
-                    )
+                order = await Order.objects.aget(id=external_reference)
             except Order.DoesNotExist:
                 return Response(
                     {"error": "Order not found"}, status=status.HTTP_404_NOT_FOUND
                 )
 
+            event = request.data.get("event")
             payment_status = payment_data.get("status")
             if payment_status in ["CONFIRMED", "RECEIVED"]:
-                fulfill_order(order)
+                if order.status == "paid":
+                    return Response(
+                        {"message": "Order already paid"}, status=status.HTTP_200_OK
+                    )
+                await sync_to_async(fulfill_order)(order)
+
+            elif payment_status == "REFUNDED" or event == "PAYMENT_REFUNDED":
+                await sync_to_async(cancel_order)(order)
+
+            elif (
+                payment_status == "DELETED"
+                or event == "PAYMENT_DELETED"
+                or payment_data.get("deleted")
+            ):
+                await sync_to_async(cancel_order)(order, pending_only=True)
 
-            elif payment_status in ["OVERDUE", "DELETED"]:
-                if order.status != "canceled":
-                    order.status = "canceled"
-                    order.event.current_attendees -= 1
-                    order.save()
+            # OVERDUE is not final, boleto/PIX payments may still arrive.
+            # The order keeps its seats until its reservation expires.
 
             return Response(
                 {"status": "Webhook processed successfully"}, status=status.HTTP_200_OK
@@ -1,3 +1,18 @@
+from .courtesy_import_task import send_courtesy_chunk_emails
 from .email_tasks import send_verification_email
+from .fulfillment_task import (
+    generate_order_qr_codes,
+    send_order_ticket_emails,
+    start_order_fulfillment,
+)
+from .import_job_task import process_import_chunk, run_import_job
 
-__all__ = ["send_verification_email"]
+__all__ = [
+    "send_courtesy_chunk_emails",
+    "send_verification_email",
+    "generate_order_qr_codes",
+    "send_order_ticket_emails",
+    "start_order_fulfillment",
+    "process_import_chunk",
+    "run_import_job",
+]
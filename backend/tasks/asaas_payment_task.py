@@ -1,21 +1,126 @@
+import asyncio
+import atexit
 import logging
+import os
+import threading
+import weakref
 from datetime import date
 from os import getenv
+from urllib.parse import urlencode
 
 import httpx
 from dotenv import load_dotenv
 
+from helper_functions import normalize_cpf
 from tickets.models import Ticket
 
 load_dotenv()
 
 logger = logging.getLogger(__name__)
 
+# Connection pool settings, shared by web and Celery workers
+ASAAS_TIMEOUT = float(getenv("ASAAS_TIMEOUT", "20"))
+ASAAS_CONNECT_TIMEOUT = float(getenv("ASAAS_CONNECT_TIMEOUT", "5"))
+ASAAS_MAX_CONNECTIONS = int(getenv("ASAAS_MAX_CONNECTIONS", "20"))
+ASAAS_MAX_KEEPALIVE_CONNECTIONS = int(getenv("ASAAS_MAX_KEEPALIVE_CONNECTIONS", "10"))
+ASAAS_KEEPALIVE_EXPIRY = float(getenv("ASAAS_KEEPALIVE_EXPIRY", "30"))
+
+# Asaas payment status -> internal order status
+ASAAS_STATUS_MAP = {
+    "PENDING": "pending",
+    "OVERDUE": "pending",
+    "RECEIVED": "paid",
+    "CONFIRMED": "paid",
+    "RECEIVED_IN_CASH": "paid",
+    "REFUNDED": "cancelled",
+    "REFUSED": "cancelled",
+    "CANCELLED": "cancelled",
+    "CHARGEBACK_REQUESTED": "cancelled",
+    "CHARGEBACK_DISPUTE": "cancelled",
+    "AWAITING_CHARGEBACK_REVERSAL": "cancelled",
+}
+
+# Max page size accepted by the Asaas list endpoints
+ASAAS_LIST_LIMIT = 100
+
+_http_client = None
+_http_client_pid = None
+_http_client_lock = threading.Lock()
+_async_http_clients = weakref.WeakKeyDictionary()
+
+
+def _client_options() -> dict:
+    return {
+        "timeout": httpx.Timeout(ASAAS_TIMEOUT, connect=ASAAS_CONNECT_TIMEOUT),
+        "limits": httpx.Limits(
+            max_connections=ASAAS_MAX_CONNECTIONS,
+            max_keepalive_connections=ASAAS_MAX_KEEPALIVE_CONNECTIONS,
+            keepalive_expiry=ASAAS_KEEPALIVE_EXPIRY,
+        ),
+    }
+
+
+def get_http_client() -> httpx.Client:
+    """
+    Return the process-wide pooled client used for Asaas calls.
+    Connections are kept alive between requests, so a checkout only pays the
+    TCP/TLS handshake once. A new client is built after a fork (Celery prefork)
+    so processes never share sockets.
+    """
+    global _http_client, _http_client_pid
+
+    pid = os.getpid()
+    if _http_client is None or _http_client_pid != pid:
+        with _http_client_lock:
+            if _http_client is None or _http_client_pid != pid:
+                _http_client = httpx.Client(**_client_options())
+                _http_client_pid = pid
+
+    return _http_client
+
+
+def get_async_http_client() -> httpx.AsyncClient:
+    """
+    Return the pooled async client for the running event loop.
+    Async clients are bound to the loop that created them, so one is kept per loop.
+    """
+    loop = asyncio.get_running_loop()
+    client = _async_http_clients.get(loop)
+    if client is None or client.is_closed:
+        client = httpx.AsyncClient(**_client_options())
+        _async_http_clients[loop] = client
+
+    return client
+
+
+@atexit.register
+def close_http_clients():
+    """
+    Close the pooled clients when the process exits (Daphne, Celery workers).
+    An async client is closed on its own loop, provided that loop is still
+    open and idle, which is the case for the server loop at shutdown.
+    """
+    global _http_client
+
+    if _http_client is not None and _http_client_pid == os.getpid():
+        _http_client.close()
+        _http_client = None
+
+    for loop, client in list(_async_http_clients.items()):
+        if client.is_closed or loop.is_closed() or loop.is_running():
+            continue
+        try:
+            loop.run_until_complete(client.aclose())
+        except Exception as e:
+            logger.warning(f"Failed to close the Asaas async client: {e}")
+    _async_http_clients.clear()
+
 
 class AsaasPaymentTask:
     """
     Handles all interactions with the Asaas Payment API.
     Mirrors the logic of your Node.js AsaasService.
+    Every method has an async counterpart prefixed with "a" for ASGI views.
     """
 
     def __init__(self):
@@ -28,22 +133,45 @@ class AsaasPaymentTask:
             )
 
     # ------------------------
-    # Internal request helper
+    # Internal request helpers
     # ------------------------
+    def _headers(self) -> dict:
+        return {
+            "Content-Type": "application/json",
+            "access_token": self.api_key,
+        }
+
     def _make_request(
         self, endpoint: str, method: str = "GET", data: dict | None = None
     ):
         url = f"{self.base_url}{endpoint}"
-        headers = {
-            "Content-Type": "application/json",
-            "access_token": self.api_key,
-        }
 
         try:
-            with httpx.Client(timeout=20.0) as client:
-                response = client.request(method, url, headers=headers, json=data)
-                response.raise_for_status()
-                return response.json()
+            response = get_http_client().request(
+                method, url, headers=self._headers(), json=data
+            )
+            response.raise_for_status()
+            return response.json()
+        except httpx.HTTPStatusError as e:
+            logger.error(
+                f"Asaas API error: {e.response.status_code} - {e.response.text}"
+            )
+            raise
+        except Exception as e:
+            logger.exception(f"Failed Asaas API request to {url}: {e}")
+            raise
+
+    async def _amake_request(
+        self, endpoint: str, method: str = "GET", data: dict | None = None
+    ):
+        url = f"{self.base_url}{endpoint}"
+
+        try:
+            response = await get_async_http_client().request(
+                method, url, headers=self._headers(), json=data
+            )
+            response.raise_for_status()
+            return response.json()
         except httpx.HTTPStatusError as e:
             logger.error(
                 f"Asaas API error: {e.response.status_code} - {e.response.text}"
@@ -74,100 +202,230 @@ class AsaasPaymentTask:
             logger.exception(f"Error creating/finding Asaas customer: {str(e)}")
             raise
 
+    async def acreate_or_get_customer(self, customer_data: dict):
+        """Async version of create_or_get_customer."""
+        try:
+            query = f"/customers?cpfCnpj={customer_data['cpfCnpj']}"
+            existing = await self._amake_request(query)
+
+            if existing.get("data"):
+                return existing["data"][0]
+
+            # Create if not found
+            return await self._amake_request("/customers", "POST", customer_data)
+        except Exception as e:
+            logger.exception(f"Error creating/finding Asaas customer: {str(e)}")
+            raise
+
+    def get_customer_id(self, user, refresh: bool = False) -> str:
+        """
+        Return the Asaas customer id for the user.
+        The id is cached on the user row, so the remote search by CPF only runs
+        on the first checkout (or when refresh is requested).
+        """
+        if user.asaas_customer_id and not refresh:
+            return user.asaas_customer_id
+
+        customer = self.create_or_get_customer(self._customer_data(user))
+        user.asaas_customer_id = customer["id"]
+        type(user).objects.filter(pk=user.pk).update(
+            asaas_customer_id=user.asaas_customer_id
+        )
+        return user.asaas_customer_id
+
+    async def aget_customer_id(self, user, refresh: bool = False) -> str:
+        """Async version of get_customer_id."""
+        if user.asaas_customer_id and not refresh:
+            return user.asaas_customer_id
+
+        customer = await self.acreate_or_get_customer(self._customer_data(user))
+        user.asaas_customer_id = customer["id"]
+        await type(user).objects.filter(pk=user.pk).aupdate(
+            asaas_customer_id=user.asaas_customer_id
+        )
+        return user.asaas_customer_id
+
     # ------------------------
     # Payment Creation
     # ------------------------
-    def create_payment(self, order, user):
+    @staticmethod
+    def _is_client_error(error: httpx.HTTPStatusError) -> bool:
+        return 400 <= error.response.status_code < 500
+
+    @staticmethod
+    def _customer_data(user) -> dict:
+        customer_data = {
+            "name": user.get_full_name() or user.username,
+            "email": user.email,
+            # Same digits-only key as the local uniqueness check
+            "cpfCnpj": getattr(user, "cpf_normalized", None)
+            or normalize_cpf(getattr(user, "cpf", None)),
+            "phone": getattr(user, "phone", None),
+        }
+
+        if not customer_data["cpfCnpj"]:
+            raise ValueError("User CPF/CNPJ is required for Asaas payment")
+
+        return customer_data
+
+    @staticmethod
+    def _payment_payload(order, customer_id: str, event_title: str) -> dict:
+        # Asaas requires dueDate in YYYY-MM-DD
+        due_date = (order.created_at or date.today()).strftime("%Y-%m-%d")
+
+        return {
+            "customer": customer_id,
+            "billingType": order.payment_method.upper(),  # e.g. "PIX", "BOLETO", "CREDIT_CARD"
+            "value": float(order.amount),
+            "dueDate": due_date,
+            "description": f"Order {order.id} for {event_title}",
+            "externalReference": str(order.id),
+        }
+
+    @staticmethod
+    def _payment_link_payload(order, due_date: str) -> dict:
+        return {
+            "name": f"Order {order.id}",
+            "billingType": "CREDIT_CARD",
+            "chargeType": "DETACHED",
+            "value": float(order.amount),
+            "dueDateLimitDays": 1,
+            "description": f"Payment for order {order.id}",
+            "endDate": due_date,
+        }
+
+    @staticmethod
+    def _pix_transaction(pix_info: dict) -> dict:
+        return {
+            "qrCode": {
+                "encodedImage": pix_info.get("encodedImage"),
+                "payload": pix_info.get("payload"),
+            },
+            "expirationDate": pix_info.get("expirationDate"),
+        }
+
+    def _payment_follow_up(self, order, payment: dict, payment_payload: dict):
         """
-        Create a payment in Asaas for this order.
-        Returns a dict with Asaas payment data (including PIX/Boleto links).
+        The extra request a billing type needs once the payment exists, as
+        (endpoint, method, data), or None.
         """
-        try:
-            # Prepare customer info
-            customer_data = {
-                "name": user.get_full_name() or user.username,
-                "email": user.email,
-                "cpfCnpj": getattr(user, "cpf", None),
-                "phone": getattr(user, "phone", None),
-            }
+        billing_type = payment_payload["billingType"]
+
+        # PIX: fetch the QR code for the frontend
+        if billing_type == "PIX":
+            return f"/payments/{payment['id']}/pixQrCode", "GET", None
+
+        # CREDIT CARD: the flow is handled in an Asaas checkout link
+        if billing_type == "CREDIT_CARD":
+            return (
+                "/paymentLinks",
+                "POST",
+                self._payment_link_payload(order, payment_payload["dueDate"]),
+            )
+
+        return None
 
-            if not customer_data["cpfCnpj"]:
-                raise ValueError("User CPF/CNPJ is required for Asaas payment")
+    def _complete_payment(self, payment: dict, payment_payload: dict, follow_up):
+        """Add the follow-up response (if any) to the payment returned to the views."""
+        billing_type = payment_payload["billingType"]
 
-            customer = self.create_or_get_customer(customer_data)
+        if billing_type == "PIX" and follow_up is not None:
+            payment["pixTransaction"] = self._pix_transaction(follow_up)
 
-            event_title = Ticket.objects.filter(order=order).first().event.title
+        # BOLETO: the link is already in the response
+        if billing_type == "BOLETO":
+            payment["bankSlipUrl"] = payment.get("bankSlipUrl")
 
-            # Asaas requires dueDate in YYYY-MM-DD
-            due_date = (order.created_at or date.today()).strftime("%Y-%m-%d")
+        if billing_type == "CREDIT_CARD" and follow_up is not None:
+            payment["paymentLink"] = follow_up.get("url")
 
-            payment_payload = {
-                "customer": customer["id"],
-                "billingType": order.payment_method.upper(),  # e.g. "PIX", "BOLETO", "CREDIT_CARD"
-                "value": float(order.amount),
-                "dueDate": due_date,
-                "description": f"Order {order.id} for {event_title}",
-                "externalReference": str(order.id),
-            }
+        return payment
 
+    def create_payment(self, order, user):
+        """
+        Create a payment in Asaas for this order.
+        Returns a dict with Asaas payment data (including PIX/Boleto links).
+        """
+        try:
+            cached_customer_id = user.asaas_customer_id
+            customer_id = self.get_customer_id(user)
+
+            ticket = Ticket.objects.filter(order=order).select_related("event").first()
+            payment_payload = self._payment_payload(
+                order, customer_id, ticket.event.title
+            )
             logger.info(
                 f"Creating Asaas payment for order {order.id} - {payment_payload}"
             )
 
-            payment = self._make_request("/payments", "POST", payment_payload)
-
-            # ---------------------------------------------------
-            # 🔹 For PIX payments: fetch QR code for the frontend
-            # ---------------------------------------------------
-            if payment_payload["billingType"] == "PIX":
+            try:
+                payment = self._make_request("/payments", "POST", payment_payload)
+            except httpx.HTTPStatusError as e:
+                # The cached customer may have been removed on Asaas, look it up again
+                if not cached_customer_id or not self._is_client_error(e):
+                    raise
+                payment_payload["customer"] = self.get_customer_id(user, refresh=True)
+                payment = self._make_request("/payments", "POST", payment_payload)
+
+            follow_up = self._payment_follow_up(order, payment, payment_payload)
+            if follow_up is not None:
                 try:
-                    pix_info = self._make_request(
-                        f"/payments/{payment['id']}/pixQrCode"
-                    )
-                    payment["pixTransaction"] = {
-                        "qrCode": {
-                            "encodedImage": pix_info.get("encodedImage"),
-                            "payload": pix_info.get("payload"),
-                        },
-                        "expirationDate": pix_info.get("expirationDate"),
-                    }
+                    follow_up = self._make_request(*follow_up)
                 except Exception as e:
+                    follow_up = None
                     logger.warning(
-                        f"Failed to retrieve PIX QR code for {payment['id']}: {e}"
+                        f"Failed to complete {payment_payload['billingType']} payment {payment['id']} of order {order.id}: {e}"
                     )
 
-            # ---------------------------------------------------
-            # 🔹 For BOLETO payments: the link is already in the response
-            # ---------------------------------------------------
-            if payment_payload["billingType"] == "BOLETO":
-                payment["bankSlipUrl"] = payment.get("bankSlipUrl")
-
-            # ---------------------------------------------------
-            # 🔹 CREDIT CARD flow is handled in Asaas checkout link
-            # ---------------------------------------------------
-            if payment_payload["billingType"] == "CREDIT_CARD":
-                # Optionally, you can generate a payment link
+            return self._complete_payment(payment, payment_payload, follow_up)
+
+        except Exception as e:
+            logger.exception(f"Error creating Asaas payment: {str(e)}")
+            raise
+
+    async def acreate_payment(self, order, user):
+        """Async version of create_payment, only the HTTP calls differ."""
+        try:
+            cached_customer_id = user.asaas_customer_id
+            customer_id = await self.aget_customer_id(user)
+
+            ticket = (
+                await Ticket.objects.filter(order=order)
+                .select_related("event")
+                .afirst()
+            )
+            payment_payload = self._payment_payload(
+                order, customer_id, ticket.event.title
+            )
+            logger.info(
+                f"Creating Asaas payment for order {order.id} - {payment_payload}"
+            )
+
+            try:
+                payment = await self._amake_request(
+                    "/payments", "POST", payment_payload
+                )
+            except httpx.HTTPStatusError as e:
+                if not cached_customer_id or not self._is_client_error(e):
+                    raise
+                payment_payload["customer"] = await self.aget_customer_id(
+                    user, refresh=True
+                )
+                payment = await self._amake_request(
+                    "/payments", "POST", payment_payload
+                )
+
+            follow_up = self._payment_follow_up(order, payment, payment_payload)
+            if follow_up is not None:
                 try:
-                    payment_link_data = self._make_request(
-                        "/paymentLinks",
-                        "POST",
-                        {
-                            "name": f"Order {order.id}",
-                            "billingType": "CREDIT_CARD",
-                            "chargeType": "DETACHED",
-                            "value": float(order.amount),
-                            "dueDateLimitDays": 1,
-                            "description": f"Payment for order {order.id}",
-                            "endDate": due_date,
-                        },
-                    )
-                    payment["paymentLink"] = payment_link_data.get("url")
+                    follow_up = await self._amake_request(*follow_up)
                 except Exception as e:
+                    follow_up = None
                     logger.warning(
-                        f"Failed to create credit card link for {order.id}: {e}"
+                        f"Failed to complete {payment_payload['billingType']} payment {payment['id']} of order {order.id}: {e}"
                     )
 
-            return payment
+            return self._complete_payment(payment, payment_payload, follow_up)
 
         except Exception as e:
             logger.exception(f"Error creating Asaas payment: {str(e)}")
@@ -184,6 +442,36 @@ class AsaasPaymentTask:
             logger.exception(f"Error fetching Asaas payment {payment_id}: {str(e)}")
             raise
 
+    def list_payments(self, **filters):
+        """
+        Iterate over every payment matching the filters, following the
+        offset pagination of GET /payments.
+        e.g. list_payments(status="RECEIVED", **{"dateCreated[ge]": "2025-01-01"})
+        """
+        offset = 0
+        while True:
+            query = urlencode({**filters, "offset": offset, "limit": ASAAS_LIST_LIMIT})
+            try:
+                page = self._make_request(f"/payments?{query}")
+            except Exception as e:
+                logger.exception(f"Error listing Asaas payments {filters}: {str(e)}")
+                raise
+
+            data = page.get("data") or []
+            yield from data
+
+            if not page.get("hasMore") or not data:
+                break
+            offset += len(data)
+
+    async def aget_payment(self, payment_id: str):
+        """Async version of get_payment."""
+        try:
+            return await self._amake_request(f"/payments/{payment_id}")
+        except Exception as e:
+            logger.exception(f"Error fetching Asaas payment {payment_id}: {str(e)}")
+            raise
+
     # ------------------------
     # Payment Cancellation
     # ------------------------
@@ -195,6 +483,14 @@ class AsaasPaymentTask:
             logger.exception(f"Error cancelling Asaas payment {payment_id}: {str(e)}")
             raise
 
+    async def acancel_payment(self, payment_id: str):
+        """Async version of cancel_payment."""
+        try:
+            return await self._amake_request(f"/payments/{payment_id}", method="DELETE")
+        except Exception as e:
+            logger.exception(f"Error cancelling Asaas payment {payment_id}: {str(e)}")
+            raise
+
     # ------------------------
     # Webhook Validation
     # ------------------------
@@ -1,41 +1,177 @@
 import logging
+import time
+from concurrent.futures import ThreadPoolExecutor
+from datetime import timedelta
+from os import getenv
 
-from django.core.management.base import BaseCommand
-from django.db import transaction
-from utils_apps import fulfill_order
+from django.db.models import Min
+from dotenv import load_dotenv
+
+from helper_functions import cancel_order, fulfill_order
+from orders.models import Order
 
 from .asaas_payment_task import AsaasPaymentTask
-from .models import Order
+
+load_dotenv()
 
 logger = logging.getLogger(__name__)
 
+# Pending orders loaded per keyset page
+RECONCILE_PAGE_SIZE = int(getenv("RECONCILE_PAGE_SIZE", "500"))
+# Max concurrent requests to Asaas
+RECONCILE_CONCURRENCY = int(getenv("RECONCILE_CONCURRENCY", "8"))
+
+PAID_STATUSES = ["CONFIRMED", "RECEIVED", "RECEIVED_IN_CASH"]
+# OVERDUE is not final, boleto/PIX payments may still arrive. Overdue orders
+# keep their seats until the reservation expires (tasks.expire_reservations)
+CANCELLED_STATUSES = ["REFUNDED", "DELETED"]
+# Deleted payments are not listed, orders missing from the listed statuses are
+# checked one by one
+LISTED_STATUSES = PAID_STATUSES + ["REFUNDED"]
+
+
+def _list_settled_payments(service, created_since, concurrency):
+    """
+    Fetch every paid/refunded payment created since the given date through the
+    list endpoint, one status per worker. Returns {payment_id: status}.
+    Payments still pending (or deleted) on Asaas are not listed.
+    """
+    filters = {"dateCreated[ge]": created_since.strftime("%Y-%m-%d")}
+
+    def fetch(payment_status):
+        return [
+            (payment["id"], payment.get("status", payment_status))
+            for payment in service.list_payments(status=payment_status, **filters)
+        ]
+
+    with ThreadPoolExecutor(max_workers=min(concurrency, len(LISTED_STATUSES))) as pool:
+        return {
+            payment_id: payment_status
+            for result in pool.map(fetch, LISTED_STATUSES)
+            for payment_id, payment_status in result
+        }
+
+
+def _get_payments(service, payment_ids, concurrency):
+    """
+    Fetch payments one by one, at most `concurrency` requests in flight.
+    Returns {payment_id: status}, failed lookups are left out.
+    """
+
+    def fetch(payment_id):
+        try:
+            payment = service.get_payment(payment_id)
+            # A deleted payment keeps its last status, flagged as deleted
+            if payment.get("deleted"):
+                return payment_id, "DELETED"
+            return payment_id, payment.get("status")
+        except Exception as e:
+            logger.error(f"Error checking payment status for {payment_id}: {e}")
+            return payment_id, None
+
+    with ThreadPoolExecutor(max_workers=concurrency) as pool:
+        return {
+            payment_id: payment_status
+            for payment_id, payment_status in pool.map(fetch, payment_ids)
+            if payment_status
+        }
+
+
+def _apply_transitions(orders, statuses, metrics):
+    """
+    Apply the Asaas statuses to a page of orders, one transaction per order
+    (fulfill_order and cancel_order), so a failing order rolls back alone.
+    """
+    paid = [o for o in orders if statuses.get(o.asaas_payment_id) in PAID_STATUSES]
+    cancelled = [
+        o for o in orders if statuses.get(o.asaas_payment_id) in CANCELLED_STATUSES
+    ]
+
+    for order in paid:
+        try:
+            if fulfill_order(order):
+                metrics["paid"] += 1
+        except Exception as e:
+            metrics["errors"] += 1
+            logger.error(f"Error fulfilling order {order.id}: {e}")
+
+    for order in cancelled:
+        try:
+            # Releases the seats and courtesy uses the order was holding
+            if cancel_order(order, pending_only=True):
+                metrics["cancelled"] += 1
+        except Exception as e:
+            metrics["errors"] += 1
+            logger.error(f"Error cancelling order {order.id}: {e}")
+
+
+def reconcile_pending_payments(
+    page_size=RECONCILE_PAGE_SIZE,
+    concurrency=RECONCILE_CONCURRENCY,
+    use_list_endpoint=True,
+):
+    """
+    Check every pending Asaas payment and update the orders that were
+    confirmed or cancelled.
+
+    Pending orders are paged by primary key (keyset), so each page is an index
+    range scan regardless of how deep the sweep is. Statuses come from the Asaas
+    list endpoint (filtered by status and creation date) when possible. Orders
+    it does not settle, still pending or deleted on Asaas, and every order when
+    the list endpoint fails, are checked with concurrent per-payment lookups.
+
+    Returns a dict of throughput metrics.
+    """
+    started = time.monotonic()
+    service = AsaasPaymentTask()
+    metrics = {"scanned": 0, "paid": 0, "cancelled": 0, "errors": 0}
+
+    pending = Order.objects.filter(status="pending").exclude(asaas_payment_id="")
 
-class Command(BaseCommand):
-    help = "Check all pending Asaas payments and update their status if confirmed or cancelled."
+    oldest = pending.aggregate(oldest=Min("created_at"))["oldest"]
+    if oldest is None:
+        logger.info("No pending Asaas payments to check.")
+        metrics.update(elapsed_seconds=0.0, orders_per_second=0.0)
+        return metrics
 
-    def handle(self, *args, **options):
-        service = AsaasPaymentTask()
-        pending_orders = Order.objects.filter(
-            status="pending", asaas_payment_id__isnull=False
-        )
+    statuses = None
+    if use_list_endpoint:
+        try:
+            # One day of slack, Asaas filters by its own creation date
+            statuses = _list_settled_payments(
+                service, oldest - timedelta(days=1), concurrency
+            )
+        except Exception as e:
+            logger.warning(f"Asaas list endpoint failed, checking one by one: {e}")
 
-        logger.info(f"Checking {pending_orders.count()} pending Asaas payments...")
+    last_id = None
+    while True:
+        page = pending.only("id", "asaas_payment_id", "status").order_by("id")
+        if last_id is not None:
+            page = page.filter(id__gt=last_id)
+        orders = list(page[:page_size])
+        if not orders:
+            break
 
-        for order in pending_orders:
-            try:
-                payment = service.get_payment(order.asaas_payment_id)
-                payment_status = payment.get("status")
+        last_id = orders[-1].id
+        metrics["scanned"] += len(orders)
 
-                if payment_status in ["CONFIRMED", "RECEIVED"]:
-                    with transaction.atomic():
-                        fulfill_order(order)
+        page_statuses = dict(statuses or {})
+        unlisted = [
+            o.asaas_payment_id
+            for o in orders
+            if o.asaas_payment_id not in page_statuses
+        ]
+        if unlisted:
+            page_statuses.update(_get_payments(service, unlisted, concurrency))
 
-                elif payment_status in ["CANCELLED", "OVERDUE"]:
-                    order.status = "cancelled"
-                    order.save(update_fields=["status"])
-                    logger.info(f"❌ Payment cancelled or overdue for order {order.id}")
+        _apply_transitions(orders, page_statuses, metrics)
 
-            except Exception as e:
-                logger.error(f"Error checking payment status for order {order.id}: {e}")
+    elapsed = time.monotonic() - started
+    metrics["elapsed_seconds"] = round(elapsed, 3)
+    metrics["orders_per_second"] = (
+        round(metrics["scanned"] / elapsed, 1) if elapsed else 0.0
+    )
 
-        logger.info("Finished checking pending payments.")
+    logger.info(f"Finished checking pending payments: {metrics}")
+    return metrics
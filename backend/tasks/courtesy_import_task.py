@@ -0,0 +1,188 @@
+import logging
+from os import getenv
+
+from celery import shared_task
+from django.db.models import Q, Sum
+from dotenv import load_dotenv
+
+from events.models import Event
+from orders.models import CourtesyLink
+
+from .import_job_task import (
+    ImportHandler,
+    claim_chunk,
+    complete_chunk,
+    release_chunk,
+    start_import_job,
+)
+from .mass_email_task import (
+    SENDGRID_MAX_PERSONALIZATIONS,
+    retry_after,
+    send_courtesy_mail,
+)
+
+load_dotenv()
+
+logger = logging.getLogger(__name__)
+
+# CSV rows per checkpointed chunk, each chunk is emailed in one SendGrid request
+COURTESY_IMPORT_BATCH_SIZE = min(
+    int(getenv("COURTESY_IMPORT_BATCH_SIZE", "500")), SENDGRID_MAX_PERSONALIZATIONS
+)
+
+
+def start_courtesy_import(csv_blob: str, created_by_id, attachments=None) -> str:
+    """
+    Queue the import of a courtesy CSV stored as a ContentBlob.
+
+    Returns: the job id, see tasks.import_job_task.get_import_progress.
+    """
+    job = start_import_job(
+        "courtesy_links",
+        csv_blob,
+        created_by_id,
+        COURTESY_IMPORT_BATCH_SIZE,
+        {"attachments": attachments},
+    )
+    return str(job.id)
+
+
+def _event_key(value: str):
+    try:
+        return int(value)
+    except (TypeError, ValueError):
+        return None
+
+
+class CourtesyLinkImport(ImportHandler):
+    """
+    CSV (name, email, amount_of_courtesies, event_id) -> one courtesy link per
+    row, emailed to its recipient once the chunk is committed.
+    """
+
+    def prepare(self, job, rows):
+        # Every event is checked before anything is created
+        first_row = {}
+        for row_number, row in rows:
+            if row.get("event_id") and row.get("email"):
+                first_row.setdefault(row["event_id"], row_number)
+
+        events = Event.objects.in_bulk(
+            [key for key in map(_event_key, first_row) if key is not None]
+        )
+        for event_id, row_number in first_row.items():
+            if _event_key(event_id) not in events:
+                return f"Evento com ID {event_id} na linha {row_number} não foi encontrado."
+        return None
+
+    def import_rows(self, job, chunk, rows):
+        rows = list(rows)
+        events = Event.objects.in_bulk(
+            {_event_key(row.get("event_id")) for _, row in rows} - {None}
+        )
+
+        links, errors = [], []
+        for row_number, row in rows:
+            try:
+                ticket_count = int(row.get("amount_of_courtesies") or 1)
+            except ValueError:
+                ticket_count = 0
+
+            event = events.get(_event_key(row.get("event_id")))
+            if not row.get("email"):
+                error = "E-mail não informado."
+            elif not event:
+                error = "Evento não encontrado."
+            elif ticket_count < 1:
+                error = "Quantidade de cortesias inválida."
+            else:
+                error = None
+
+            if error:
+                logger.warning(f"⚠️ Row {row_number} skipped: {error}")
+                errors.append({"row": row_number, "error": error})
+                continue
+
+            links.append(
+                CourtesyLink(
+                    event=event,
+                    ticket_count=ticket_count,
+                    created_by_id=job.created_by_id,
+                    is_active=True,
+                    recipient_email=row["email"],
+                    recipient_name=row.get("name") or None,
+                    import_job=job,
+                    import_row=row_number,
+                )
+            )
+
+        CourtesyLink.objects.bulk_create(links)
+        return len(links), errors
+
+    def chunk_imported(self, chunk):
+        send_courtesy_chunk_emails.delay(chunk.id)
+
+    def progress(self, job):
+        imported = Q(status__in=["imported", "claimed", "done"])
+        emails = job.chunks.aggregate(
+            total=Sum("succeeded", filter=imported),
+            sent=Sum("succeeded", filter=Q(status="done", error="")),
+            failed=Sum("succeeded", filter=Q(status="done") & ~Q(error="")),
+        )
+        emails = {field: value or 0 for field, value in emails.items()}
+        emails["pending"] = emails["total"] - emails["sent"] - emails["failed"]
+        return {"emails": emails}
+
+
+@shared_task(bind=True, acks_late=True, max_retries=5, default_retry_delay=60)
+def send_courtesy_chunk_emails(self, chunk_id: int):
+    """
+    Email the courtesy links of an imported chunk in one SendGrid request.
+    The chunk is claimed (and the claim committed) before sending and marked
+    done right after, so resumed jobs and duplicated tasks skip it. Only a
+    worker dying between the send and the done mark can send it again, once
+    its claim went stale.
+    """
+    chunk = claim_chunk(chunk_id)
+    if chunk is None:
+        return {"chunk_id": chunk_id, "status": "skipped"}
+
+    links = (
+        CourtesyLink.objects.select_related("event")
+        .filter(
+            import_job_id=chunk.job_id,
+            import_row__gte=chunk.start_row,
+            import_row__lt=chunk.start_row + chunk.row_count,
+        )
+        .order_by("import_row")
+    )
+    recipients = [
+        {
+            "email": link.recipient_email,
+            "name": link.recipient_name,
+            "code": link.code,
+            "event_name": link.event.title,
+            "event_date": link.event.date.isoformat(),
+        }
+        for link in links
+    ]
+
+    try:
+        if recipients:
+            send_courtesy_mail(recipients, chunk.job.options.get("attachments"))
+    except Exception as e:
+        if self.request.retries < self.max_retries:
+            release_chunk(chunk_id)
+            raise self.retry(exc=e, countdown=retry_after(e))
+        logger.error(
+            f"🚨 Giving up the courtesy emails of import chunk {chunk_id}: {e}",
+            exc_info=True,
+        )
+        complete_chunk(chunk_id, error="Falha ao enviar os e-mails de cortesia.")
+        return {"chunk_id": chunk_id, "failed": True}
+
+    complete_chunk(chunk_id)
+    logger.info(
+        f"📨 SendGrid: {len(recipients)} courtesy email(s) of import chunk {chunk_id} sent"
+    )
+    return {"chunk_id": chunk_id, "sent": len(recipients)}
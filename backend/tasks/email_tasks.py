@@ -1,31 +1,43 @@
+from datetime import timedelta
 from os import getenv
 from dotenv import load_dotenv
 import logging
-from datetime import datetime, timedelta
 
 from celery import shared_task
+from django.db import transaction
+from django.db.models import Q
+from django.utils import timezone
 from sendgrid import SendGridAPIClient
-from sendgrid.helpers.mail import (
-    Attachment,
-    Disposition,
-    FileContent,
-    FileName,
-    FileType,
-    From,
-    Mail,
-    To,
-)
+from sendgrid.helpers.mail import From, Mail, To
 
 from orders.models import Order
+from tickets.models import Ticket
 
 load_dotenv()
 
 logger = logging.getLogger(__name__)
 
+# Minutes before the claim of a worker sending ticket emails is taken over
+TICKET_EMAIL_CLAIM_MINUTES = int(getenv("TICKET_EMAIL_CLAIM_MINUTES", "10"))
+
+_sendgrid_client = None
+
+
+def get_sendgrid_client() -> SendGridAPIClient:
+    """
+    Return the process-wide SendGrid client, built once instead of per email.
+    """
+    global _sendgrid_client
+
+    if _sendgrid_client is None:
+        _sendgrid_client = SendGridAPIClient(getenv("SENDGRID_API_KEY"))
+
+    return _sendgrid_client
+
 
 @shared_task
 def send_verification_email(email: str, verification_code: str):
-    sg = SendGridAPIClient(getenv("SENDGRID_API_KEY"))
+    sg = get_sendgrid_client()
     from_email = From(getenv("DEFAULT_FROM_EMAIL"), "CDPI Pass")
     subject = "Seu Código de Verificação - CDPI Pass"
     plain_text_content = f"Seu código de verificação é: {verification_code}"
@@ -50,7 +62,7 @@ def send_password_reset_email(email: str):
 
     reset_token = generate_reset_token(email)
 
-    sg = SendGridAPIClient(getenv("SENDGRID_API_KEY"))
+    sg = get_sendgrid_client()
     reset_link = f"{getenv('BASE_URL')}/reset-password?token={reset_token}"
     from_email = From(getenv("DEFAULT_FROM_EMAIL"), "CDPI Pass")
     subject = "Redefinição de Senha - CDPI Pass"
@@ -67,55 +79,65 @@ def send_password_reset_email(email: str):
     return response.status_code
 
 
-@shared_task(bind=True, max_retries=3)
-def send_ticket_email(recipient_email, order_id):
+def _ticket_block_html(ticket, order) -> str:
+    event = ticket.event
+    formatted_event_date = event.date.strftime("%A, %d de %B de %Y às %H:%M")
+    qr_code_url = ticket.qr_code_s3_url
+    if not qr_code_url:
+        logger.warning(
+            f"QR code S3 URL missing for ticket {ticket.id} in order {order.id}. Email content might be incomplete."
+        )
+
+    return f"""
+                  <div class="ticket-info">
+                    <h3>{event.title}</h3>
+                    <p><strong>📅 Data:</strong> {formatted_event_date}</p>
+                    <p><strong>📍 Local:</strong> {event.location}</p>
+                    <p><strong>👤 Portador:</strong> {ticket.name}</p>
+                    <p><strong>🎟️ Pedido:</strong> #{order.id}</p>
+                    <p><strong>🏷️ Ingresso ID:</strong> {ticket.id}</p>
+                  </div>
+
+                  <div class="qr-code" style="text-align: center;">
+                      <p><strong>QR Code do Ingresso:</strong></p>
+                      {f'<img src="{qr_code_url}" alt="QR Code do Ingresso" style="max-width: 256px; height: auto; display: block; margin: 10px auto;">' if qr_code_url else '<p style="color: red;">QR Code não disponível.</p>'}
+                      <p style="font-size: 12px; color: #666;">
+                        Apresente este QR Code na entrada do evento
+                      </p>
+                  </div>
     """
-    Sends ticket email(s) for a given order ID after payment confirmation.
-    Fetches required data efficiently from the database.
-    Sends one email per ticket associated with the order.
+
+
+def _ticket_block_text(ticket, order) -> str:
+    event = ticket.event
+    formatted_event_date = event.date.strftime("%A, %d de %B de %Y às %H:%M")
+    return f"""
+            Evento: {event.title}
+            Data: {formatted_event_date}
+            Local: {event.location}
+            Portador: {ticket.name}
+            Pedido: #{order.id}
+            Ingresso ID: {ticket.id}
     """
-    logger.info(
-        f"Attempting to send ticket email(s) for order_id: {order_id} to {recipient_email}"
-    )
-    try:
-        order = (
-            Order.objects.select_related("user", "courtesy_link_id__event")
-            .prefetch_related("tickets__event")
-            .get(id=order_id)
-        )
 
-    except Order.DoesNotExist:
-        logger.error(f"Order with ID {order_id} not found for sending ticket email.")
-        return {"error": "Order not found"}
-    except Exception as e:
-        logger.error(f"Error fetching order {order_id}: {e}", exc_info=True)
-        return {"error": f"Error fetching order: {e}"}
 
-    # Access related objects fetched efficiently
-    user = order.user
-    tickets = order.tickets.all()
+def build_ticket_email(order, tickets, holder_name: str) -> tuple[str, str, str]:
+    """
+    Render the single email carrying every given ticket of the order.
 
-    if not tickets:
-        logger.warning(f"No tickets found for order {order_id}. Cannot send email.")
-        return {"warning": "No tickets found for this order"}
-
-    # --- Send one email per ticket ---
-    email_sent_count = 0
-    for ticket in tickets:
-        try:
-            # Use the ticket's event (in case there are multiple events)
-            ticket_event = ticket.event
-            event_dt = ticket_event.date
-            formatted_event_date = event_dt.strftime("%A, %d de %B de %Y às %H:%M")
-
-            # Ensure ticket has necessary data
-            qr_code_url = ticket.qr_code_s3_url
-            if not qr_code_url:
-                logger.warning(
-                    f"QR code S3 URL missing for ticket {ticket.id} in order {order.id}. Email content might be incomplete."
-                )
-
-            html_content = f"""
+    Returns: (subject, html_content, text_content)
+    """
+    titles = list(dict.fromkeys(ticket.event.title for ticket in tickets))
+    if len(tickets) == 1:
+        subject = (
+            f"Seu ingresso para {titles[0]} - CDPI Pass (Ingresso {tickets[0].id})"
+        )
+        intro = "Aqui está seu ingresso para o evento:"
+    else:
+        subject = f"Seus {len(tickets)} ingressos para {', '.join(titles)} - CDPI Pass"
+        intro = f"Aqui estão seus {len(tickets)} ingressos:"
+
+    html_content = f"""
             <!DOCTYPE html>
             <html>
             <head>
@@ -138,26 +160,9 @@ def send_ticket_email(recipient_email, order_id):
                   <h2>CDPI Pass</h2>
                 </div>
                 <div class="content">
-                  <p>Olá, <strong>{ticket.name or user.first_name or 'Participante'}</strong>!</p>
-                  <p>Seu pagamento foi confirmado! Aqui está seu ingresso para o evento:</p>
-
-                  <div class="ticket-info">
-                    <h3>{ticket_event.title}</h3>
-                    <p><strong>📅 Data:</strong> {formatted_event_date}</p>
-                    <p><strong>📍 Local:</strong> {ticket_event.location}</p>
-                    <p><strong>👤 Portador:</strong> {ticket.name}</p>
-                    <p><strong>🎟️ Pedido:</strong> #{order.id}</p>
-                    <p><strong>🏷️ Ingresso ID:</strong> {ticket.id}</p>
-                  </div>
-
-                  <div class="qr-code" style="text-align: center;">
-                      <p><strong>QR Code do Ingresso:</strong></p>
-                      {f'<img src="{qr_code_url}" alt="QR Code do Ingresso" style="max-width: 256px; height: auto; display: block; margin: 10px auto;">' if qr_code_url else '<p style="color: red;">QR Code não disponível.</p>'}
-                      <p style="font-size: 12px; color: #666;">
-                        Apresente este QR Code na entrada do evento
-                      </p>
-                  </div>
-
+                  <p>Olá, <strong>{holder_name}</strong>!</p>
+                  <p>Seu pagamento foi confirmado! {intro}</p>
+                  {"".join(_ticket_block_html(ticket, order) for ticket in tickets)}
                   <div style="background: #BBE1FA; padding: 15px; border-radius: 5px; margin: 20px 0;">
                     <h4>📋 Instruções Importantes:</h4>
                     <ul style="text-align: left;">
@@ -176,185 +181,121 @@ def send_ticket_email(recipient_email, order_id):
             </html>
             """
 
-            text_content = f"""
+    text_content = f"""
             CDPI Pass - Seu Ingresso
 
-            Olá, {ticket.name or user.first_name or 'Participante'}!
+            Olá, {holder_name}!
 
             Seu pagamento foi confirmado! Detalhes do evento:
-
-            Evento: {ticket_event.title}
-            Data: {formatted_event_date}
-            Local: {ticket_event.location}
-            Pedido: #{order.id}
-            Ingresso ID: {ticket.id}
-
+            {"".join(_ticket_block_text(ticket, order) for ticket in tickets)}
             Importante: Seu QR Code está anexado ou incluído neste email (se disponível).
             Apresente-o na entrada do evento.
             """
 
-            # Build SendGrid message
-            message = Mail(
-                from_email=From(getenv("DEFAULT_FROM_EMAIL"), "CDPI Pass"),
-                to_emails=recipient_email,
-                subject=f"Seu ingresso para {ticket_event.title} - CDPI Pass (Ingresso {ticket.id})",
-                html_content=html_content,
-                plain_text_content=text_content,
-            )
-
-            # Send via SendGrid
-            sg = SendGridAPIClient(getenv("SENDGRID_API_KEY"))
-            response = sg.send(message)
-            logger.info(
-                f"SendGrid response for ticket {ticket.id} (Order {order.id}) to {recipient_email}: Status {response.status_code}"
-            )
-            email_sent_count += 1
-
-        except Exception as e:
-            logger.error(
-                f"🚨 Error sending specific ticket email for ticket {ticket.id} (Order {order.id}) to {recipient_email}: {e}",
-                exc_info=True,
-            )
-            raise self.retry(exc=e, countdown=60, max_retries=3)
-
-    if email_sent_count == len(tickets):
-        logger.info(
-            f"✅ Successfully sent all {email_sent_count} ticket email(s) for order {order_id} to {recipient_email}"
-        )
-        return {"status": "success", "sent_count": email_sent_count}
-    else:
-        logger.warning(
-            f"⚠️ Sent {email_sent_count} out of {len(tickets)} ticket email(s) for order {order_id} to {recipient_email}"
-        )
-        return {
-            "status": "partial_failure",
-            "sent_count": email_sent_count,
-            "total_tickets": len(tickets),
-        }
+    return subject, html_content, text_content
 
 
-@shared_task
-def send_mass_email(
-    email, name, event_name, courtesy_code, event_date, attachments=None
-):
-    """Asynchronous task to send courtesy email using SendGrid."""
+@shared_task(bind=True, max_retries=3)
+def send_ticket_email(self, recipient_email, order_id, ticket_ids=None):
+    """
+    Send one email with every ticket of the order meant for this recipient
+    (all of the order's tickets when ticket_ids is not given).
+    The unsent tickets are claimed in a short transaction, the email is sent
+    outside of it and the tickets are then stamped with email_sent_at, so
+    retries and duplicated tasks skip them. Only a worker dying between the
+    send and the stamp can send them again, once its claim went stale.
+    """
+    logger.info(
+        f"Attempting to send ticket email for order_id: {order_id} to {recipient_email}"
+    )
     try:
-        base_url = getenv("BASE_URL", "https://cdpipharma.com.br")
-        redeem_url = f"{base_url}/cortesia?code={courtesy_code}"
-        subject = f"Sua cortesia para o evento {event_name}"
-
-        # Format dates
-        event_dt = datetime.fromisoformat(event_date)
-        formatted_event_date = event_dt.strftime("%A, %d de %B de %Y")
-
-        redeem_by_date = event_dt - timedelta(days=6)
-        formatted_redeem_by_date = redeem_by_date.strftime("%d/%m/%Y")
-
-        # Build HTML
-        html_content = f"""
-        <!DOCTYPE html>
-        <html>
-        <head>
-          <meta charset="utf-8">
-          <title>{subject}</title>
-          <style>
-            body {{ font-family: Arial, sans-serif; line-height: 1.6; color: #333; margin: 0; padding: 0; }}
-            .container {{ max-width: 600px; margin: 0 auto; padding: 20px; }}
-            .header {{ background: #0F4C75; color: white; padding: 20px; text-align: center; }}
-            .content {{ padding: 20px; background: #f9f9f9; text-align: center; }}
-            .message-box {{ text-align: left; margin: 20px 0; }}
-            .cta-button {{
-              background-color: #3282B8;
-              color: white;
-              padding: 15px 25px;
-              text-decoration: none;
-              border-radius: 5px;
-              font-size: 16px;
-              display: inline-block;
-              margin: 20px 0;
-            }}
-            .important-notice {{
-              background: #BBE1FA;
-              padding: 15px;
-              border-radius: 5px;
-              margin: 20px 0;
-              text-align: left;
-            }}
-            .footer {{ text-align: center; color: #666; font-size: 12px; margin-top: 20px; }}
-          </style>
-        </head>
-        <body>
-          <div class="container">
-            <div class="header">
-              <h1>🎁 Você Recebeu uma Cortesia!</h1>
-              <h2>CDPI Pass</h2>
-            </div>
-            <div class="content">
-              <div class="message-box">
-                <p style="font-size: 18px;">Olá, <strong>{name}</strong>!</p>
-                <p>Você recebeu uma cortesia para o <strong>{event_name}</strong> na data <strong>{formatted_event_date}</strong>!</p>
-                <p style="font-style: italic; color: #333;">
-                  Um evento que amplia horizontes e conecta quem faz a diferença na indústria. Oportunidade ímpar para você dominar o Ciclo de Vida do Medicamento e acelerar a sua trajetória profissional!
-                </p>
-                <p>Para resgatar seu ingresso, clique no botão abaixo:</p>
-              </div>
-              <a href="{redeem_url}" class="cta-button">Resgatar Ingresso Agora</a>
-              <div class="important-notice">
-              <p>Ou se preferir, você pode resgatar a cortesia por meio do nosso site com o código:    <strong>{courtesy_code}</strong></p>
-                <h4>⚠️ Instruções Importantes:</h4>
-                <p>
-                  É imprescindível fazer o resgate da sua cortesia até o prazo de <strong>48 horas</strong> após o recebimento dessa confirmação de inscrição para garantir a sua vaga e participar do evento.
-                </p>
-              </div>
-            </div>
-            <div class="footer">
-              <p>Atenciosamente,<br>Equipe CDPI Pass</p>
-              <p>relacionamento@cdpipharma.com.br | +55 (62) 99860-6833</p>
-            </div>
-          </div>
-        </body>
-        </html>
-          """
-
-        text_content = f"""
-        Olá {name}!
-
-        Você recebeu uma cortesia para o {event_name} na data {formatted_event_date}!
-
-        Para resgatar seu ingresso, acesse: {redeem_url}
-
-        ⚠️ Resgate até {formatted_redeem_by_date} para garantir sua vaga.
+        order = Order.objects.select_related("user").get(id=order_id)
+    except Order.DoesNotExist:
+        logger.error(f"Order with ID {order_id} not found for sending ticket email.")
+        return {"error": "Order not found"}
 
-        ⚠️ É imprescindível fazer o resgate da sua cortesia até o prazo de <strong>48 horas</strong> após o recebimento dessa confirmação de inscrição para garantir a sua vaga e participar do evento.
+    now = timezone.now()
+    stale = now - timedelta(minutes=TICKET_EMAIL_CLAIM_MINUTES)
+    with transaction.atomic():
+        tickets = (
+            Ticket.objects.select_for_update(skip_locked=True, of=("self",))
+            .select_related("event")
+            .filter(order_id=order_id, email_sent_at__isnull=True)
+            .filter(Q(email_claimed_at__isnull=True) | Q(email_claimed_at__lt=stale))
+            .order_by("created_at", "id")
+        )
+        if ticket_ids is not None:
+            tickets = tickets.filter(id__in=ticket_ids)
+        tickets = list(tickets)
+        claimed = Ticket.objects.filter(id__in=[ticket.id for ticket in tickets])
+        claimed.update(email_claimed_at=now)
 
-        Atenciosamente,
-        Equipe CDPI Pass
-        """
+    if not tickets:
+        logger.info(f"No unsent tickets for order {order_id} to {recipient_email}")
+        return {"status": "skipped", "sent_count": 0}
 
-        # Create email
+    try:
+        first = tickets[0]
+        if first.type_of_ticket == "courtesy":
+            holder_name = first.name
+        else:
+            holder_name = order.user.first_name or first.name or "Participante"
+
+        subject, html_content, text_content = build_ticket_email(
+            order, tickets, holder_name
+        )
         message = Mail(
             from_email=From(getenv("DEFAULT_FROM_EMAIL"), "CDPI Pass"),
-            to_emails=To(email),
+            to_emails=recipient_email,
             subject=subject,
             html_content=html_content,
             plain_text_content=text_content,
         )
 
-        # Attachments if any
-        if attachments:
-            for file in attachments:
-                message.attachment = Attachment(
-                    FileContent(file["content"]),
-                    FileName(file["filename"]),
-                    FileType(file["type"]),
-                    Disposition("attachment"),
-                )
-
-        sg = SendGridAPIClient(getenv("SENDGRID_API_KEY"))
-        sg.send(message)
-        print(f"📨 SendGrid: courtesy email sent to {email}")
+        response = get_sendgrid_client().send(message)
+
+    except Exception as e:
+        logger.error(
+            f"🚨 Error sending ticket email for order {order_id} to {recipient_email}: {e}",
+            exc_info=True,
+        )
+        # Give the tickets back to the retry
+        claimed.update(email_claimed_at=None)
+        raise self.retry(exc=e, countdown=60, max_retries=3)
+
+    claimed.update(email_sent_at=timezone.now(), email_claimed_at=None)
+    logger.info(
+        f"✅ Sent {len(tickets)} ticket(s) of order {order_id} to {recipient_email} in one email (status {response.status_code})"
+    )
+    return {"status": "success", "sent_count": len(tickets)}
+
+
+@shared_task
+def send_mass_email(
+    email, name, event_name, courtesy_code, event_date, attachments=None
+):
+    """
+    Single-recipient courtesy email, kept for tasks enqueued before the
+    courtesy imports (see tasks.courtesy_import_task).
+    """
+    from tasks.mass_email_task import send_courtesy_mail
+
+    try:
+        send_courtesy_mail(
+            [
+                {
+                    "email": email,
+                    "name": name,
+                    "code": courtesy_code,
+                    "event_name": event_name,
+                    "event_date": event_date,
+                }
+            ],
+            attachments,
+        )
+        logger.info(f"📨 SendGrid: courtesy email sent to {email}")
         return True
 
     except Exception as e:
-        print(f"🚨 SendGrid email error for {email}: {e}")
+        logger.error(f"🚨 SendGrid email error for {email}: {e}", exc_info=True)
         return False
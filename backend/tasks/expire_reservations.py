@@ -0,0 +1,56 @@
+import logging
+from datetime import timedelta
+from os import getenv
+
+from django.utils import timezone
+from dotenv import load_dotenv
+
+from helper_functions import cancel_order
+from orders.models import Order
+
+from .asaas_payment_task import AsaasPaymentTask
+
+load_dotenv()
+
+logger = logging.getLogger(__name__)
+
+# Unpaid orders hold their seats for this long before they are released.
+# Asaas payments are due on the creation date, with one extra day of tolerance.
+ORDER_RESERVATION_TTL_MINUTES = int(getenv("ORDER_RESERVATION_TTL_MINUTES", "2880"))
+
+
+def expire_stale_reservations(ttl_minutes=ORDER_RESERVATION_TTL_MINUTES):
+    """
+    Cancel pending orders older than the reservation TTL and give their seats
+    back. The Asaas charge is cancelled first, so a stale order is only
+    released once it can no longer be paid; when Asaas refuses (e.g. it was
+    paid meanwhile) the order is left for the payment reconciliation.
+
+    Returns a dict with the number of expired and skipped orders.
+    """
+    cutoff = timezone.now() - timedelta(minutes=ttl_minutes)
+    stale = Order.objects.filter(status="pending", created_at__lt=cutoff).only(
+        "id", "asaas_payment_id"
+    )
+
+    service = AsaasPaymentTask()
+    metrics = {"expired": 0, "skipped": 0}
+
+    for order in stale.iterator():
+        if order.asaas_payment_id:
+            try:
+                service.cancel_payment(order.asaas_payment_id)
+            except Exception as e:
+                logger.warning(f"Could not cancel payment of order {order.id}: {e}")
+                metrics["skipped"] += 1
+                continue
+
+        try:
+            if cancel_order(order, pending_only=True):
+                metrics["expired"] += 1
+        except Exception as e:
+            logger.error(f"Error expiring order {order.id}: {e}", exc_info=True)
+            metrics["skipped"] += 1
+
+    logger.info(f"Finished expiring stale reservations: {metrics}")
+    return metrics
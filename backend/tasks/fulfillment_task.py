@@ -0,0 +1,92 @@
+import logging
+from collections import defaultdict
+
+from celery import chain, shared_task
+
+from orders.models import Order
+from tickets.models import Ticket
+
+logger = logging.getLogger(__name__)
+
+
+def start_order_fulfillment(order_id: str):
+    """
+    Kick off the fulfillment pipeline for a paid order:
+    QR codes are generated and uploaded first, then the ticket emails are sent.
+    Every stage is idempotent, so the whole chain can be re-run safely.
+    """
+    return chain(
+        generate_order_qr_codes.si(order_id),
+        send_order_ticket_emails.si(order_id),
+    ).apply_async()
+
+
+@shared_task(bind=True, acks_late=True, max_retries=3, default_retry_delay=30)
+def generate_order_qr_codes(self, order_id: str):
+    """
+    Generate and upload QR codes for every ticket of the order that does not
+    have one yet. Tickets that already have an S3 URL are skipped on retries.
+    """
+    from helper_functions import process_tickets_qr
+
+    tickets = Ticket.objects.filter(order_id=order_id, qr_code_s3_url="").only(
+        "id", "event_id", "qr_code_data", "qr_code_s3_url"
+    )
+
+    failed = process_tickets_qr(tickets)
+
+    if failed:
+        if self.request.retries < self.max_retries:
+            logger.warning(
+                f"Retrying QR generation for order {order_id}: {len(failed)} ticket(s) failed"
+            )
+            raise self.retry()
+
+        # Do not hold the emails back forever, they render a fallback message
+        logger.error(
+            f"⚠️ Giving up QR generation for tickets {failed} of order {order_id}"
+        )
+
+    return {"order_id": order_id, "failed": len(failed)}
+
+
+@shared_task(bind=True, acks_late=True, max_retries=3, default_retry_delay=30)
+def send_order_ticket_emails(self, order_id: str):
+    """
+    Enqueue the ticket emails of a paid order, one email per recipient.
+    Courtesy tickets go to the attendee, every other ticket goes to the buyer.
+    Tickets already emailed are left out.
+    """
+    from tasks.email_tasks import send_ticket_email
+
+    try:
+        order = Order.objects.select_related("user").get(id=order_id)
+    except Order.DoesNotExist:
+        logger.error(f"Order {order_id} not found for ticket emails")
+        return {"error": "Order not found"}
+
+    if order.status != "paid":
+        logger.warning(f"Order {order_id} is {order.status}, skipping ticket emails")
+        return {"skipped": order.status}
+
+    attendee = order.courtesy_attendees.only("email").first()
+    tickets = order.tickets.filter(email_sent_at__isnull=True).only(
+        "id", "type_of_ticket"
+    )
+
+    recipients = defaultdict(list)
+    for ticket in tickets:
+        if ticket.type_of_ticket == "courtesy" and attendee:
+            email = attendee.email
+        else:
+            email = order.user.email
+
+        recipients[email].append(str(ticket.id))
+
+    for email, ticket_ids in recipients.items():
+        send_ticket_email.delay(email, str(order.id), ticket_ids)
+
+    logger.info(
+        f"✅ Ticket emails enqueued for order {order_id} to {len(recipients)} recipient(s)"
+    )
+    return {"order_id": order_id, "emails": len(recipients)}
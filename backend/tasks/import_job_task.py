@@ -0,0 +1,385 @@
+import codecs
+import csv
+import io
+import logging
+from abc import ABC, abstractmethod
+from datetime import timedelta
+from itertools import islice
+from os import getenv
+
+from celery import shared_task
+from django.core.exceptions import ValidationError
+from django.db import transaction
+from django.db.models import F, Q, Sum
+from django.utils import timezone
+from django.utils.module_loading import import_string
+from dotenv import load_dotenv
+
+from helper_functions import detect_delimiter
+from orders.attachments import load_blob_data
+from orders.models import ImportChunk, ImportJob
+
+load_dotenv()
+
+logger = logging.getLogger(__name__)
+
+# Attempts of a chunk before its job is failed
+IMPORT_CHUNK_MAX_ATTEMPTS = int(getenv("IMPORT_CHUNK_MAX_ATTEMPTS", "3"))
+# Running jobs without any progress for this long are dispatched again
+IMPORT_JOB_STALE_MINUTES = int(getenv("IMPORT_JOB_STALE_MINUTES", "10"))
+# Resumes in a row without progress before a job is failed
+IMPORT_JOB_MAX_RESUMES = int(getenv("IMPORT_JOB_MAX_RESUMES", "3"))
+# Row errors returned by get_import_progress
+IMPORT_ERRORS_SHOWN = 100
+
+# ImportJob.kind -> handler class
+IMPORT_HANDLERS = {
+    "courtesy_links": "tasks.courtesy_import_task.CourtesyLinkImport",
+}
+
+
+class ImportHandler(ABC):
+    """
+    What an ImportJob does with its rows, one subclass per ImportJob.kind.
+    """
+
+    def prepare(self, job, rows):
+        """Check the whole file before any chunk runs. Returns an error or None."""
+        return None
+
+    @abstractmethod
+    def import_rows(self, job, chunk, rows):
+        """
+        Import the (row number, row) pairs of a chunk, inside its transaction.
+        Returns: (rows imported, [{"row", "error"}])
+        """
+
+    def chunk_imported(self, chunk):
+        """
+        Follow-up once the chunk is committed. Long ones (e.g. emails) run
+        between claim_chunk and complete_chunk, outside any transaction.
+        """
+        complete_chunk(chunk.id)
+
+    def progress(self, job):
+        """Extra fields of get_import_progress."""
+        return {}
+
+
+def get_import_handler(kind: str) -> ImportHandler:
+    return import_string(IMPORT_HANDLERS[kind])()
+
+
+# ------------------------
+# CSV
+# ------------------------
+def read_csv_rows(data: bytes, offset: int | None = None, first_row: int = 1):
+    """
+    Yield (row number, byte offset, row) one at a time, the file is never
+    materialized as a list. With an offset, reading starts at that row.
+    """
+    stream = io.BytesIO(data)
+    delimiter = detect_delimiter(stream)
+    stream.seek(len(codecs.BOM_UTF8) if data.startswith(codecs.BOM_UTF8) else 0)
+
+    # csv only pulls the lines of the current record, so tell() is the offset
+    # of the next one
+    reader = csv.reader((line.decode("utf-8") for line in stream), delimiter=delimiter)
+    header = [name.strip() for name in next(reader, [])]
+    if offset is not None:
+        stream.seek(offset)
+
+    row_number = first_row
+    while True:
+        row_offset = stream.tell()
+        values = next(reader, None)
+        if values is None:
+            return
+        if not any(values):
+            continue
+        yield row_number, row_offset, {
+            name: value.strip() for name, value in zip(header, values) if name
+        }
+        row_number += 1
+
+
+def _plan_chunks(job, data: bytes):
+    chunks, row_count = [], 0
+    for row_number, offset, _ in read_csv_rows(data):
+        if row_count % job.chunk_size == 0:
+            chunks.append(
+                ImportChunk(
+                    job=job,
+                    index=len(chunks),
+                    start_row=row_number,
+                    start_offset=offset,
+                    row_count=0,
+                )
+            )
+        chunks[-1].row_count += 1
+        row_count += 1
+    return chunks, row_count
+
+
+# ------------------------
+# Jobs
+# ------------------------
+def start_import_job(kind: str, source: str, created_by_id, chunk_size, options=None):
+    """
+    Create an ImportJob over a stored ContentBlob and queue it.
+
+    Returns: the job.
+    """
+    job = ImportJob.objects.create(
+        kind=kind,
+        source_id=source,
+        created_by_id=created_by_id,
+        chunk_size=chunk_size,
+        options=options or {},
+    )
+    job_id = str(job.id)
+    transaction.on_commit(lambda: run_import_job.delay(job_id))
+    return job
+
+
+def _fail_job(job_id, error: str):
+    logger.error(f"❌ Import job {job_id} failed: {error}")
+    ImportJob.objects.filter(id=job_id).exclude(status="failed").update(
+        status="failed",
+        error=error,
+        finished_at=timezone.now(),
+        updated_at=timezone.now(),
+    )
+
+
+def _finish_if_done(job_id):
+    if ImportChunk.objects.filter(job_id=job_id).exclude(status="done").exists():
+        return
+    if ImportJob.objects.filter(id=job_id, status="running").update(
+        status="finished", finished_at=timezone.now(), updated_at=timezone.now()
+    ):
+        logger.info(f"✅ Import job {job_id} finished")
+
+
+@shared_task(bind=True, acks_late=True)
+def run_import_job(self, job_id: str):
+    """
+    Split the file of a job in chunks (once) and dispatch every chunk that is
+    not done yet. Running it again, e.g. after a worker restart, only picks
+    up what is left, chunks and their follow-ups are idempotent.
+    """
+    job = ImportJob.objects.filter(id=job_id).first()
+    if job is None or job.status in ("finished", "failed"):
+        return {"job_id": job_id, "status": job.status if job else None}
+
+    handler = get_import_handler(job.kind)
+
+    if job.total_rows is None:
+        data = load_blob_data(job.source_id)
+        try:
+            error = handler.prepare(
+                job, ((row_number, row) for row_number, _, row in read_csv_rows(data))
+            )
+            if not error:
+                chunks, row_count = _plan_chunks(job, data)
+        except UnicodeDecodeError:
+            error = "O arquivo CSV deve estar codificado em UTF-8."
+        except csv.Error as e:
+            error = f"Arquivo CSV inválido: {e}"
+        if error:
+            _fail_job(job_id, error)
+            return {"job_id": job_id, "error": error}
+
+        with transaction.atomic():
+            ImportChunk.objects.bulk_create(chunks, ignore_conflicts=True)
+            ImportJob.objects.filter(id=job_id).update(
+                total_rows=row_count,
+                status="running",
+                updated_at=timezone.now(),
+                resumes=0,
+            )
+        logger.info(
+            f"🧩 Import job {job_id}: {row_count} row(s), {len(chunks)} chunk(s)"
+        )
+    else:
+        ImportJob.objects.filter(id=job_id, status="queued").update(status="running")
+
+    for chunk in job.chunks.exclude(status__in=["done", "failed"]):
+        if chunk.status == "pending":
+            process_import_chunk.delay(chunk.id)
+        else:
+            handler.chunk_imported(chunk)
+
+    _finish_if_done(job_id)
+    return {"job_id": job_id}
+
+
+@shared_task(bind=True, acks_late=True)
+def process_import_chunk(self, chunk_id: int):
+    """
+    Import the rows of one chunk in a single transaction, the chunk is marked
+    imported in the same commit. A chunk already imported, or locked by
+    another worker, is skipped.
+    """
+    # Counted outside the transaction, a chunk that keeps crashing gives up
+    ImportChunk.objects.filter(id=chunk_id, status="pending").update(
+        attempts=F("attempts") + 1
+    )
+
+    with transaction.atomic():
+        chunk = (
+            ImportChunk.objects.select_for_update(skip_locked=True, of=("self",))
+            .select_related("job")
+            .filter(id=chunk_id, status="pending", job__status="running")
+            .first()
+        )
+        if chunk is None:
+            return {"chunk_id": chunk_id, "status": "skipped"}
+
+        job = chunk.job
+        if chunk.attempts > IMPORT_CHUNK_MAX_ATTEMPTS:
+            chunk.status, chunk.error = "failed", "Limite de tentativas atingido."
+            chunk.save(update_fields=["status", "error"])
+            transaction.on_commit(
+                lambda: _fail_job(
+                    job.id,
+                    f"Falha ao processar as linhas a partir da {chunk.start_row}.",
+                )
+            )
+            return {"chunk_id": chunk_id, "status": "failed"}
+
+        handler = get_import_handler(job.kind)
+        rows = islice(
+            read_csv_rows(
+                load_blob_data(job.source_id), chunk.start_offset, chunk.start_row
+            ),
+            chunk.row_count,
+        )
+        succeeded, errors = handler.import_rows(
+            job, chunk, ((row_number, row) for row_number, _, row in rows)
+        )
+
+        chunk.status = "imported"
+        chunk.succeeded, chunk.failed, chunk.errors = succeeded, len(errors), errors
+        chunk.processed_at = timezone.now()
+        chunk.save(
+            update_fields=["status", "succeeded", "failed", "errors", "processed_at"]
+        )
+        ImportJob.objects.filter(id=job.id).update(updated_at=timezone.now(), resumes=0)
+        transaction.on_commit(lambda: handler.chunk_imported(chunk))
+
+    logger.info(
+        f"📦 Import job {job.id} chunk #{chunk.index}: {succeeded} row(s) imported, {len(errors)} skipped"
+    )
+    return {"chunk_id": chunk_id, "succeeded": succeeded, "failed": len(errors)}
+
+
+def claim_chunk(chunk_id: int):
+    """
+    Claim the follow-up of an imported chunk with a committed conditional
+    update, so it can run without holding a transaction. A claim older than
+    IMPORT_JOB_STALE_MINUTES (its worker died) can be taken over.
+
+    Returns: the chunk, or None if it is done or claimed by another worker.
+    """
+    now = timezone.now()
+    cutoff = now - timedelta(minutes=IMPORT_JOB_STALE_MINUTES)
+    claimed = (
+        ImportChunk.objects.filter(id=chunk_id)
+        .filter(Q(status="imported") | Q(status="claimed", claimed_at__lt=cutoff))
+        .update(status="claimed", claimed_at=now)
+    )
+    if not claimed:
+        return None
+    return ImportChunk.objects.select_related("job").get(id=chunk_id)
+
+
+def release_chunk(chunk_id: int):
+    """Give a claimed chunk back, e.g. before retrying its follow-up."""
+    ImportChunk.objects.filter(id=chunk_id, status="claimed").update(
+        status="imported", claimed_at=None
+    )
+
+
+def complete_chunk(chunk_id: int, error: str = ""):
+    """Mark an imported chunk done, and its job finished after the last one."""
+    with transaction.atomic():
+        chunk = ImportChunk.objects.only("job_id").get(id=chunk_id)
+        ImportChunk.objects.filter(
+            id=chunk_id, status__in=["imported", "claimed"]
+        ).update(status="done", error=error)
+        ImportJob.objects.filter(id=chunk.job_id).update(
+            updated_at=timezone.now(), resumes=0
+        )
+        _finish_if_done(chunk.job_id)
+
+
+def resume_stale_import_jobs(stale_minutes=IMPORT_JOB_STALE_MINUTES):
+    """
+    Dispatch again the jobs that made no progress for stale_minutes, e.g.
+    whose worker was killed mid-chunk. A job resumed IMPORT_JOB_MAX_RESUMES
+    times in a row without any progress is failed instead.
+
+    Returns the number of jobs resumed.
+    """
+    cutoff = timezone.now() - timedelta(minutes=stale_minutes)
+    stale = list(
+        ImportJob.objects.filter(
+            status__in=["queued", "running"], updated_at__lt=cutoff
+        ).values_list("id", "resumes")
+    )
+    resumed = 0
+    for job_id, resumes in stale:
+        if resumes >= IMPORT_JOB_MAX_RESUMES:
+            _fail_job(job_id, "A importação parou de avançar e foi interrompida.")
+            continue
+
+        # Bump it, the next sweep leaves it alone while it resumes
+        ImportJob.objects.filter(id=job_id).update(
+            updated_at=timezone.now(), resumes=F("resumes") + 1
+        )
+        run_import_job.delay(str(job_id))
+        resumed += 1
+
+    if resumed:
+        logger.info(f"Resumed {resumed} stale import job(s)")
+    return resumed
+
+
+def get_import_progress(job_id: str):
+    """
+    Returns: {"kind", "status", "rows", "processed", "succeeded", "failed",
+    "errors", "error", ...} plus the fields of the job's handler,
+    or None for an unknown job.
+    """
+    try:
+        job = ImportJob.objects.filter(id=job_id).first()
+    except ValidationError:
+        return None
+    if job is None:
+        return None
+
+    totals = job.chunks.aggregate(
+        processed=Sum(
+            "row_count", filter=Q(status__in=["imported", "claimed", "done"])
+        ),
+        succeeded=Sum("succeeded"),
+        failed=Sum("failed"),
+    )
+    errors = []
+    for chunk_errors in job.chunks.filter(failed__gt=0).values_list(
+        "errors", flat=True
+    ):
+        errors.extend(chunk_errors[: IMPORT_ERRORS_SHOWN - len(errors)])
+        if len(errors) >= IMPORT_ERRORS_SHOWN:
+            break
+
+    return {
+        "kind": job.kind,
+        "status": job.status,
+        "rows": job.total_rows,
+        **{field: value or 0 for field, value in totals.items()},
+        "errors": errors,
+        "error": job.error or None,
+        **get_import_handler(job.kind).progress(job),
+    }
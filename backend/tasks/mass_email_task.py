@@ -0,0 +1,217 @@
+import threading
+import time
+from datetime import datetime, timedelta
+from os import getenv
+
+from dotenv import load_dotenv
+from kombu.utils.limits import TokenBucket
+from python_http_client.exceptions import TooManyRequestsError
+from sendgrid.helpers.mail import (
+    Attachment,
+    Disposition,
+    FileContent,
+    FileName,
+    FileType,
+    From,
+    Mail,
+    Personalization,
+    Substitution,
+    To,
+)
+
+from orders.attachments import load_attachment_content
+
+from .email_tasks import get_sendgrid_client
+
+load_dotenv()
+
+# SendGrid v3 accepts at most 1000 personalizations per request
+SENDGRID_MAX_PERSONALIZATIONS = 1000
+# Mail send requests per second, per worker process
+SENDGRID_RATE_LIMIT = float(getenv("SENDGRID_RATE_LIMIT", "5"))
+
+_rate_limiter = None
+_rate_limiter_lock = threading.Lock()
+
+
+def _wait_for_send_slot():
+    """Block until the process-wide token bucket lets one more request out."""
+    global _rate_limiter
+
+    while True:
+        # Only take the token under the lock; sleeping here would serialize senders
+        with _rate_limiter_lock:
+            if _rate_limiter is None:
+                _rate_limiter = TokenBucket(SENDGRID_RATE_LIMIT, capacity=1)
+            if _rate_limiter.can_consume(1):
+                return
+            wait = _rate_limiter.expected_time(1)
+        time.sleep(wait)
+
+
+# ------------------------
+# Message building
+# ------------------------
+COURTESY_SUBJECT = "Sua cortesia para o evento -event_name-"
+
+COURTESY_HTML = """
+        <!DOCTYPE html>
+        <html>
+        <head>
+          <meta charset="utf-8">
+          <title>Sua cortesia para o evento -event_name-</title>
+          <style>
+            body { font-family: Arial, sans-serif; line-height: 1.6; color: #333; margin: 0; padding: 0; }
+            .container { max-width: 600px; margin: 0 auto; padding: 20px; }
+            .header { background: #0F4C75; color: white; padding: 20px; text-align: center; }
+            .content { padding: 20px; background: #f9f9f9; text-align: center; }
+            .message-box { text-align: left; margin: 20px 0; }
+            .cta-button {
+              background-color: #3282B8;
+              color: white;
+              padding: 15px 25px;
+              text-decoration: none;
+              border-radius: 5px;
+              font-size: 16px;
+              display: inline-block;
+              margin: 20px 0;
+            }
+            .important-notice {
+              background: #BBE1FA;
+              padding: 15px;
+              border-radius: 5px;
+              margin: 20px 0;
+              text-align: left;
+            }
+            .footer { text-align: center; color: #666; font-size: 12px; margin-top: 20px; }
+          </style>
+        </head>
+        <body>
+          <div class="container">
+            <div class="header">
+              <h1>🎁 Você Recebeu uma Cortesia!</h1>
+              <h2>CDPI Pass</h2>
+            </div>
+            <div class="content">
+              <div class="message-box">
+                <p style="font-size: 18px;">Olá, <strong>-name-</strong>!</p>
+                <p>Você recebeu uma cortesia para o <strong>-event_name-</strong> na data <strong>-event_date-</strong>!</p>
+                <p style="font-style: italic; color: #333;">
+                  Um evento que amplia horizontes e conecta quem faz a diferença na indústria. Oportunidade ímpar para você dominar o Ciclo de Vida do Medicamento e acelerar a sua trajetória profissional!
+                </p>
+                <p>Para resgatar seu ingresso, clique no botão abaixo:</p>
+              </div>
+              <a href="-redeem_url-" class="cta-button">Resgatar Ingresso Agora</a>
+              <div class="important-notice">
+              <p>Ou se preferir, você pode resgatar a cortesia por meio do nosso site com o código:    <strong>-code-</strong></p>
+                <h4>⚠️ Instruções Importantes:</h4>
+                <p>
+                  É imprescindível fazer o resgate da sua cortesia até o prazo de <strong>48 horas</strong> após o recebimento dessa confirmação de inscrição para garantir a sua vaga e participar do evento.
+                </p>
+              </div>
+            </div>
+            <div class="footer">
+              <p>Atenciosamente,<br>Equipe CDPI Pass</p>
+              <p>relacionamento@cdpipharma.com.br | +55 (62) 99860-6833</p>
+            </div>
+          </div>
+        </body>
+        </html>
+          """
+
+COURTESY_TEXT = """
+        Olá -name-!
+
+        Você recebeu uma cortesia para o -event_name- na data -event_date-!
+
+        Para resgatar seu ingresso, acesse: -redeem_url-
+
+        ⚠️ Resgate até -redeem_by- para garantir sua vaga.
+
+        ⚠️ É imprescindível fazer o resgate da sua cortesia até o prazo de <strong>48 horas</strong> após o recebimento dessa confirmação de inscrição para garantir a sua vaga e participar do evento.
+
+        Atenciosamente,
+        Equipe CDPI Pass
+        """
+
+
+def _substitutions(recipient: dict) -> dict:
+    base_url = getenv("BASE_URL", "https://cdpipharma.com.br")
+    event_dt = datetime.fromisoformat(recipient["event_date"])
+    return {
+        "-name-": recipient.get("name") or "",
+        "-code-": recipient["code"],
+        "-event_name-": recipient["event_name"],
+        "-event_date-": event_dt.strftime("%A, %d de %B de %Y"),
+        "-redeem_by-": (event_dt - timedelta(days=6)).strftime("%d/%m/%Y"),
+        "-redeem_url-": f"{base_url}/cortesia?code={recipient['code']}",
+    }
+
+
+def _attachment_content(file: dict) -> str:
+    # Tasks queued before the blob storage still carry the content inline
+    if "blob" not in file:
+        return file["content"]
+    return load_attachment_content(file["blob"])
+
+
+def build_courtesy_mail(recipients: list[dict], attachments=None) -> Mail:
+    """
+    Build one SendGrid request for up to 1000 courtesy recipients.
+    Every recipient gets its own personalization, with substitutions for
+    its name, courtesy code and event.
+
+    recipients: [{"email", "name", "code", "event_name", "event_date"}]
+    attachments: [{"blob", "filename", "type"}], see orders.attachments
+    """
+    if len(recipients) > SENDGRID_MAX_PERSONALIZATIONS:
+        raise ValueError(
+            f"At most {SENDGRID_MAX_PERSONALIZATIONS} recipients per request"
+        )
+
+    message = Mail(
+        from_email=From(getenv("DEFAULT_FROM_EMAIL"), "CDPI Pass"),
+        subject=COURTESY_SUBJECT,
+        html_content=COURTESY_HTML,
+        plain_text_content=COURTESY_TEXT,
+    )
+
+    for recipient in recipients:
+        personalization = Personalization()
+        personalization.add_to(To(recipient["email"], recipient.get("name") or None))
+        for key, value in _substitutions(recipient).items():
+            personalization.add_substitution(Substitution(key, value))
+        message.add_personalization(personalization)
+
+    for file in attachments or []:
+        message.add_attachment(
+            Attachment(
+                FileContent(_attachment_content(file)),
+                FileName(file["filename"]),
+                FileType(file["type"]),
+                Disposition("attachment"),
+            )
+        )
+
+    return message
+
+
+# ------------------------
+# Sending
+# ------------------------
+def retry_after(error):
+    """Seconds until SendGrid lifts a rate limit, None for the default delay."""
+    if not isinstance(error, TooManyRequestsError):
+        return None
+    reset = (error.headers or {}).get("X-RateLimit-Reset")
+    return max(int(reset) - int(time.time()), 1) if reset else None
+
+
+def send_courtesy_mail(recipients: list[dict], attachments=None):
+    """
+    Send one SendGrid request for up to 1000 courtesy recipients, waiting on
+    the process-wide token bucket first.
+    """
+    message = build_courtesy_mail(recipients, attachments)
+    _wait_for_send_slot()
+    return get_sendgrid_client().send(message)
@@ -1,31 +1,45 @@
 import io
+import logging
 
 import qrcode
-from celery import shared_task
 
+logger = logging.getLogger(__name__)
 
-@shared_task
-def generate_ticket_qr_code(ticket):
+
+def render_qr_png(data: str) -> bytes:
+    """
+    Render the QR code PNG for the given payload.
+    """
+    qr = qrcode.QRCode(
+        version=1,
+        error_correction=qrcode.constants.ERROR_CORRECT_M,
+        box_size=10,
+        border=2,
+    )
+    qr.add_data(data)
+    qr.make(fit=True)
+
+    img = qr.make_image(fill_color="#0F4C75", back_color="white")
+    buffer = io.BytesIO()
+    img.save(buffer, format="PNG")
+    buffer.seek(0)
+
+    return buffer.getvalue()
+
+
+def generate_ticket_qr_codes(tickets) -> dict:
     """
-    Generate QR codes for a single ticket, upload to S3, and send emails.
+    Render QR codes for a batch of tickets. Returns {ticket.id: png_bytes},
+    failed tickets are left out.
+    Rendering stays inline: Celery prefork workers are daemonic and cannot
+    start a process pool, and a render takes a few milliseconds of mostly
+    GIL-bound work, so the S3 uploads are what runs concurrently.
     """
+    results = {}
+    for ticket in tickets:
+        try:
+            results[ticket.id] = render_qr_png(ticket.qr_code_data)
+        except Exception:
+            logger.exception(f"🚨 Error rendering QR for ticket #{ticket.id}")
 
-    try:
-        qr = qrcode.QRCode(
-            version=1,
-            error_correction=qrcode.constants.ERROR_CORRECT_M,
-            box_size=10,
-            border=2,
-        )
-        qr.add_data(ticket.qr_code_data)
-        qr.make(fit=True)
-
-        img = qr.make_image(fill_color="#0F4C75", back_color="white")
-        buffer = io.BytesIO()
-        img.save(buffer, format="PNG")
-        buffer.seek(0)
-
-        return buffer.getvalue()
-
-    except Exception as e:
-        print(f"🚨 Error processing ticket #{ticket.id}: {e}")
+    return results
@@ -1,23 +1,55 @@
+import logging
+import threading
+from concurrent.futures import ThreadPoolExecutor
 from os import getenv
 
 import boto3
+from botocore.config import Config
 from botocore.exceptions import BotoCoreError, NoCredentialsError
 from dotenv import load_dotenv
 
 load_dotenv()
 
+logger = logging.getLogger(__name__)
+
+# Max concurrent uploads per batch, also sizes the client connection pool
+S3_UPLOAD_CONCURRENCY = int(getenv("S3_UPLOAD_CONCURRENCY", "10"))
+
+_s3_client = None
+_s3_client_lock = threading.Lock()
+
+
+def get_s3_client():
+    """
+    Return the process-wide S3 client.
+    boto3 clients are thread-safe, so a single pooled client is shared by all
+    uploads instead of building a new one (and new connections) per file.
+    """
+    global _s3_client
+
+    if _s3_client is None:
+        with _s3_client_lock:
+            if _s3_client is None:
+                _s3_client = boto3.client(
+                    "s3",
+                    aws_access_key_id=getenv("AWS_ACCESS_KEY_ID"),
+                    aws_secret_access_key=getenv("AWS_SECRET_ACCESS_KEY"),
+                    region_name=getenv("AWS_REGION", "sa-east-1"),
+                    config=Config(
+                        max_pool_connections=S3_UPLOAD_CONCURRENCY,
+                        retries={"max_attempts": 3, "mode": "standard"},
+                    ),
+                )
+
+    return _s3_client
+
 
 def upload_qr_to_s3(buffer, filename):
     """
     Upload a QR code PNG buffer to S3 and return the public URL.
     """
     try:
-        s3 = boto3.client(
-            "s3",
-            aws_access_key_id=getenv("AWS_ACCESS_KEY_ID"),
-            aws_secret_access_key=getenv("AWS_SECRET_ACCESS_KEY"),
-            region_name=getenv("AWS_REGION", "sa-east-1"),
-        )
+        s3 = get_s3_client()
         bucket_name = getenv("AWS_S3_BUCKET_NAME")
 
         file_name_with_ext = f"{filename}.png"
@@ -35,6 +67,21 @@ def upload_qr_to_s3(buffer, filename):
         # Return the URL
         return f"https://{bucket_name}.s3.{getenv('AWS_REGION', 'sa-east-1')}.amazonaws.com/{key}"
 
-    except (BotoCoreError, NoCredentialsError, Exception) as e:
-        print(f"🚨 Error uploading QR to S3: {e}")
+    except (BotoCoreError, NoCredentialsError, Exception):
+        logger.exception("🚨 Error uploading QR to S3")
         return None
+
+
+def upload_qr_codes_to_s3(files: dict) -> dict:
+    """
+    Upload a batch of QR code PNGs concurrently over the shared client.
+    Takes {filename: png_bytes} and returns {filename: url or None}.
+    At most S3_UPLOAD_CONCURRENCY uploads are in flight at once.
+    """
+    if not files:
+        return {}
+
+    workers = min(S3_UPLOAD_CONCURRENCY, len(files))
+    with ThreadPoolExecutor(max_workers=workers) as pool:
+        urls = pool.map(lambda item: upload_qr_to_s3(item[1], item[0]), files.items())
+        return dict(zip(files.keys(), urls))
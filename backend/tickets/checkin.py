@@ -0,0 +1,149 @@
+from uuid import UUID
+
+from django.db import connection, transaction
+from django.db.models import Case, DateTimeField, Value, When
+from django.utils import timezone
+
+from .models import RemovedTicket, Ticket
+
+CHECK_IN_SQL = """
+    UPDATE tickets
+    SET is_used = TRUE, used_at = %s, updated_at = %s
+    WHERE qr_token = %s AND is_used = FALSE
+        AND EXISTS (
+            SELECT 1 FROM orders
+            WHERE orders.id = tickets.order_id AND orders.status = 'paid'
+        )
+    RETURNING id, name, event_id,
+        (SELECT title FROM events WHERE events.id = tickets.event_id)
+"""
+
+
+def check_in_ticket(qr_code_data: str):
+    """
+    Mark the ticket of a scanned QR payload as used.
+
+    Runs as a single UPDATE ... RETURNING on the unique qr_token index: the
+    lookup, the is_used and paid order guards and the write happen in one
+    statement, so two scanners can never both admit the same ticket and no row
+    is loaded first.
+
+    Returns: (ticket_id, name, event_id, event_title), or None when the ticket does not
+    exist, was already used or its order is not paid.
+    """
+    token = Ticket.token_for(qr_code_data)
+    now = timezone.now()
+    with connection.cursor() as cursor:
+        cursor.execute(CHECK_IN_SQL, [now, now, token])
+        row = cursor.fetchone()
+
+    if row is None:
+        return None
+    # Raw rows hold the backend's UUID representation (hex text on SQLite)
+    ticket_id, name, event_id, event_title = row
+    return UUID(str(ticket_id)), name, event_id, event_title
+
+
+def ticket_order_status(qr_code_data: str):
+    """Status of the order of a QR payload's ticket, None when there is no ticket."""
+    return (
+        Ticket.objects.filter(qr_token=Ticket.token_for(qr_code_data))
+        .values_list("order__status", flat=True)
+        .first()
+    )
+
+
+def bulk_check_in(event_id, scans):
+    """
+    Apply a batch of offline check-ins for an event.
+
+    `scans` is an iterable of (ticket_id, scanned_at). When the same ticket was
+    scanned at several gates the earliest scan wins, and tickets already used
+    (online or in an earlier batch) are reported as duplicates. The batch is
+    applied with a single CASE update over the locked rows.
+
+    Returns: dict with the accepted ticket ids, the duplicates (with the
+    recorded used_at) and the ids that are not valid tickets of the event
+    (unknown, or of an order that is not paid).
+    """
+    earliest = {}
+    for ticket_id, scanned_at in scans:
+        if ticket_id not in earliest or scanned_at < earliest[ticket_id]:
+            earliest[ticket_id] = scanned_at
+
+    result = {"accepted": [], "duplicates": [], "unknown": []}
+    if not earliest:
+        return result
+
+    with transaction.atomic():
+        # Lock in a stable order so concurrent batches cannot deadlock
+        existing = {
+            ticket.id: ticket
+            for ticket in Ticket.objects.select_for_update(of=("self",))
+            .filter(event_id=event_id, id__in=earliest, order__status="paid")
+            .only("id", "is_used", "used_at")
+            .order_by("id")
+        }
+
+        accepted = [
+            ticket_id
+            for ticket_id in earliest
+            if ticket_id in existing and not existing[ticket_id].is_used
+        ]
+        if accepted:
+            Ticket.objects.filter(
+                id__in=accepted, is_used=False, order__status="paid"
+            ).update(
+                is_used=True,
+                used_at=Case(
+                    *[
+                        When(id=ticket_id, then=Value(earliest[ticket_id]))
+                        for ticket_id in accepted
+                    ],
+                    output_field=DateTimeField(),
+                ),
+                updated_at=timezone.now(),
+            )
+
+    for ticket_id in earliest:
+        ticket = existing.get(ticket_id)
+        if ticket is None:
+            result["unknown"].append(str(ticket_id))
+        elif ticket.is_used:
+            result["duplicates"].append(
+                {"ticketId": str(ticket_id), "usedAt": ticket.used_at}
+            )
+        else:
+            result["accepted"].append(str(ticket_id))
+
+    return result
+
+
+def event_manifest(event_id):
+    """
+    Valid tickets of an event (those of paid orders) as (ticket_id, is_used),
+    sorted by id.
+    """
+    tickets = Ticket.objects.filter(event_id=event_id, order__status="paid")
+    return list(tickets.order_by("id").values_list("id", "is_used"))
+
+
+def event_manifest_changes(event_id, since):
+    """
+    Tickets of an event checked in, made valid or removed since the given time,
+    as (ticket_id, is_used, removed) sorted by id. Tickets of orders that are
+    not paid and deleted tickets (see RemovedTicket) are removed.
+    """
+    changed = [
+        (ticket_id, is_used, order_status != "paid")
+        for ticket_id, is_used, order_status in Ticket.objects.filter(
+            event_id=event_id, updated_at__gte=since
+        ).values_list("id", "is_used", "order__status")
+    ]
+    removed = [
+        (ticket_id, False, True)
+        for ticket_id in RemovedTicket.objects.filter(
+            event_id=event_id, removed_at__gte=since
+        ).values_list("ticket_id", flat=True)
+    ]
+    return sorted(changed + removed)
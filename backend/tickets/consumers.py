@@ -0,0 +1,104 @@
+import asyncio
+import logging
+from os import getenv
+
+from channels.db import database_sync_to_async
+from channels.generic.websocket import AsyncJsonWebsocketConsumer
+from dotenv import load_dotenv
+
+from events.models import Event
+
+from .models import Ticket
+from .realtime import check_in_group
+
+load_dotenv()
+
+logger = logging.getLogger(__name__)
+
+# Scans received within this window are sent to the client as a single frame
+WS_COALESCE_MS = int(getenv("WS_COALESCE_MS", "500"))
+# Most recent scans included in each frame
+WS_RECENT_SCANS = int(getenv("WS_RECENT_SCANS", "20"))
+
+
+class EventCheckInConsumer(AsyncJsonWebsocketConsumer):
+    """
+    ws/events/<event_id>/check-ins/ (staff only)
+
+    Sends a snapshot of the event attendance on connect, then the check-ins
+    recorded by the gates. Scans are buffered and flushed at most once per
+    WS_COALESCE_MS, so a burst at opening time becomes a few frames:
+    {"type": "checkins", "checkedIn": <total>, "new": <n>, "recent": [...]}
+    """
+
+    async def connect(self):
+        user = self.scope.get("user")
+        if not user or not user.is_authenticated or not user.is_staff:
+            await self.close(code=4403)
+            return
+
+        self.event_id = self.scope["url_route"]["kwargs"]["event_id"]
+        snapshot = await self._snapshot()
+        if snapshot is None:
+            await self.close(code=4404)
+            return
+
+        self.group_name = check_in_group(self.event_id)
+        self.checked_in = snapshot["checkedIn"]
+        self.pending = []
+        self.pending_count = 0
+
+        await self.channel_layer.group_add(self.group_name, self.channel_name)
+        await self.accept()
+        await self.send_json(snapshot)
+
+        self.flusher = asyncio.create_task(self._flush_periodically())
+
+    async def disconnect(self, code):
+        flusher = getattr(self, "flusher", None)
+        if flusher:
+            flusher.cancel()
+        if hasattr(self, "group_name"):
+            await self.channel_layer.group_discard(self.group_name, self.channel_name)
+
+    async def checkin_scans(self, message):
+        """Channel layer handler, only buffers, the flusher sends."""
+        scans = message["scans"]
+        self.pending_count += len(scans)
+        self.pending = (self.pending + scans)[-WS_RECENT_SCANS:]
+
+    async def _flush_periodically(self):
+        try:
+            while True:
+                await asyncio.sleep(WS_COALESCE_MS / 1000)
+                await self.flush()
+        except asyncio.CancelledError:
+            pass
+
+    async def flush(self):
+        if not self.pending_count:
+            return
+
+        self.checked_in += self.pending_count
+        frame = {
+            "type": "checkins",
+            "eventId": self.event_id,
+            "checkedIn": self.checked_in,
+            "new": self.pending_count,
+            "recent": self.pending,
+        }
+        self.pending, self.pending_count = [], 0
+        await self.send_json(frame)
+
+    @database_sync_to_async
+    def _snapshot(self):
+        event = Event.objects.filter(id=self.event_id).only("id", "title").first()
+        if event is None:
+            return None
+
+        return {
+            "type": "snapshot",
+            "eventId": event.id,
+            "title": event.title,
+            "checkedIn": Ticket.objects.filter(event_id=event.id, is_used=True).count(),
+        }
@@ -0,0 +1,37 @@
+from hashlib import sha256
+
+from django.db import migrations, models
+
+BATCH_SIZE = 2000
+
+
+def backfill_qr_tokens(apps, schema_editor):
+    Ticket = apps.get_model("tickets", "Ticket")
+
+    while True:
+        batch = list(
+            Ticket.objects.filter(qr_token__isnull=True).only("id", "qr_code_data")[
+                :BATCH_SIZE
+            ]
+        )
+        if not batch:
+            break
+        for ticket in batch:
+            ticket.qr_token = sha256(ticket.qr_code_data.encode()).hexdigest()
+        Ticket.objects.bulk_update(batch, ["qr_token"])
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("tickets", "0001_initial"),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name="ticket",
+            name="qr_token",
+            field=models.CharField(editable=False, max_length=64, null=True),
+        ),
+        migrations.RunPython(backfill_qr_tokens, migrations.RunPython.noop),
+    ]
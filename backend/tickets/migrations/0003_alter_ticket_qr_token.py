@@ -0,0 +1,17 @@
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    # Separate from the backfill so the constraint is added in its own transaction
+    dependencies = [
+        ("tickets", "0002_ticket_qr_token"),
+    ]
+
+    operations = [
+        migrations.AlterField(
+            model_name="ticket",
+            name="qr_token",
+            field=models.CharField(editable=False, max_length=64, unique=True),
+        ),
+    ]
@@ -0,0 +1,21 @@
+# Generated by Django 5.2.8 on 2026-10-16 23:54
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("events", "0003_event_events_active_date_idx"),
+        ("orders", "0002_courtesylink_courtesy_created_by_idx_and_more"),
+        ("tickets", "0003_alter_ticket_qr_token"),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name="ticket",
+            index=models.Index(
+                fields=["order", "-created_at", "-id"], name="tickets_order_created_idx"
+            ),
+        ),
+    ]
@@ -0,0 +1,33 @@
+# Generated by Django 5.2.8 on 2026-10-16 23:55
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("events", "0003_event_events_active_date_idx"),
+        ("orders", "0003_order_orders_status_payment_idx_and_more"),
+        ("tickets", "0004_ticket_tickets_order_created_idx"),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name="courtesyattendee",
+            index=models.Index(
+                fields=["order", "-created_at"], name="attendees_order_created_idx"
+            ),
+        ),
+        migrations.AddIndex(
+            model_name="ticket",
+            index=models.Index(fields=["event", "cpf"], name="tickets_event_cpf_idx"),
+        ),
+        migrations.AddIndex(
+            model_name="ticket",
+            index=models.Index(
+                condition=models.Q(("is_used", True)),
+                fields=["event"],
+                name="tickets_event_used_idx",
+            ),
+        ),
+    ]
@@ -0,0 +1,24 @@
+from django.db import migrations, models
+from django.db.models import F
+
+
+def mark_paid_tickets_as_sent(apps, schema_editor):
+    # Tickets of orders paid before this change were emailed already
+    Ticket = apps.get_model("tickets", "Ticket")
+    Ticket.objects.filter(order__status="paid").update(email_sent_at=F("created_at"))
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("tickets", "0005_courtesyattendee_attendees_order_created_idx_and_more"),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name="ticket",
+            name="email_sent_at",
+            field=models.DateTimeField(blank=True, null=True),
+        ),
+        migrations.RunPython(mark_paid_tickets_as_sent, migrations.RunPython.noop),
+    ]
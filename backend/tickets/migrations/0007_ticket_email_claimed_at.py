@@ -0,0 +1,18 @@
+# Generated by Django 5.2.8 on 2026-10-17 00:33
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("tickets", "0006_ticket_email_sent_at"),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name="ticket",
+            name="email_claimed_at",
+            field=models.DateTimeField(blank=True, null=True),
+        ),
+    ]
@@ -0,0 +1,43 @@
+# Generated by Django 5.2.8 on 2026-10-17 00:57
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("events", "0003_event_events_active_date_idx"),
+        ("orders", "0008_importjob_resumes"),
+        ("tickets", "0007_ticket_email_claimed_at"),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name="RemovedTicket",
+            fields=[
+                ("ticket_id", models.UUIDField(primary_key=True, serialize=False)),
+                ("event_id", models.IntegerField()),
+                ("removed_at", models.DateTimeField(auto_now=True)),
+            ],
+            options={
+                "db_table": "removed_tickets",
+            },
+        ),
+        migrations.AddField(
+            model_name="ticket",
+            name="updated_at",
+            field=models.DateTimeField(auto_now=True),
+        ),
+        migrations.AddIndex(
+            model_name="ticket",
+            index=models.Index(
+                fields=["event", "updated_at"], name="tickets_event_updated_idx"
+            ),
+        ),
+        migrations.AddIndex(
+            model_name="removedticket",
+            index=models.Index(
+                fields=["event_id", "removed_at"], name="removed_event_removed_idx"
+            ),
+        ),
+    ]
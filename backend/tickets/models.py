@@ -1,3 +1,4 @@
+from hashlib import sha256
 from uuid import uuid4
 
 from django.db import models
@@ -28,10 +29,28 @@ class Ticket(models.Model):
         ],
     )
     qr_code_data = models.TextField()
+    """
+    SHA-256 of qr_code_data, the fixed-length indexed key used at check-in.
+    """
+    qr_token = models.CharField(max_length=64, unique=True, editable=False)
     qr_code_s3_url = models.CharField(max_length=500, blank=True)
     is_used = models.BooleanField(default=False)
     used_at = models.DateTimeField(null=True, blank=True)
+    email_sent_at = models.DateTimeField(null=True, blank=True)
+    """
+    When the ticket email went out, retries skip tickets that already have it.
+    """
+    email_claimed_at = models.DateTimeField(null=True, blank=True)
+    """
+    Set while a worker sends the ticket email, a stale claim (dead worker) is
+    taken over by the next run.
+    """
     created_at = models.DateTimeField(auto_now_add=True)
+    updated_at = models.DateTimeField(auto_now=True)
+    """
+    Bumped by every write that changes whether the ticket is admitted (check-in,
+    order paid), the cursor of gate manifest deltas.
+    """
     courtesy_link_id = models.ForeignKey(
         "orders.CourtesyLink",
         on_delete=models.SET_NULL,
@@ -42,10 +61,63 @@ class Ticket(models.Model):
 
     class Meta:
         db_table = "tickets"
+        indexes = [
+            # Tickets of the user's orders, keyset paginated
+            models.Index(
+                fields=["order", "-created_at", "-id"],
+                name="tickets_order_created_idx",
+            ),
+            # Courtesy duplicate check (one CPF per event)
+            models.Index(fields=["event", "cpf"], name="tickets_event_cpf_idx"),
+            # Check-in counts per event
+            models.Index(
+                fields=["event"],
+                condition=models.Q(is_used=True),
+                name="tickets_event_used_idx",
+            ),
+            # Gate manifest deltas
+            models.Index(
+                fields=["event", "updated_at"], name="tickets_event_updated_idx"
+            ),
+        ]
 
     def __str__(self):
         return f"Ticket {self.id} - {self.event.title}"
 
+    @staticmethod
+    def token_for(qr_code_data: str) -> str:
+        """Lookup token for a scanned QR payload."""
+        return sha256(qr_code_data.encode()).hexdigest()
+
+    def save(self, *args, **kwargs):
+        # bulk_create skips save(), callers set qr_token themselves there
+        self.qr_token = self.token_for(self.qr_code_data)
+        super().save(*args, **kwargs)
+
+
+class RemovedTicket(models.Model):
+    """
+    Tombstone of a deleted ticket (e.g. of a cancelled order), so gate
+    manifest deltas can tell scanners to stop admitting it.
+    """
+
+    ticket_id = models.UUIDField(primary_key=True)
+    # Not a foreign key, tombstones are written while their event may be deleted
+    event_id = models.IntegerField()
+    removed_at = models.DateTimeField(auto_now=True)
+
+    class Meta:
+        db_table = "removed_tickets"
+        indexes = [
+            # Gate manifest deltas
+            models.Index(
+                fields=["event_id", "removed_at"], name="removed_event_removed_idx"
+            ),
+        ]
+
+    def __str__(self):
+        return f"Removed ticket {self.ticket_id}"
+
 
 # Preference for not having this table later in the database
 class CourtesyAttendee(models.Model):
@@ -82,6 +154,12 @@ class CourtesyAttendee(models.Model):
         verbose_name = "Courtesy Attendee"
         verbose_name_plural = "Courtesy Attendees"
         ordering = ["-created_at"]
+        indexes = [
+            # order.courtesy_attendees.first() during fulfillment
+            models.Index(
+                fields=["order", "-created_at"], name="attendees_order_created_idx"
+            ),
+        ]
 
     def __str__(self):
         return f"{self.name} ({self.email})"
@@ -0,0 +1,33 @@
+import logging
+
+from asgiref.sync import async_to_sync
+from channels.layers import get_channel_layer
+
+logger = logging.getLogger(__name__)
+
+
+def check_in_group(event_id) -> str:
+    """Channel layer group of the dashboards following an event."""
+    return f"event-{event_id}-checkins"
+
+
+def publish_check_ins(event_id, scans):
+    """
+    Push check-ins to the dashboards of an event.
+    `scans` is a list of {"ticketId", "name", "usedAt"} dicts.
+
+    Best effort: a channel layer failure never fails the check-in itself.
+    """
+    if not scans:
+        return
+
+    channel_layer = get_channel_layer()
+    if channel_layer is None:
+        return
+
+    try:
+        async_to_sync(channel_layer.group_send)(
+            check_in_group(event_id), {"type": "checkin.scans", "scans": scans}
+        )
+    except Exception as e:
+        logger.warning(f"Could not publish check-ins of event {event_id}: {e}")
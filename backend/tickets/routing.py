@@ -0,0 +1,8 @@
+from django.urls import path
+
+from .consumers import EventCheckInConsumer
+
+websocket_urlpatterns = [
+    # Live check-ins ws/events/<event_id>/check-ins/?token=<access token>
+    path("ws/events/<int:event_id>/check-ins/", EventCheckInConsumer.as_asgi()),
+]
@@ -1,6 +1,8 @@
 from rest_framework import serializers
 
+from events.models import Event
 from events.serializers import EventSerializer
+from orders.models import Order
 from orders.serializers import OrderSerializer
 
 from .models import CourtesyAttendee, Ticket
@@ -33,6 +35,42 @@ class TicketSerializer(serializers.ModelSerializer):
         ]
 
 
+class WalletOrderSerializer(serializers.ModelSerializer):
+    class Meta:
+        model = Order
+        fields = ["id", "status", "asaas_payment_id"]
+
+
+class WalletEventSerializer(serializers.ModelSerializer):
+    class Meta:
+        model = Event
+        fields = ["id", "title", "date", "location", "price", "image_url"]
+
+
+class WalletTicketSerializer(serializers.ModelSerializer):
+    """
+    Slim ticket for the user's wallet: only what the app renders, the event
+    is referenced by id and sent once per page (see TicketWalletView).
+    """
+
+    order = WalletOrderSerializer(read_only=True)
+
+    class Meta:
+        model = Ticket
+        fields = [
+            "id",
+            "name",
+            "event",
+            "order",
+            "type_of_ticket",
+            "qr_code_data",
+            "qr_code_s3_url",
+            "is_used",
+            "used_at",
+            "created_at",
+        ]
+
+
 class CourtesyAttendeeSerializer(serializers.ModelSerializer):
     class Meta:
         model = CourtesyAttendee
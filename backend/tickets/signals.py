@@ -0,0 +1,12 @@
+from django.db.models.signals import post_delete
+from django.dispatch import receiver
+
+from .models import RemovedTicket, Ticket
+
+
+@receiver(post_delete, sender=Ticket)
+def record_removed_ticket(sender, instance, **kwargs):
+    # Tombstone read by gate manifest deltas (tickets.checkin.event_manifest)
+    RemovedTicket.objects.update_or_create(
+        ticket_id=instance.id, defaults={"event_id": instance.event_id}
+    )
@@ -68,11 +68,12 @@ def test_event(db):
 
 @pytest.fixture
 def test_order(db, regular_user):
-    """Create a mock order (simplified)"""
+    """Create a mock paid order (simplified)"""
     return Order.objects.create(
         id="123456",
         user=regular_user,
         amount=100.00,
+        status="paid",
     )
 
 
@@ -158,4 +159,449 @@ class TestVerifyTicketView:
         # Reload and check DB changes
         test_ticket.refresh_from_db()
         assert test_ticket.is_used is True
-        assert test_ticket.used_at is not None
\ No newline at end of file
+        assert test_ticket.used_at is not None
+
+@pytest.mark.django_db
+class TestProcessTicketsQr:
+    """Tests for the batch QR stage of order fulfillment"""
+
+    def test_batch_uploads_and_bulk_updates(self, test_event, test_order):
+        from unittest.mock import patch
+
+        from helper_functions import process_tickets_qr
+
+        tickets = [
+            Ticket.objects.create(
+                name=f"Guest {i}",
+                cpf="123.456.789-00",
+                order=test_order,
+                event=test_event,
+                type_of_ticket="first batch",
+                qr_code_data=f"QR-BATCH-{i}",
+            )
+            for i in range(10)
+        ]
+
+        def fake_upload(files):
+            return {name: f"https://bucket/qr-codes/{name}.png" for name in files}
+
+        with patch(
+            "tasks.s3_task.upload_qr_codes_to_s3", side_effect=fake_upload
+        ) as mock_upload:
+            failed = process_tickets_qr(tickets)
+
+        assert failed == []
+        mock_upload.assert_called_once()
+        uploaded = mock_upload.call_args.args[0]
+        assert len(uploaded) == 10
+        assert all(png.startswith(b"\x89PNG") for png in uploaded.values())
+        assert not Ticket.objects.filter(order=test_order, qr_code_s3_url="").exists()
+
+
+@pytest.mark.django_db
+class TestTicketCheckIn:
+    """Check-in is a single UPDATE ... RETURNING on the indexed token"""
+
+    def test_token_is_set_on_save(self, test_ticket):
+        from hashlib import sha256
+
+        assert test_ticket.qr_token == sha256(b"QR123ABC").hexdigest()
+        assert len(test_ticket.qr_token) == 64
+
+    def test_check_in_is_one_query(self, test_ticket, django_assert_num_queries):
+        from tickets.checkin import check_in_ticket
+
+        with django_assert_num_queries(1):
+            ticket_id, name, event_id, event_title = check_in_ticket(
+                test_ticket.qr_code_data
+            )
+
+        assert ticket_id == test_ticket.id
+        assert name == test_ticket.name
+        assert str(event_id) == str(test_ticket.event_id)
+        assert event_title == test_ticket.event.title
+
+    def test_second_check_in_returns_nothing(self, test_ticket):
+        from tickets.checkin import check_in_ticket
+
+        assert check_in_ticket(test_ticket.qr_code_data) is not None
+        assert check_in_ticket(test_ticket.qr_code_data) is None
+
+        test_ticket.refresh_from_db()
+        assert test_ticket.is_used is True
+        assert test_ticket.used_at is not None
+
+    def test_unpaid_ticket_is_not_checked_in(
+        self, api_client, staff_user, test_ticket, test_order
+    ):
+        from tickets.checkin import check_in_ticket
+
+        Order.objects.filter(id=test_order.id).update(status="pending")
+        assert check_in_ticket(test_ticket.qr_code_data) is None
+
+        api_client.force_authenticate(user=staff_user)
+        response = api_client.post(
+            reverse("verify-ticket"),
+            {"qr_code_data": test_ticket.qr_code_data},
+            format="json",
+        )
+        assert response.status_code == status.HTTP_400_BAD_REQUEST
+        assert response.data["error"] == "Ticket order is not paid"
+
+        test_ticket.refresh_from_db()
+        assert test_ticket.is_used is False
+
+
+class TestSignedQr:
+    """QR payloads are Ed25519 signed so scanners can validate them offline"""
+
+    def test_round_trip(self):
+        from uuid import uuid4
+
+        from helper_functions import sign_ticket_qr, verify_ticket_qr
+
+        ticket_id = uuid4()
+        payload = sign_ticket_qr(ticket_id, 42)
+
+        assert payload.startswith("CDPI1.")
+        assert verify_ticket_qr(payload) == (ticket_id, 42)
+
+    def test_tampered_payload_is_rejected(self):
+        from uuid import uuid4
+
+        from helper_functions import sign_ticket_qr, verify_ticket_qr
+
+        prefix, body, signature = sign_ticket_qr(uuid4(), 42).split(".")
+        other_body = sign_ticket_qr(uuid4(), 42).split(".")[1]
+
+        assert verify_ticket_qr(f"{prefix}.{other_body}.{signature}") is None
+        assert verify_ticket_qr("QR-legacy-code") is None
+        assert verify_ticket_qr("CDPI1.@@@.###") is None
+
+
+@pytest.mark.django_db
+class TestOfflineCheckIn:
+    """Manifest download and batch sync for offline scanners"""
+
+    @pytest.fixture
+    def paid_tickets(self, test_event, test_order):
+        Order.objects.filter(id=test_order.id).update(status="paid")
+        return [
+            Ticket.objects.create(
+                name=f"Guest {i}",
+                cpf="123.456.789-00",
+                order=test_order,
+                event=test_event,
+                type_of_ticket="first batch",
+                qr_code_data=f"QR-OFFLINE-{i}",
+            )
+            for i in range(3)
+        ]
+
+    def test_manifest(self, api_client, staff_user, test_event, paid_tickets):
+        from helper_functions import get_qr_public_key
+
+        paid_tickets[0].is_used = True
+        paid_tickets[0].save()
+
+        api_client.force_authenticate(user=staff_user)
+        url = reverse("event-manifest", args=[test_event.id])
+        response = api_client.get(url)
+
+        assert response.status_code == status.HTTP_200_OK
+        assert response.data["publicKey"] == get_qr_public_key()
+        assert response.data["tickets"] == sorted(t.id.hex for t in paid_tickets)
+        assert response.data["used"] == [paid_tickets[0].id.hex]
+
+    def test_manifest_requires_staff(self, api_client, regular_user, test_event):
+        api_client.force_authenticate(user=regular_user)
+        url = reverse("event-manifest", args=[test_event.id])
+        assert api_client.get(url).status_code == status.HTTP_403_FORBIDDEN
+
+    def test_batch_sync_resolves_conflicts(
+        self, api_client, staff_user, test_event, paid_tickets
+    ):
+        from uuid import uuid4
+
+        first, second, already_used = paid_tickets
+        already_used.is_used = True
+        already_used.used_at = timezone.now()
+        already_used.save()
+
+        early = timezone.now() - datetime.timedelta(minutes=10)
+        late = timezone.now() - datetime.timedelta(minutes=5)
+        unknown = uuid4()
+
+        api_client.force_authenticate(user=staff_user)
+        url = reverse("event-check-ins", args=[test_event.id])
+        payload = {
+            "checkIns": [
+                # Same ticket scanned at two gates, the earliest scan wins
+                {"ticketId": str(first.id), "scannedAt": late.isoformat()},
+                {"ticketId": str(first.id), "scannedAt": early.isoformat()},
+                {"ticketId": str(second.id)},
+                {"ticketId": str(already_used.id), "scannedAt": early.isoformat()},
+                {"ticketId": str(unknown)},
+                {"ticketId": "not-a-uuid"},
+            ]
+        }
+        response = api_client.post(url, payload, format="json")
+
+        assert response.status_code == status.HTTP_200_OK
+        assert sorted(response.data["accepted"]) == sorted(
+            [str(first.id), str(second.id)]
+        )
+        assert [d["ticketId"] for d in response.data["duplicates"]] == [
+            str(already_used.id)
+        ]
+        assert response.data["unknown"] == [str(unknown)]
+        assert response.data["invalid"] == [{"ticketId": "not-a-uuid"}]
+
+        first.refresh_from_db()
+        assert first.is_used is True
+        assert first.used_at == early
+
+    def test_batch_sync_is_idempotent(
+        self, api_client, staff_user, test_event, paid_tickets
+    ):
+        api_client.force_authenticate(user=staff_user)
+        url = reverse("event-check-ins", args=[test_event.id])
+        payload = {"checkIns": [{"ticketId": str(paid_tickets[0].id)}]}
+
+        assert len(api_client.post(url, payload, format="json").data["accepted"]) == 1
+        response = api_client.post(url, payload, format="json")
+        assert response.data["accepted"] == []
+        assert len(response.data["duplicates"]) == 1
+
+    def test_batch_sync_rejects_unpaid_tickets(
+        self, api_client, staff_user, test_event, test_order, paid_tickets
+    ):
+        Order.objects.filter(id=test_order.id).update(status="cancelled")
+
+        api_client.force_authenticate(user=staff_user)
+        url = reverse("event-check-ins", args=[test_event.id])
+        payload = {"checkIns": [{"ticketId": str(paid_tickets[0].id)}]}
+        response = api_client.post(url, payload, format="json")
+
+        assert response.data["accepted"] == []
+        assert response.data["unknown"] == [str(paid_tickets[0].id)]
+        paid_tickets[0].refresh_from_db()
+        assert paid_tickets[0].is_used is False
+
+
+@pytest.mark.django_db
+class TestBinaryManifest:
+    """Binary gate manifest: sorted UUIDs plus a used bitmap"""
+
+    @pytest.fixture
+    def paid_tickets(self, test_event, test_order):
+        Order.objects.filter(id=test_order.id).update(status="paid")
+        return [
+            Ticket.objects.create(
+                name=f"Guest {i}",
+                cpf="123.456.789-00",
+                order=test_order,
+                event=test_event,
+                type_of_ticket="first batch",
+                qr_code_data=f"QR-BINARY-{i}",
+            )
+            for i in range(10)
+        ]
+
+    def _decode(self, content):
+        from uuid import UUID
+
+        from tickets.manifest import HEADER
+
+        magic, version, flags, _, event_id, count, generated_at = HEADER.unpack_from(
+            content
+        )
+        offset = HEADER.size
+        ids = [
+            UUID(bytes=content[offset + i * 16 : offset + (i + 1) * 16])
+            for i in range(count)
+        ]
+        size = (count + 7) // 8
+        bitmaps = [
+            content[start : start + size]
+            for start in range(offset + count * 16, len(content), size or 1)
+        ]
+        bits = [
+            [bool(bitmap[i >> 3] & (1 << (i & 7))) for i in range(count)]
+            for bitmap in bitmaps
+        ]
+        # Full: used bitmap. Delta: used and removed bitmaps
+        assert len(content) == offset + count * 16 + size * (2 if flags else 1)
+        if flags:
+            return magic, flags, event_id, generated_at, dict(zip(ids, zip(*bits)))
+        return magic, flags, event_id, generated_at, dict(zip(ids, bits[0] if bits else []))
+
+    def test_full_manifest(self, api_client, staff_user, test_event, paid_tickets):
+        paid_tickets[3].is_used = True
+        paid_tickets[3].save()
+
+        api_client.force_authenticate(user=staff_user)
+        url = reverse("event-manifest-binary", args=[test_event.id])
+        response = api_client.get(url)
+
+        assert response.status_code == status.HTTP_200_OK
+        assert response["Content-Type"] == "application/octet-stream"
+        magic, flags, event_id, _, tickets = self._decode(response.content)
+        assert magic == b"CDPM"
+        assert flags == 0
+        assert event_id == int(test_event.id)
+        assert list(tickets) == sorted(tickets, key=lambda t: t.bytes)
+        assert tickets == {t.id: t.id == paid_tickets[3].id for t in paid_tickets}
+
+    def test_not_modified(self, api_client, staff_user, test_event, paid_tickets):
+        api_client.force_authenticate(user=staff_user)
+        url = reverse("event-manifest-binary", args=[test_event.id])
+        etag = api_client.get(url)["ETag"]
+
+        response = api_client.get(url, HTTP_IF_NONE_MATCH=etag)
+        assert response.status_code == status.HTTP_304_NOT_MODIFIED
+        assert response.content == b""
+
+        paid_tickets[0].is_used = True
+        paid_tickets[0].save()
+        response = api_client.get(url, HTTP_IF_NONE_MATCH=etag)
+        assert response.status_code == status.HTTP_200_OK
+
+    def test_cancelled_tickets_leave_the_manifest(
+        self, api_client, staff_user, test_event, test_order, paid_tickets
+    ):
+        api_client.force_authenticate(user=staff_user)
+        url = reverse("event-manifest-binary", args=[test_event.id])
+        etag = api_client.get(url)["ETag"]
+
+        Order.objects.filter(id=test_order.id).update(status="cancelled")
+        response = api_client.get(url, HTTP_IF_NONE_MATCH=etag)
+
+        assert response.status_code == status.HTTP_200_OK
+        _, _, _, _, tickets = self._decode(response.content)
+        assert tickets == {}
+
+    def test_delta_since_last_sync(
+        self, monkeypatch, api_client, staff_user, test_event, test_order, paid_tickets
+    ):
+        from helper_functions import cancel_order
+        from tickets.checkin import check_in_ticket
+
+        monkeypatch.setattr("tickets.views.MANIFEST_DELTA_OVERLAP", datetime.timedelta(0))
+        Ticket.objects.update(updated_at=timezone.now() - datetime.timedelta(hours=1))
+        api_client.force_authenticate(user=staff_user)
+        url = reverse("event-manifest-binary", args=[test_event.id])
+        _, _, _, generated_at, _ = self._decode(api_client.get(url).content)
+
+        check_in_ticket(paid_tickets[5].qr_code_data)
+        response = api_client.get(url, {"since": generated_at})
+
+        _, flags, _, _, tickets = self._decode(response.content)
+        assert flags == 1
+        assert tickets == {paid_tickets[5].id: (True, False)}
+
+        # Cancelled orders delete their tickets, the delta reports them removed
+        other_order = Order.objects.create(
+            id="654321", user=test_order.user, amount=100.00, status="pending"
+        )
+        removed = Ticket.objects.create(
+            name="Guest",
+            cpf="123.456.789-00",
+            order=other_order,
+            event=test_event,
+            type_of_ticket="first batch",
+            qr_code_data="QR-BINARY-REMOVED",
+        )
+        cancel_order(other_order)
+        response = api_client.get(url, {"since": generated_at})
+
+        _, _, _, _, tickets = self._decode(response.content)
+        assert tickets == {
+            paid_tickets[5].id: (True, False),
+            removed.id: (False, True),
+        }
+
+    def test_invalid_since(self, api_client, staff_user, test_event):
+        api_client.force_authenticate(user=staff_user)
+        url = reverse("event-manifest-binary", args=[test_event.id])
+        response = api_client.get(url, {"since": "yesterday"})
+        assert response.status_code == status.HTTP_400_BAD_REQUEST
+
+
+@pytest.mark.django_db(transaction=True)
+class TestCheckInWebSocket:
+    """Organizer dashboards receive coalesced check-in frames"""
+
+    def _connect(self, user, event_id):
+        from channels.testing import WebsocketCommunicator
+        from rest_framework_simplejwt.tokens import AccessToken
+
+        from backend.asgi import application
+
+        token = AccessToken.for_user(user)
+        return WebsocketCommunicator(
+            application,
+            f"/ws/events/{event_id}/check-ins/?token={token}",
+            headers=[(b"origin", b"http://localhost:5173")],
+        )
+
+    def test_scans_are_coalesced(self, staff_user, test_ticket):
+        from asgiref.sync import async_to_sync
+        from channels.db import database_sync_to_async
+
+        from tickets.realtime import publish_check_ins
+
+        async def scenario():
+            communicator = self._connect(staff_user, test_ticket.event_id)
+            connected, _ = await communicator.connect()
+            assert connected
+
+            snapshot = await communicator.receive_json_from()
+            assert snapshot["type"] == "snapshot"
+            assert snapshot["checkedIn"] == 0
+
+            for i in range(5):
+                await database_sync_to_async(publish_check_ins)(
+                    test_ticket.event_id, [{"ticketId": f"t{i}", "usedAt": "now"}]
+                )
+
+            frame = await communicator.receive_json_from(timeout=3)
+            await communicator.disconnect()
+            return frame
+
+        frame = async_to_sync(scenario)()
+        assert frame["type"] == "checkins"
+        assert frame["new"] == 5
+        assert frame["checkedIn"] == 5
+        assert [scan["ticketId"] for scan in frame["recent"]] == [
+            f"t{i}" for i in range(5)
+        ]
+
+    def test_non_staff_is_rejected(self, regular_user, test_event):
+        from asgiref.sync import async_to_sync
+
+        async def scenario():
+            communicator = self._connect(regular_user, test_event.id)
+            connected, code = await communicator.connect()
+            await communicator.disconnect()
+            return connected, code
+
+        connected, code = async_to_sync(scenario)()
+        assert connected is False
+        assert code == 4403
+
+    def test_verify_publishes_check_in(self, api_client, staff_user, test_ticket):
+        from unittest.mock import patch
+
+        api_client.force_authenticate(user=staff_user)
+        with patch("tickets.views.publish_check_ins") as mock_publish:
+            response = api_client.post(
+                reverse("verify-ticket"),
+                {"qr_code_data": test_ticket.qr_code_data},
+                format="json",
+            )
+
+        assert response.status_code == status.HTTP_201_CREATED
+        event_id, scans = mock_publish.call_args.args
+        assert str(event_id) == str(test_ticket.event_id)
+        assert scans[0]["ticketId"] == str(test_ticket.id)
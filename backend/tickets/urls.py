@@ -1,10 +1,33 @@
 from django.urls import path
 
-from .views import VerifyTicketView
+from .views import (
+    BatchCheckInView,
+    EventBinaryManifestView,
+    EventManifestView,
+    VerifyTicketView,
+)
 
 urlpatterns = [
     # Verify Ticket /api/tickets/verify-ticket/
     path(
         "verify-ticket/", VerifyTicketView.as_view(), name="verify-ticket"
     ),  # POST Admin only (validating qr codes in the events)
+    # Offline scanners /api/tickets/events/<event_id>/manifest/
+    path(
+        "events/<int:event_id>/manifest/",
+        EventManifestView.as_view(),
+        name="event-manifest",
+    ),  # GET Admin only
+    # Binary gate manifest /api/tickets/events/<event_id>/manifest.bin
+    path(
+        "events/<int:event_id>/manifest.bin",
+        EventBinaryManifestView.as_view(),
+        name="event-manifest-binary",
+    ),  # GET Admin only
+    # Offline sync /api/tickets/events/<event_id>/check-ins/
+    path(
+        "events/<int:event_id>/check-ins/",
+        BatchCheckInView.as_view(),
+        name="event-check-ins",
+    ),  # POST Admin only
 ]
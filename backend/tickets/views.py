@@ -1,16 +1,36 @@
 import logging
+from datetime import datetime, timedelta, timezone as dt_timezone
+from uuid import UUID
 
-from django.db import transaction
+from django.http import HttpResponse
 from django.utils import timezone
+from django.utils.dateparse import parse_datetime
 from rest_framework import status
 from rest_framework.permissions import IsAuthenticated
 from rest_framework.response import Response
 from rest_framework.views import APIView
 
-from .models import Ticket
+from events.models import Event
+from helper_functions import get_qr_public_key
+
+from .checkin import (
+    bulk_check_in,
+    check_in_ticket,
+    event_manifest,
+    event_manifest_changes,
+    ticket_order_status,
+)
+from .manifest import encode_manifest, manifest_etag
+from .realtime import publish_check_ins
 
 logger = logging.getLogger(__name__)
 
+# Max offline check-ins accepted per request
+CHECK_IN_BATCH_LIMIT = 5000
+# Deltas reach back this much before `since`, for writes committed just after
+# the previous manifest was generated (re-sent entries are idempotent)
+MANIFEST_DELTA_OVERLAP = timedelta(seconds=30)
+
 
 class VerifyTicketView(APIView):
     permission_classes = [IsAuthenticated]
@@ -28,29 +48,195 @@ class VerifyTicketView(APIView):
                 {"error": "QR Code data is required"},
                 status=status.HTTP_400_BAD_REQUEST,
             )
-        try:
-            with transaction.atomic():
-                ticket = Ticket.objects.get(qr_code_data=qr_code)
-        except Ticket.DoesNotExist:
-            return Response(
-                {"error": "Ticket not found"}, status=status.HTTP_404_NOT_FOUND
-            )
-        if ticket.is_used:
+
+        # Single atomic UPDATE ... RETURNING on the indexed token
+        checked_in = check_in_ticket(qr_code)
+        if checked_in is None:
+            # Only the failure path pays for a second lookup
+            order_status = ticket_order_status(qr_code)
+            if order_status is None:
+                return Response(
+                    {"error": "Ticket not found"}, status=status.HTTP_404_NOT_FOUND
+                )
+            if order_status != "paid":
+                return Response(
+                    {"error": "Ticket order is not paid"},
+                    status=status.HTTP_400_BAD_REQUEST,
+                )
             return Response(
                 {"error": "Ticket already verified"}, status=status.HTTP_400_BAD_REQUEST
             )
-        ticket.is_used = True
-        ticket.used_at = timezone.now()
-        ticket.save()
-        logger.info(
-            f"Ticket {ticket.id} verified by {request.user} at {timezone.now()}"
+
+        ticket_id, ticket_name, event_id, event_title = checked_in
+        used_at = timezone.now()
+        logger.info(f"Ticket {ticket_id} verified by {request.user} at {used_at}")
+
+        # 📡 Live attendance dashboards
+        publish_check_ins(
+            event_id,
+            [
+                {
+                    "ticketId": str(ticket_id),
+                    "name": ticket_name,
+                    "usedAt": used_at.isoformat(),
+                }
+            ],
         )
         return Response(
             {
                 "success": True,
                 "message": "Ingresso verificado com sucesso",
-                "userName": ticket.name,
-                "eventTitle": ticket.event.title or "Evento",
+                "userName": ticket_name,
+                "eventTitle": event_title or "Evento",
             },
             status=status.HTTP_201_CREATED,
         )
+
+
+class EventManifestView(APIView):
+    permission_classes = [IsAuthenticated]
+
+    def get(self, request, event_id, format=None):
+        """
+        Manifest for offline scanners: the public key validating signed QR
+        codes and the valid ticket ids of the event, with the used ones.
+        """
+        if not request.user.is_staff:
+            return Response(
+                {"error": "Not authorized"}, status=status.HTTP_403_FORBIDDEN
+            )
+
+        if not Event.objects.filter(id=event_id).exists():
+            return Response(
+                {"error": "Evento não encontrado"}, status=status.HTTP_404_NOT_FOUND
+            )
+
+        tickets = event_manifest(event_id)
+        return Response(
+            {
+                "eventId": event_id,
+                "publicKey": get_qr_public_key(),
+                "generatedAt": timezone.now(),
+                "tickets": [ticket_id.hex for ticket_id, _ in tickets],
+                "used": [ticket_id.hex for ticket_id, is_used in tickets if is_used],
+            },
+            status=status.HTTP_200_OK,
+        )
+
+
+class EventBinaryManifestView(APIView):
+    permission_classes = [IsAuthenticated]
+
+    def get(self, request, event_id, format=None):
+        """
+        Compact binary manifest of an event (see tickets.manifest).
+        ?since=<ms timestamp> returns only the tickets checked in, made valid
+        or removed after it, e.g. the generation time of the last manifest
+        downloaded. Honours If-None-Match with a 304.
+        """
+        if not request.user.is_staff:
+            return Response(
+                {"error": "Not authorized"}, status=status.HTTP_403_FORBIDDEN
+            )
+
+        since = None
+        if request.query_params.get("since"):
+            try:
+                since = datetime.fromtimestamp(
+                    int(request.query_params["since"]) / 1000, tz=dt_timezone.utc
+                )
+            except (ValueError, OverflowError, OSError):
+                return Response(
+                    {"error": "since must be a timestamp in milliseconds"},
+                    status=status.HTTP_400_BAD_REQUEST,
+                )
+
+        if not Event.objects.filter(id=event_id).exists():
+            return Response(
+                {"error": "Evento não encontrado"}, status=status.HTTP_404_NOT_FOUND
+            )
+
+        generated_at = timezone.now()
+        if since is None:
+            tickets = event_manifest(event_id)
+        else:
+            tickets = event_manifest_changes(event_id, since - MANIFEST_DELTA_OVERLAP)
+        etag = manifest_etag(tickets, delta_since=since)
+
+        if etag in request.headers.get("If-None-Match", ""):
+            response = HttpResponse(status=status.HTTP_304_NOT_MODIFIED)
+        else:
+            response = HttpResponse(
+                encode_manifest(
+                    event_id, tickets, generated_at, delta=since is not None
+                ),
+                content_type="application/octet-stream",
+            )
+        response["ETag"] = etag
+        response["Cache-Control"] = "private, no-cache"
+        return response
+
+
+class BatchCheckInView(APIView):
+    permission_classes = [IsAuthenticated]
+
+    def post(self, request, event_id, format=None):
+        """
+        Sync check-ins recorded offline by the scanners of an event.
+        Body: {"checkIns": [{"ticketId": "...", "scannedAt": "ISO 8601"}]}
+        """
+        if not request.user.is_staff:
+            return Response(
+                {"error": "Not authorized"}, status=status.HTTP_403_FORBIDDEN
+            )
+
+        check_ins = request.data.get("checkIns")
+        if not isinstance(check_ins, list) or not check_ins:
+            return Response(
+                {"error": "checkIns is required"},
+                status=status.HTTP_400_BAD_REQUEST,
+            )
+        if len(check_ins) > CHECK_IN_BATCH_LIMIT:
+            return Response(
+                {"error": f"At most {CHECK_IN_BATCH_LIMIT} check-ins per request"},
+                status=status.HTTP_400_BAD_REQUEST,
+            )
+
+        now = timezone.now()
+        scans, invalid = [], []
+        for entry in check_ins:
+            try:
+                ticket_id = UUID(str(entry["ticketId"]))
+                scanned_at = parse_datetime(entry.get("scannedAt") or "") or now
+            except (KeyError, TypeError, ValueError, AttributeError):
+                invalid.append(entry)
+                continue
+            if timezone.is_naive(scanned_at):
+                scanned_at = timezone.make_aware(scanned_at)
+            scans.append((ticket_id, min(scanned_at, now)))
+
+        result = bulk_check_in(event_id, scans)
+        result["invalid"] = invalid
+
+        # 📡 Live attendance dashboards
+        scanned_at = {}
+        for ticket_id, at in scans:
+            scanned_at[ticket_id] = min(at, scanned_at.get(ticket_id, at))
+        publish_check_ins(
+            event_id,
+            [
+                {
+                    "ticketId": ticket_id,
+                    "usedAt": scanned_at[UUID(ticket_id)].isoformat(),
+                }
+                for ticket_id in result["accepted"]
+            ],
+        )
+
+        logger.info(
+            f"Offline sync by {request.user} for event {event_id}: "
+            f"{len(result['accepted'])} accepted, "
+            f"{len(result['duplicates'])} duplicates, "
+            f"{len(result['unknown'])} unknown"
+        )
+        return Response(result, status=status.HTTP_200_OK)
@@ -0,0 +1,23 @@
+# Generated by Django 5.2.8 on 2026-10-16 23:33
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("users", "0001_initial"),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name="user",
+            name="asaas_customer_id",
+            field=models.CharField(blank=True, max_length=255),
+        ),
+        migrations.AlterField(
+            model_name="user",
+            name="email_verification_code",
+            field=models.CharField(blank=True, max_length=128),
+        ),
+    ]
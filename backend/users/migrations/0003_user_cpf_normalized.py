@@ -0,0 +1,62 @@
+import re
+
+from django.db import migrations, models
+
+BATCH_SIZE = 2000
+
+
+def backfill_cpf_normalized(apps, schema_editor):
+    User = apps.get_model("users", "User")
+
+    seen = dict(
+        User.objects.filter(cpf_normalized__isnull=False).values_list(
+            "cpf_normalized", "id"
+        )
+    )
+    duplicates = []
+    last_id = 0
+    while True:
+        batch = list(
+            User.objects.filter(id__gt=last_id, cpf_normalized__isnull=True)
+            .order_by("id")
+            .only("id", "cpf")[:BATCH_SIZE]
+        )
+        if not batch:
+            break
+        last_id = batch[-1].id
+
+        updated = []
+        for user in batch:
+            digits = re.sub(r"\D", "", user.cpf or "")
+            if not digits:
+                continue
+            # Older rows may hold the same CPF in two formats
+            if digits in seen:
+                duplicates.append(f"user {user.id} (same CPF as user {seen[digits]})")
+                continue
+            seen[digits] = user.id
+            user.cpf_normalized = digits
+            updated.append(user)
+        User.objects.bulk_update(updated, ["cpf_normalized"])
+
+    # A NULL left here would only fail later, on the user's next save
+    if duplicates:
+        raise RuntimeError(
+            "Duplicate CPFs must be resolved before migrating: " + ", ".join(duplicates)
+        )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("users", "0002_user_asaas_customer_id"),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name="user",
+            name="cpf_normalized",
+            field=models.CharField(editable=False, max_length=14, null=True),
+        ),
+        migrations.RunPython(backfill_cpf_normalized, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,18 @@
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("users", "0003_user_cpf_normalized"),
+    ]
+
+    operations = [
+        migrations.AlterField(
+            model_name="user",
+            name="cpf_normalized",
+            field=models.CharField(
+                editable=False, max_length=14, null=True, unique=True
+            ),
+        ),
+    ]
@@ -0,0 +1,21 @@
+# Generated by Django 5.2.8 on 2026-10-17 00:00
+
+from django.db import migrations
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("users", "0004_alter_user_cpf_normalized"),
+    ]
+
+    operations = [
+        migrations.RemoveField(
+            model_name="user",
+            name="email_verification_code",
+        ),
+        migrations.RemoveField(
+            model_name="user",
+            name="email_verification_code_expires_at",
+        ),
+    ]
@@ -30,6 +30,12 @@ class User(AbstractUser):
     email = models.EmailField(unique=True)
 
     cpf = models.CharField(max_length=14, unique=True)
+    cpf_normalized = models.CharField(
+        max_length=14, unique=True, null=True, editable=False
+    )
+    """
+    Digits-only CPF kept in sync with `cpf`, used for indexed equality lookups.
+    """
     phone = models.CharField(max_length=20)
     birth_date = models.DateField()
     address = models.TextField()
@@ -52,9 +58,10 @@ class User(AbstractUser):
     Whether the user's email is verified.
     """
 
-    # Email verification (6 digits code hashed)
-    email_verification_code = models.CharField(max_length=128, blank=True)
-    email_verification_code_expires_at = models.DateTimeField(null=True, blank=True)
+    asaas_customer_id = models.CharField(max_length=255, blank=True)
+    """
+    The Asaas customer id for this user's CPF, cached to skip the remote lookup.
+    """
 
     USERNAME_FIELD = "email"
     REQUIRED_FIELDS = []
@@ -66,3 +73,12 @@ class User(AbstractUser):
 
     def __str__(self):
         return self.email
+
+    def save(self, *args, **kwargs):
+        from helper_functions import normalize_cpf
+
+        self.cpf_normalized = normalize_cpf(self.cpf) or None
+        update_fields = kwargs.get("update_fields")
+        if update_fields is not None and "cpf" in update_fields:
+            kwargs["update_fields"] = {*update_fields, "cpf_normalized"}
+        super().save(*args, **kwargs)
@@ -114,18 +114,14 @@ class RegisterSerializer(serializers.Serializer):
         """
         Validate that the CPF is unique and normalize formatting.
         """
-        import re
+        from helper_functions import format_cpf, normalize_cpf
 
-        # Clean the CPF (remove non-digit characters)
-        digits_only = re.sub(r"\D", "", value)
-
-        if User.objects.filter(cpf__regex=r"^\D*" + digits_only + r"\D*$").exists():
+        # Equality lookup on the indexed digits-only column
+        if User.objects.filter(cpf_normalized=normalize_cpf(value)).exists():
             raise serializers.ValidationError("Este CPF já está cadastrado.")
 
         # Return normalized version
-        return (
-            f"{digits_only[:3]}.{digits_only[3:6]}.{digits_only[6:9]}-{digits_only[9:]}"
-        )
+        return format_cpf(value)
 
     def validate_birth_date(self, value):
         from datetime import datetime
@@ -7,6 +7,14 @@ from unittest.mock import patch
 from users.models import User
 
 
+@pytest.fixture(autouse=True)
+def clear_cache():
+    """Verification codes live in the cache, start every test without any"""
+    from django.core.cache import cache
+
+    cache.clear()
+
+
 @pytest.fixture
 def api_client():
     """Fixture for API client"""
@@ -91,6 +99,39 @@ class TestRegisterView:
         # Cleanup
         User.objects.filter(email=test_user_data['email']).delete()
 
+    def test_register_duplicate_cpf_in_other_format(self, api_client, test_user_data):
+        """Test registration with an already registered CPF written without punctuation"""
+        User.objects.create_user(**test_user_data)
+
+        url = reverse('register')
+        register_data = {
+            "email": "other@example.com",
+            "name": "Other User",
+            "password": test_user_data['password'],
+            "password_confirm": test_user_data['password'],
+            "cpf": "12345678900",
+            "phone": test_user_data['phone'],
+            "birth_date": test_user_data['birth_date'].strftime('%d/%m/%Y'),
+            "address": test_user_data['address']
+        }
+
+        with patch('users.views.send_verification_email'):
+            response = api_client.post(url, register_data, format='json')
+
+        assert response.status_code in [status.HTTP_400_BAD_REQUEST, status.HTTP_500_INTERNAL_SERVER_ERROR]
+        assert not User.objects.filter(email="other@example.com").exists()
+
+    def test_cpf_normalized_is_stored(self, test_user_data):
+        """Test the digits-only CPF is kept in sync with the CPF"""
+        user = User.objects.create_user(**test_user_data)
+        assert user.cpf_normalized == "12345678900"
+
+        user.cpf = "987.654.321-00"
+        user.save(update_fields=["cpf"])
+
+        user.refresh_from_db()
+        assert user.cpf_normalized == "98765432100"
+
 
 @pytest.mark.django_db
 class TestVerifyCodeView:
@@ -98,16 +139,11 @@ class TestVerifyCodeView:
     
     def test_verify_code_success(self, api_client, test_user_data):
         """Test successful email verification"""
-        from django.contrib.auth.hashers import make_password
-        from helper_functions import generate_verification_code, get_code_expiration
+        from users.verification import issue_code
         
         # Create user with verification code
         user = User.objects.create_user(**test_user_data)
-        verification_code = generate_verification_code()
-        user.email_verification_code = make_password(verification_code)
-        user.email_verification_code_expires_at = get_code_expiration()
-        user.is_email_verified = False
-        user.save()
+        verification_code = issue_code(user.email)
         
         url = reverse('verify-code')
         data = {
@@ -123,20 +159,20 @@ class TestVerifyCodeView:
         # Verify user is now verified
         user.refresh_from_db()
         assert user.is_email_verified is True
+
+        # The code is consumed
+        response = api_client.post(url, data, format='json')
+        assert response.status_code == status.HTTP_400_BAD_REQUEST
         
         # Cleanup
         user.delete()
     
     def test_verify_code_invalid(self, api_client, test_user_data):
         """Test verification with invalid code"""
-        from django.contrib.auth.hashers import make_password
-        from helper_functions import get_code_expiration
+        from users.verification import issue_code
         
         user = User.objects.create_user(**test_user_data)
-        user.email_verification_code = make_password("123456")
-        user.email_verification_code_expires_at = get_code_expiration()
-        user.is_email_verified = False
-        user.save()
+        issue_code(user.email)
         
         url = reverse('verify-code')
         data = {
@@ -150,6 +186,56 @@ class TestVerifyCodeView:
         # Cleanup
         user.delete()
 
+    def test_verify_code_locked_after_max_attempts(self, api_client, test_user_data):
+        """Test the code is discarded after too many wrong guesses"""
+        from users.verification import VERIFICATION_MAX_ATTEMPTS, issue_code
+
+        user = User.objects.create_user(**test_user_data)
+        verification_code = issue_code(user.email)
+        wrong_code = "000000" if verification_code != "000000" else "111111"
+
+        url = reverse('verify-code')
+        for _ in range(VERIFICATION_MAX_ATTEMPTS):
+            response = api_client.post(url, {"email": user.email, "code": wrong_code}, format='json')
+            assert response.status_code == status.HTTP_400_BAD_REQUEST
+
+        response = api_client.post(url, {"email": user.email, "code": verification_code}, format='json')
+        assert response.status_code == status.HTTP_429_TOO_MANY_REQUESTS
+
+        user.refresh_from_db()
+        assert user.is_email_verified is False
+
+
+@pytest.mark.django_db
+class TestResendCodeView:
+    """Tests for ResendCodeView"""
+
+    def test_resend_is_rate_limited(self, api_client, test_user_data):
+        """Test a second code inside the cooldown is refused"""
+        user = User.objects.create_user(**test_user_data)
+        url = reverse('resend-code')
+
+        with patch('users.views.send_verification_email') as mock_send:
+            response = api_client.post(url, {"email": user.email}, format='json')
+            assert response.status_code == status.HTTP_200_OK
+
+            response = api_client.post(url, {"email": user.email}, format='json')
+            assert response.status_code == status.HTTP_429_TOO_MANY_REQUESTS
+
+        mock_send.assert_called_once()
+
+    def test_resent_code_verifies(self, api_client, test_user_data):
+        """Test the resent code verifies the email"""
+        user = User.objects.create_user(**test_user_data)
+
+        with patch('users.views.send_verification_email') as mock_send:
+            api_client.post(reverse('resend-code'), {"email": user.email}, format='json')
+
+        code = mock_send.call_args.args[1]
+        response = api_client.post(reverse('verify-code'), {"email": user.email, "code": code}, format='json')
+
+        assert response.status_code == status.HTTP_200_OK
+
 
 @pytest.mark.django_db
 class TestLoginView:
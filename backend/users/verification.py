@@ -0,0 +1,92 @@
+import logging
+from hashlib import sha256
+from os import getenv
+
+from django.core.cache import cache
+from django.utils.crypto import constant_time_compare, salted_hmac
+from dotenv import load_dotenv
+
+from helper_functions import generate_verification_code
+
+load_dotenv()
+
+logger = logging.getLogger(__name__)
+
+# Minutes an email verification code stays valid
+VERIFICATION_CODE_TTL_MINUTES = int(getenv("VERIFICATION_CODE_TTL_MINUTES", "15"))
+# Wrong guesses allowed per code before it is discarded
+VERIFICATION_MAX_ATTEMPTS = int(getenv("VERIFICATION_MAX_ATTEMPTS", "5"))
+# Seconds between two codes sent to the same email
+VERIFICATION_RESEND_COOLDOWN = int(getenv("VERIFICATION_RESEND_COOLDOWN", "60"))
+# Codes sent to the same email per hour
+VERIFICATION_MAX_CODES_PER_HOUR = int(getenv("VERIFICATION_MAX_CODES_PER_HOUR", "5"))
+
+# verify_code results
+VERIFIED = "verified"
+INVALID = "invalid"
+EXPIRED = "expired"
+LOCKED = "locked"
+
+
+def _key(kind: str, email: str) -> str:
+    return f"users:verification:{kind}:{sha256(email.lower().encode()).hexdigest()}"
+
+
+def _digest(email: str, code: str) -> str:
+    # Keyed with SECRET_KEY, a leaked cache does not reveal the codes
+    return salted_hmac("users.verification", f"{email.lower()}:{code}").hexdigest()
+
+
+def issue_code(email: str):
+    """
+    Generate a verification code for the email and store its HMAC in the cache,
+    replacing any previous code.
+
+    Returns: the code to send, or None if the email is rate limited.
+    """
+    if not cache.add(_key("cooldown", email), 1, timeout=VERIFICATION_RESEND_COOLDOWN):
+        return None
+
+    sent_key = _key("sent", email)
+    cache.add(sent_key, 0, timeout=3600)
+    if cache.incr(sent_key) > VERIFICATION_MAX_CODES_PER_HOUR:
+        logger.warning(f"⚠️ Verification code rate limit reached for {email}")
+        return None
+
+    code = generate_verification_code()
+    ttl = VERIFICATION_CODE_TTL_MINUTES * 60
+    cache.set_many(
+        {_key("code", email): _digest(email, code), _key("attempts", email): 0},
+        timeout=ttl,
+    )
+    return code
+
+
+def verify_code(email: str, code: str) -> str:
+    """
+    Check a verification code, counting every attempt.
+    A successful check consumes the code.
+
+    Returns: VERIFIED, INVALID, EXPIRED or LOCKED.
+    """
+    code_key, attempts_key = _key("code", email), _key("attempts", email)
+
+    digest = cache.get(code_key)
+    if digest is None:
+        return EXPIRED
+
+    try:
+        attempts = cache.incr(attempts_key)
+    except ValueError:
+        # The attempts counter expired between both reads
+        return EXPIRED
+
+    if attempts > VERIFICATION_MAX_ATTEMPTS:
+        cache.delete_many([code_key, attempts_key])
+        return LOCKED
+
+    if not constant_time_compare(digest, _digest(email, code)):
+        return INVALID
+
+    cache.delete_many([code_key, attempts_key])
+    return VERIFIED
@@ -1,20 +1,15 @@
 import logging
 
-from django.contrib.auth.hashers import check_password, make_password
+from django.contrib.auth.hashers import check_password
 from django.db import transaction
 from django.db.models.base import ValidationError
-from django.utils import timezone
 from rest_framework import status
 from rest_framework.permissions import AllowAny, IsAuthenticated
 from rest_framework.response import Response
 from rest_framework.views import APIView
 from rest_framework_simplejwt.tokens import RefreshToken
 
-from helper_functions import (
-    generate_verification_code,
-    get_code_expiration,
-    verify_reset_token,
-)
+from helper_functions import verify_reset_token
 from tasks.email_tasks import send_password_reset_email, send_verification_email
 
 from .models import User
@@ -26,6 +21,7 @@ from .serializers import (
     UserSerializer,
     VerifyCodeSerializer,
 )
+from .verification import EXPIRED, LOCKED, VERIFIED, issue_code, verify_code
 
 logger = logging.getLogger(__name__)
 
@@ -46,19 +42,14 @@ class RegisterView(APIView):
                 # Create user and send verification email
                 with transaction.atomic():
                     user = serializer.save()
-                    verification_code = generate_verification_code()
-
-                    user.email_verification_code = make_password(verification_code)
-                    user.email_verification_code_expires_at = get_code_expiration()
-                    user.save()
 
                     print("✅ Created user:", user.email)
-                    print("✅ Verification code:", verification_code)
 
-                transaction.on_commit(
-                    lambda: send_verification_email(user.email, verification_code)
-                )
-                print("✅ on_commit registered for:", user.email)
+                # The code lives in the cache, the users row is not touched again
+                verification_code = issue_code(user.email)
+                if verification_code:
+                    send_verification_email(user.email, verification_code)
+                    logger.info(f"✅ Verification email sent to user {user.pk}")
 
                 return Response(
                     {
@@ -117,13 +108,14 @@ class VerifyCodeView(APIView):
                         status=status.HTTP_400_BAD_REQUEST,
                     )
 
-                if not check_password(verification_code, user.email_verification_code):
+                if user.is_email_verified:
                     return Response(
-                        {"Erro": "Código de verificação inválido."},
+                        {"Erro": "Email já verificado."},
                         status=status.HTTP_400_BAD_REQUEST,
                     )
 
-                if user.email_verification_code_expires_at < timezone.now():
+                result = verify_code(user.email, verification_code)
+                if result == EXPIRED:
                     return Response(
                         {
                             "Erro": "Código de verificação expirado. Por favor, solicite um novo."
@@ -131,17 +123,23 @@ class VerifyCodeView(APIView):
                         status=status.HTTP_400_BAD_REQUEST,
                     )
 
-                if user.is_email_verified:
+                if result == LOCKED:
                     return Response(
-                        {"Erro": "Email já verificado."},
+                        {
+                            "Erro": "Muitas tentativas inválidas. Por favor, solicite um novo código."
+                        },
+                        status=status.HTTP_429_TOO_MANY_REQUESTS,
+                    )
+
+                if result != VERIFIED:
+                    return Response(
+                        {"Erro": "Código de verificação inválido."},
                         status=status.HTTP_400_BAD_REQUEST,
                     )
 
-                # Mark the user as email verified and clear the verification code fields
+                # Mark the user as email verified
                 user.is_email_verified = True
-                user.email_verification_code = ""
-                user.email_verification_code_expires_at = None
-                user.save()
+                user.save(update_fields=["is_email_verified"])
 
                 # Generate JWT tokens
                 refresh = RefreshToken.for_user(user)
@@ -199,24 +197,17 @@ class ResendCodeView(APIView):
                     {"Erro": "Email já verificado."}, status=status.HTTP_400_BAD_REQUEST
                 )
 
-            if user.email_verification_code_expires_at > timezone.now():
+            new_verification_code = issue_code(user.email)
+            if not new_verification_code:
                 return Response(
                     {
-                        "Erro": "Código de verificação ainda válido. Aguarde até que expire."
+                        "Erro": "Muitos códigos solicitados. Aguarde alguns minutos e tente novamente."
                     },
-                    status=status.HTTP_400_BAD_REQUEST,
+                    status=status.HTTP_429_TOO_MANY_REQUESTS,
                 )
 
-            new_verification_code = generate_verification_code()
-            with transaction.atomic():
-                user.email_verification_code = make_password(new_verification_code)
-                user.email_verification_code_expires_at = get_code_expiration()
-                user.save()
-
             # Send the new verification code to the user's email
-            transaction.on_commit(
-                lambda: send_verification_email(user.email, new_verification_code)
-            )
+            send_verification_email(user.email, new_verification_code)
 
             return Response(
                 {"message": "Novo código de verificação enviado para o email."},